@@ -2,42 +2,182 @@
 """
 Web application for Text RPG Game
 """
-from flask import Flask, render_template, request, jsonify, session
-from flask_socketio import SocketIO
+from flask import Flask, Response, render_template, request, jsonify, session, abort, send_file
+from flask_socketio import SocketIO, emit
+import atexit
 import json
+import os
+import random
+import tempfile
+import time
 import uuid
-from game.game_manager import GameManager
+from game.game_manager import GameManager, DEATH_OPTIONS
+from game.enemies import GOBLIN, OLD_MAN
 from game.items import STICK
+from game.memory import AllocationTracer, summarize_games
+from game.metrics import Metrics, CONTENT_TYPE
+from game.profiling import ProfileStore, PROFILE_SORTS
+from game.world import MAP_SIZE as DEFAULT_MAP_SIZE
+from game.session_store import SessionStore
+from game.sharding import HashRing
+from game.snapshot_store import SnapshotStore
 
 app = Flask(__name__)
-app.secret_key = 'text_rpg_secret_key'
+app.secret_key = os.environ.get('TEXT_RPG_SECRET_KEY', 'text_rpg_secret_key')
 socketio = SocketIO(app)
 
-# Store active games
-games = {}
+# Store active games; games evicted from memory are spilled to disk and
+# restored when their session comes back, since sessions never time out
+games = SessionStore(
+    max_sessions=int(os.environ.get('TEXT_RPG_MAX_SESSIONS', 10000)),
+    max_bytes=int(os.environ['TEXT_RPG_SESSION_BYTES']) if 'TEXT_RPG_SESSION_BYTES' in os.environ else None,
+    idle_ttl=float(os.environ.get('TEXT_RPG_SESSION_IDLE_TTL', 1800)),
+    spill_dir=os.environ.get('TEXT_RPG_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'text_rpg_sessions')) or None
+)
+
+# Width and height of the world maps of new games
+MAP_SIZE = int(os.environ.get('TEXT_RPG_MAP_SIZE', DEFAULT_MAP_SIZE))
+
+# Set when running as one worker of serve.py
+WORKER_ID = os.environ.get('TEXT_RPG_WORKER_ID')
+
+# Durable snapshots of every game, written in batches off the request path
+snapshots = SnapshotStore(
+    os.environ.get('TEXT_RPG_SNAPSHOT_DB', os.path.join(tempfile.gettempdir(), 'text_rpg_snapshots.sqlite3')),
+    flush_interval=float(os.environ.get('TEXT_RPG_SNAPSHOT_INTERVAL', 1.0))
+)
+atexit.register(snapshots.close)
+
+# Opt-in profiles of /api/action requests; TEXT_RPG_PROFILE_EVERY=N also
+# profiles one in every N requests
+profiles = ProfileStore(
+    os.environ.get('TEXT_RPG_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'text_rpg_profiles')),
+    sample_every=int(os.environ.get('TEXT_RPG_PROFILE_EVERY', 0)),
+    max_profiles=int(os.environ.get('TEXT_RPG_PROFILE_KEEP', 100))
+)
+
+# Addresses of clients on this host
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+# Set by serve.py's router to the address of the client it forwards for
+FORWARDED_FOR_HEADER = 'X-Forwarded-For'
+
+# Local clients send this header to profile a single request
+PROFILE_HEADER = 'X-Text-RPG-Profile'
+
+# Games measured by /internal/memory unless the request sets a limit
+MEMORY_SAMPLE = 1000
+
+# Attributes allocations to modules while enabled through /internal/memory/trace
+allocation_tracer = AllocationTracer()
+
+# Every action is logged; a snapshot is also taken every this many actions,
+# and games are recovered by replaying the actions logged since then
+SNAPSHOT_EVERY = int(os.environ.get('TEXT_RPG_SNAPSHOT_EVERY', 20))
+
+# Choices offered on every battle turn
+BATTLE_OPTIONS = ['Attack', 'Defend', 'Flee']
+
+# Request fields that only control how the response is sent
+TRANSPORT_FIELDS = ('delta', 'version', 'seq')
+
+# Action events with their own metric labels; anything else is 'other'
+METRIC_EVENTS = ('first_encounter', 'map', 'battle', 'location', 'death')
+
+# Instrumentation served on /metrics
+metrics = Metrics()
+action_latency = metrics.histogram('text_rpg_action_seconds', "Time to apply a player action",
+                                   ('event', 'choice'))
+metrics.observed('text_rpg_resident_sessions', "Games held in memory", lambda: len(games))
+for stat, kind, description in (('bytes', 'gauge', "Estimated bytes of games held in memory"),
+                         ('hits', 'counter', "Session lookups served from memory"),
+                         ('misses', 'counter', "Session lookups not found in memory"),
+                         ('evictions', 'counter', "Games moved out of memory"),
+                         ('restores', 'counter', "Games restored from spill files")):
+    metrics.observed(f'text_rpg_session_store_{stat}' + ('_total' if kind == 'counter' else ''), description,
+                     lambda stat=stat: games.get_stats()[stat], kind)
+metrics.observed('text_rpg_snapshot_writes_total', "Snapshots written to the database",
+                 lambda: snapshots.writes, 'counter')
+
+def is_local_request():
+    """Check if the request comes from this host, directly or through serve.py's router"""
+    # The router connects from this host and passes on its client's address
+    client_addr = request.headers.get(FORWARDED_FOR_HEADER, request.remote_addr)
+    return request.remote_addr in LOOPBACK_ADDRESSES and client_addr in LOOPBACK_ADDRESSES
+
+def get_session_id():
+    """Get the session ID, creating one if needed"""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return session['session_id']
+
+def get_game():
+    """Get the game for the current session, restoring or creating it if needed"""
+    session_id = get_session_id()
+    game = games.get(session_id)
+    if game is None:
+        # Restore lazily from the last snapshot and the actions logged
+        # after it, e.g. after a restart
+        game = snapshots.load(session_id)
+        if game is not None:
+            replay_actions(game, snapshots.load_actions(session_id, game.log_seq))
+        else:
+            # Snapshot new games too, or their logged actions could never be replayed
+            game = GameManager(map_size=MAP_SIZE)
+            snapshots.save(session_id, game)
+        games[session_id] = game
+    return game
+
+def apply_action(game, data):
+    """Apply a player action and add it to the session's action log"""
+    start = time.perf_counter()
+    session_id = get_session_id()
+    # Random rolls come from the game's own generator, whose state is in
+    # the snapshot, so the action is all a replay needs
+    action = {key: value for key, value in data.items() if key not in TRANSPORT_FIELDS}
+    response = process_action(game, action)
+    game.log_seq += 1
+    snapshots.append(session_id, game.log_seq, action)
+    if game.log_seq % SNAPSHOT_EVERY == 0:
+        snapshots.save(session_id, game)
+    action_latency.observe(time.perf_counter() - start, *get_metric_labels(action))
+    return response
+
+def get_metric_labels(action):
+    """Get the (event, choice) metric labels for an action"""
+    # Labels come from client input, so unknown values are grouped to
+    # keep the number of series bounded
+    event = action.get('event')
+    choice = action.get('choice')
+    return (event if event in METRIC_EVENTS else 'other',
+            str(choice) if type(choice) is int and 0 <= choice <= 9 else 'other')
+
+def replay_actions(game, actions):
+    """Reapply logged (seq, action) pairs to a game restored from a snapshot"""
+    for seq, action in actions:
+        process_action(game, action)
+        game.log_seq = seq
+    return game
 
 @app.route('/')
 def index():
     """Render the main game page"""
-    # Create a unique session ID if not exists
-    if 'session_id' not in session:
-        session['session_id'] = str(uuid.uuid4())
-    
-    # Create a new game for this session if not exists
-    if session['session_id'] not in games:
-        games[session['session_id']] = GameManager()
+    # Games are created on the first API call, so page views from
+    # crawlers and health checks don't allocate a game
+    get_session_id()
     
     return render_template('index.html')
 
 @app.route('/api/start_game', methods=['POST'])
 def start_game():
     """Start a new game"""
-    session_id = session['session_id']
-    game = games[session_id]
+    session_id = get_session_id()
     
-    # Reset game if needed
-    games[session_id] = GameManager()
-    game = games[session_id]
+    # Reset game if needed; the new game starts a new action log
+    game = GameManager(map_size=MAP_SIZE)
+    games[session_id] = game
+    snapshots.delete(session_id)
+    snapshots.save(session_id, game)
     
     # Get initial location description
     location_desc = game.world.get_location_description(game.world.get_current_cell())
@@ -62,15 +202,43 @@ def start_game():
 
 @app.route('/api/action', methods=['POST'])
 def take_action():
-    """Process a player action"""
+    """Process a player action, profiling it if requested or sampled"""
+    session_id = get_session_id()
+    requested = bool(request.headers.get(PROFILE_HEADER)) and is_local_request()
+    if profiles.should_profile(session_id, requested):
+        event = (request.get_json(silent=True) or {}).get('event')
+        return profiles.profile(handle_action, session=session_id, event=event)
+    return handle_action()
+
+def handle_action():
+    """Apply the request's action and build the JSON response"""
     data = request.json
-    action = data.get('action')
+    game = get_game()
+    
+    response = encode_response(game, data, apply_action(game, data))
+    
+    return jsonify(response)
+
+def encode_response(game, data, response):
+    """Encode a response as a patch when the client opted in with 'delta'"""
+    if data.get('delta'):
+        return game.response_delta.encode(response, data.get('version'))
+    return response
+
+def get_player_status(game):
+    """Get the player status included in every response"""
+    return {
+        'health': game.player.health,
+        'max_health': game.player.max_health,
+        'gold': game.player.gold,
+        'is_vampire': game.player.is_vampire
+    }
+
+def process_action(game, data):
+    """Apply a player action to a game and build the response"""
     event = data.get('event')
     choice = data.get('choice')
     
-    session_id = session['session_id']
-    game = games[session_id]
-    
     response = {}
     
     # Handle first encounter
@@ -85,26 +253,22 @@ def take_action():
                 'options': map_options
             }
         elif choice == 2:  # Take and move on
-            game.player.add_gold(10)
-            game.player.add_item(STICK)
-            game.player.equip_weapon(STICK)
+            game.reward_gold(10)
+            game.reward_item(STICK, equip=True)
             response = {
                 'message': 'You accept the offering and thank the old man. The old man smiles and wishes you good luck on your journey.',
                 'event': 'map',
                 'options': map_options
             }
         elif choice == 3:  # Take and fight
-            game.player.add_gold(10)
-            game.player.add_item(STICK)
-            game.player.equip_weapon(STICK)
+            game.reward_gold(10)
+            game.reward_item(STICK, equip=True)
+            battle = game.start_battle(OLD_MAN)
             response = {
                 'message': 'You take the offering and then attack the old man!',
                 'event': 'battle',
-                'enemy': {
-                    'name': 'Old Man',
-                    'health': 5
-                },
-                'options': ['Attack', 'Defend', 'Flee']
+                'enemy': battle.get_enemy_status(),
+                'options': BATTLE_OPTIONS
             }
     
     # Handle map actions
@@ -127,14 +291,12 @@ def take_action():
                 from game.world import CellType, MajorEventType
                 
                 if cell_content == CellType.ENEMY:
+                    battle = game.start_battle(GOBLIN)
                     response = {
                         'message': f'{message}\\nYou encounter a Goblin!',
                         'event': 'battle',
-                        'enemy': {
-                            'name': 'Goblin',
-                            'health': 3
-                        },
-                        'options': ['Attack', 'Defend', 'Flee']
+                        'enemy': battle.get_enemy_status(),
+                        'options': BATTLE_OPTIONS
                     }
                 else:
                     # Check if there are location-specific actions available
@@ -174,141 +336,52 @@ def take_action():
                     'options': movement_options
                 }
     
-    # Handle battle actions
-    elif event == 'battle':
-        enemy_name = data.get('enemy_name')
-        enemy_health = data.get('enemy_health')
+    # Handle battle actions; the battle itself is kept on the server
+    elif event == 'battle' and game.battle is not None:
+        result = game.battle_turn(choice)
         
-        if choice == 1:  # Attack
-            damage = game.player.get_attack_damage()
-            enemy_health -= damage
-            
-            message = f"You attack the {enemy_name} for {damage} damage!"
-            
-            if enemy_health <= 0:
-                # Enemy defeated
-                import random
-                gold_reward = random.randint(1, 5)
-                game.player.add_gold(gold_reward)
-                
+        if result is not None:
+            outcome, message = result
+            if outcome == 'lost':
                 response = {
-                    'message': f"{message}\nYou defeated the {enemy_name}!\nYou found {gold_reward} gold!",
-                    'event': 'map',
-                    'options': ['Move North', 'Move East', 'Move South', 'Move West']
+                    'message': message,
+                    'event': 'death',
+                    'options': DEATH_OPTIONS
+                }
+            elif outcome == 'ongoing':
+                response = {
+                    'message': message,
+                    'event': 'battle',
+                    'enemy': game.battle.get_enemy_status(),
+                    'options': BATTLE_OPTIONS
                 }
             else:
-                # Enemy attacks back
-                enemy_damage = 1
-                game.player.take_damage(enemy_damage)
-                
-                if game.player.health <= 0:
-                    # Player died
-                    response = {
-                        'message': f"{message}\nThe {enemy_name} attacks you for {enemy_damage} damage!\nYou have been defeated!",
-                        'event': 'death',
-                        'options': [
-                            'Lose everything and start new',
-                            'Resurrect as a vampire (keep items but take 5% damage during day)'
-                        ]
-                    }
-                else:
-                    response = {
-                        'message': f"{message}\nThe {enemy_name} attacks you for {enemy_damage} damage!",
-                        'event': 'battle',
-                        'enemy': {
-                            'name': enemy_name,
-                            'health': enemy_health
-                        },
-                        'options': ['Attack', 'Defend', 'Flee']
-                    }
-        
-        elif choice == 2:  # Defend
-            enemy_damage = 0
-            message = "You take a defensive stance.\nThe enemy's attack does no damage!"
-            
-            response = {
-                'message': message,
-                'event': 'battle',
-                'enemy': {
-                    'name': enemy_name,
-                    'health': enemy_health
-                },
-                'options': ['Attack', 'Defend', 'Flee']
-            }
-        
-        elif choice == 3:  # Flee
-            # 50% chance to successfully flee
-            import random
-            if random.random() < 0.5:
                 response = {
-                    'message': f"You successfully flee from the {enemy_name}!",
+                    'message': message,
                     'event': 'map',
                     'options': ['Move North', 'Move East', 'Move South', 'Move West']
                 }
-            else:
-                # Failed to flee, enemy attacks
-                enemy_damage = 1
-                game.player.take_damage(enemy_damage)
-                
-                if game.player.health <= 0:
-                    # Player died
-                    response = {
-                        'message': f"You failed to flee!\nThe {enemy_name} attacks you for {enemy_damage} damage!\nYou have been defeated!",
-                        'event': 'death',
-                        'options': [
-                            'Lose everything and start new',
-                            'Resurrect as a vampire (keep items but take 5% damage during day)'
-                        ]
-                    }
-                else:
-                    response = {
-                        'message': f"You failed to flee!\nThe {enemy_name} attacks you for {enemy_damage} damage!",
-                        'event': 'battle',
-                        'enemy': {
-                            'name': enemy_name,
-                            'health': enemy_health
-                        },
-                        'options': ['Attack', 'Defend', 'Flee']
-                    }
     
     # Handle location interactions
     elif event == 'location':
-        location_type = data.get('location_type')
-        
         if choice <= 3:  # Location-specific actions
-            # Handle the interaction
-            old_gold = game.player.gold
-            old_health = game.player.health
-            
-            # Call the interaction method with the choice
-            interaction_result = game.handle_location_interaction(choice)
-            
-            # Check if this triggers a battle
-            battle_triggers = {
-                'enemy': (choice == 1),
-                'dragon': (choice == 1 or (choice == 2 and 'failed' in interaction_result) or (choice == 3 and 'inevitable' in interaction_result)),
-                'boss_enemy': (choice == 1 or (choice == 3 and 'failed' in interaction_result))
-            }
+            # The interaction decides whether it starts a battle
+            result = game.run_interaction(choice)
             
-            if location_type in battle_triggers and battle_triggers[location_type]:
-                enemy_stats = {
-                    'enemy': {'name': 'Goblin', 'health': 3},
-                    'dragon': {'name': 'Ancient Dragon', 'health': 15},
-                    'boss_enemy': {'name': 'Boss Monster', 'health': 10}
-                }
-                
+            if result.battle:
+                battle = game.start_battle(result.battle)
                 response = {
-                    'message': interaction_result,
+                    'message': result.message,
                     'event': 'battle',
-                    'enemy': enemy_stats.get(location_type, {'name': 'Enemy', 'health': 5}),
-                    'options': ['Attack', 'Defend', 'Flee']
+                    'enemy': battle.get_enemy_status(),
+                    'options': BATTLE_OPTIONS
                 }
             else:
                 # Get available directions with hints for next move
                 movement_options = game.world.get_directional_options_with_hints()
                 
                 response = {
-                    'message': interaction_result,
+                    'message': result.message,
                     'event': 'map',
                     'options': movement_options
                 }
@@ -326,30 +399,159 @@ def take_action():
     # Handle death
     elif event == 'death':
         if choice == 1:  # Lose everything
-            game.player = GameManager().player
+            game.resolve_death(choice)
             response = {
                 'message': "You've been reborn. All progress lost.",
                 'event': 'map',
                 'options': ['Move North', 'Move East', 'Move South', 'Move West']
             }
         elif choice == 2:  # Vampire
-            game.player.resurrect_as_vampire()
+            game.resolve_death(choice)
             response = {
                 'message': "You've been resurrected as a vampire! You'll take damage during daytime.",
                 'event': 'map',
                 'options': ['Move North', 'Move East', 'Move South', 'Move West']
             }
     
+    # Vampires can die from sun damage after any action
+    if game.player.health <= 0 and response.get('event') != 'death':
+        response = {
+            'message': f"{response.get('message', '')}\nYou have been defeated!".strip(),
+            'event': 'death',
+            'options': DEATH_OPTIONS
+        }
+    
     # Add player status to all responses
-    response['player'] = {
-        'health': game.player.health,
-        'max_health': game.player.max_health,
-        'gold': game.player.gold,
-        'is_vampire': game.player.is_vampire
-    }
+    response['player'] = get_player_status(game)
     response['time'] = game.time_system.get_time_of_day()
     
-    return jsonify(response)
+    return response
+
+@socketio.on('connect')
+def socket_connect():
+    """Accept socket connections from sessions that loaded the game page"""
+    # Socket handlers can't set cookies, so the session must already exist
+    if 'session_id' not in session:
+        return False
+
+@socketio.on('action')
+def socket_action(data):
+    """Process a player action sent over the socket
+
+    Mirrors /api/action; the response is returned as the event's
+    acknowledgement, so clients can pipeline actions over one connection.
+    Time-of-day changes and vampire sun damage are pushed as 'update' events.
+    """
+    game = get_game()
+    updates = []
+    
+    def listener(name, payload):
+        updates.append({'type': name, **payload})
+    
+    game.add_listener(listener)
+    try:
+        response = apply_action(game, data)
+    finally:
+        game.remove_listener(listener)
+    
+    for update in updates:
+        update['player'] = response['player']
+        emit('update', update)
+    
+    response = encode_response(game, data, response)
+    if 'seq' in data:
+        response['seq'] = data['seq']
+    return response
+
+@app.route('/metrics')
+def get_metrics():
+    """Serve metrics in the Prometheus text format to local scrapers"""
+    if not is_local_request():
+        abort(404)
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+@app.route('/internal/profiles')
+def list_profiles():
+    """List stored request profiles, newest first"""
+    if not is_local_request():
+        abort(404)
+    return jsonify({'profiles': profiles.list_profiles(), 'sessions': sorted(profiles.sessions)})
+
+@app.route('/internal/profiles/<profile_id>')
+def get_profile(profile_id):
+    """Download a stored profile, or view its top functions with ?format=text"""
+    if not is_local_request() or not profiles.has_profile(profile_id):
+        abort(404)
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in PROFILE_SORTS:
+            abort(400)
+        return Response(profiles.format_profile(profile_id, sort=sort), content_type='text/plain; charset=utf-8')
+    return send_file(profiles.get_path(profile_id), as_attachment=True, download_name=f"{profile_id}.prof")
+
+@app.route('/internal/profiles/sessions/<session_id>', methods=['POST', 'DELETE'])
+def toggle_session_profiling(session_id):
+    """Start or stop profiling every request from a session"""
+    if not is_local_request():
+        abort(404)
+    if request.method == 'POST':
+        profiles.enable_session(session_id)
+    else:
+        profiles.disable_session(session_id)
+    return jsonify({'session': session_id, 'profiling': request.method == 'POST'})
+
+@app.route('/internal/memory')
+def get_memory():
+    """Report the memory held by resident games, by part and by type
+
+    Up to ?limit= games (default MEMORY_SAMPLE) are measured; totals for
+    all resident games are estimated from their mean.
+    """
+    if not is_local_request():
+        abort(404)
+    resident = games.resident_games()
+    limit = request.args.get('limit', MEMORY_SAMPLE, type=int)
+    if limit < 1:
+        abort(400)
+    measured = resident if len(resident) <= limit else random.sample(resident, limit)
+    summary = summarize_games(measured)
+    summary['resident'] = len(resident)
+    summary['estimated_total'] = summary['mean'] * len(resident)
+    if allocation_tracer.is_tracing():
+        summary['allocations_by_module'] = allocation_tracer.get_allocations()
+    return jsonify(summary)
+
+@app.route('/internal/memory/trace', methods=['POST', 'DELETE'])
+def toggle_memory_trace():
+    """Start or stop attributing new allocations to modules with tracemalloc"""
+    if not is_local_request():
+        abort(404)
+    if request.method == 'POST':
+        allocation_tracer.start()
+    else:
+        allocation_tracer.stop()
+    return jsonify({'tracing': allocation_tracer.is_tracing()})
+
+@app.route('/internal/shard/ring', methods=['POST'])
+def update_shard_ring():
+    """Release games this worker no longer owns after the shard ring changes"""
+    # Only the local router may rebalance workers
+    if WORKER_ID is None or not is_local_request():
+        abort(404)
+    
+    ring = HashRing(request.json['workers'])
+    released = 0
+    for session_id in games.session_ids():
+        if ring.get_node(session_id) != WORKER_ID:
+            game = games.get(session_id)
+            if game is not None:
+                snapshots.save(session_id, game)
+            games.discard(session_id)
+            released += 1
+    
+    # The new owner restores released games from their snapshots
+    snapshots.flush()
+    return jsonify({'worker': WORKER_ID, 'released': released, 'resident': len(games)})
 
 if __name__ == '__main__':
     socketio.run(app, debug=True)
\ No newline at end of file
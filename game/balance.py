@@ -0,0 +1,180 @@
+"""
+Balance module - Monte Carlo battle simulation for tuning enemy stats
+
+Fights follow the web battle rules of BattleEvent.take_turn: attacking hits the enemy for the
+player's weapon damage, defending blocks the enemy's attack and fleeing
+succeeds half of the time. After an attack or a failed escape a surviving
+enemy strikes back. A defeated enemy drops 1-5 gold.
+
+Each turn is applied to every unfinished fight at once as NumPy arrays,
+so millions of fights take seconds. NumPy is only needed here; install it
+with `pip install numpy` to use the simulator.
+"""
+import argparse
+from game.enemies import GOBLIN, OLD_MAN, ANCIENT_DRAGON, BOSS_MONSTER
+from game.events import FLEE_CHANCE, GOLD_REWARD
+from game.items import Weapon
+from game.player import Player
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Player actions, numbered like the battle options
+ATTACK = 1
+DEFEND = 2
+FLEE = 3
+
+# Fight outcomes
+ONGOING = 0
+WON = 1
+LOST = 2
+FLED = 3
+
+# Fights still going after this many turns are counted as unfinished
+MAX_TURNS = 1000
+
+# Enemies that can be simulated from the command line
+ENEMIES = {
+    'goblin': GOBLIN,
+    'old_man': OLD_MAN,
+    'dragon': ANCIENT_DRAGON,
+    'boss': BOSS_MONSTER
+}
+
+class AlwaysAttack:
+    """Policy that attacks every turn"""
+
+    def choose(self, player_health, enemy_health):
+        """Choose an action for each fight"""
+        return np.full(len(player_health), ATTACK)
+
+
+class FleeThreshold:
+    """Policy that attacks until the player's health drops to a threshold, then flees"""
+
+    def __init__(self, health):
+        self.health = health
+
+    def choose(self, player_health, enemy_health):
+        """Choose an action for each fight"""
+        return np.where(player_health <= self.health, FLEE, ATTACK)
+
+
+class BattleStats:
+    """Results of a batch of simulated fights"""
+
+    def __init__(self, enemy, outcomes, turns, gold):
+        self.enemy = enemy
+        self.outcomes = outcomes
+        self.turns = turns
+        self.gold = gold  # Gold dropped by each won fight
+
+    @property
+    def fights(self):
+        return len(self.outcomes)
+
+    def rate(self, outcome):
+        """Get the fraction of fights that ended with an outcome"""
+        return float(np.count_nonzero(self.outcomes == outcome)) / self.fights
+
+    def summary(self):
+        """Summarize the fights as a dictionary"""
+        return {
+            'enemy': self.enemy.name,
+            'fights': self.fights,
+            'win_rate': self.rate(WON),
+            'loss_rate': self.rate(LOST),
+            'flee_rate': self.rate(FLED),
+            'unfinished_rate': self.rate(ONGOING),
+            'mean_turns': float(self.turns.mean()),
+            'turn_percentiles': {p: float(np.percentile(self.turns, p)) for p in (50, 90, 99)},
+            'mean_gold': float(self.gold.sum()) / self.fights,
+            'gold_distribution': {int(amount): int(count)
+                                  for amount, count in enumerate(np.bincount(self.gold))
+                                  if count}
+        }
+
+    def report(self):
+        """Format the summary as readable text"""
+        summary = self.summary()
+        percentiles = summary['turn_percentiles']
+        gold = ', '.join(f"{amount}: {count}" for amount, count in summary['gold_distribution'].items())
+        return "\n".join([
+            f"{summary['enemy']} ({summary['fights']} fights)",
+            f"  Won: {summary['win_rate']:.1%}  Lost: {summary['loss_rate']:.1%}  "
+            f"Fled: {summary['flee_rate']:.1%}  Unfinished: {summary['unfinished_rate']:.1%}",
+            f"  Turns: mean {summary['mean_turns']:.2f}, p50 {percentiles[50]:g}, "
+            f"p90 {percentiles[90]:g}, p99 {percentiles[99]:g}",
+            f"  Gold per fight: {summary['mean_gold']:.2f} (drops {gold or 'none'})"
+        ])
+
+
+def simulate_battles(enemy, fights=100000, player=None, policy=None, seed=None, max_turns=MAX_TURNS):
+    """Simulate many independent fights against an enemy and return their BattleStats"""
+    if np is None:
+        raise ImportError("The battle simulator requires NumPy (pip install numpy)")
+
+    player = player or Player()
+    policy = policy or AlwaysAttack()
+    rng = np.random.default_rng(seed)
+    player_damage = player.get_attack_damage()
+
+    player_health = np.full(fights, player.health)
+    enemy_health = np.full(fights, enemy.health)
+    outcomes = np.full(fights, ONGOING)
+    turns = np.zeros(fights, dtype=np.int64)
+
+    active = np.arange(fights)
+    for _ in range(max_turns):
+        if not len(active):
+            break
+        turns[active] += 1
+        actions = policy.choose(player_health[active], enemy_health[active])
+
+        attacking = active[actions == ATTACK]
+        enemy_health[attacking] -= player_damage
+        killed = enemy_health[attacking] <= 0
+        outcomes[attacking[killed]] = WON
+
+        fleeing = active[actions == FLEE]
+        escaped = rng.random(len(fleeing)) < FLEE_CHANCE
+        outcomes[fleeing[escaped]] = FLED
+
+        # Surviving enemies strike back unless the player defended
+        struck = np.concatenate([attacking[~killed], fleeing[~escaped]])
+        player_health[struck] -= enemy.attack
+        outcomes[struck[player_health[struck] <= 0]] = LOST
+
+        active = active[outcomes[active] == ONGOING]
+
+    low, high = GOLD_REWARD
+    gold = rng.integers(low, high + 1, np.count_nonzero(outcomes == WON))
+    return BattleStats(enemy, outcomes, turns, gold)
+
+
+def main():
+    """Print simulated battle statistics for the chosen enemies"""
+    parser = argparse.ArgumentParser(description="Simulate Text RPG battles to tune balance")
+    parser.add_argument('enemies', nargs='*', help=f"enemies to fight: {', '.join(ENEMIES)} (default: all)")
+    parser.add_argument('--fights', type=int, default=100000, help="fights per enemy")
+    parser.add_argument('--health', type=int, default=10, help="player health")
+    parser.add_argument('--damage', type=int, default=1, help="player attack damage")
+    parser.add_argument('--flee-at', type=int, help="flee once player health drops to this value")
+    parser.add_argument('--seed', type=int, help="random seed")
+    args = parser.parse_args()
+    for name in args.enemies:
+        if name not in ENEMIES:
+            parser.error(f"unknown enemy: {name}")
+
+    player = Player()
+    player.health = player.max_health = args.health
+    player.equip_weapon(Weapon("Test Weapon", "Weapon used for balance runs", args.damage))
+    policy = FleeThreshold(args.flee_at) if args.flee_at is not None else AlwaysAttack()
+    for name in args.enemies or ENEMIES:
+        stats = simulate_battles(ENEMIES[name], args.fights, player, policy, args.seed)
+        print(stats.report())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmarks module - Timed benchmarks of the game engine and web API
+
+Each benchmark is timed over several repetitions of enough iterations to
+last a minimum time, and reported as seconds per operation. Results can
+be saved as a JSON baseline and later compared against it; a benchmark
+whose fastest repetition is slower than the baseline's by more than the
+tolerance is a regression. The fastest repetition is the least affected
+by other load on the machine. Run it with `python -m game.benchmarks`.
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import timeit
+from game.enemies import GOBLIN
+from game.game_manager import GameManager
+from game.world import World
+
+# Timed repetitions per benchmark
+DEFAULT_REPEAT = 7
+
+# Each repetition runs enough iterations to take at least this long, in seconds
+DEFAULT_MIN_TIME = 0.05
+
+# Allowed slowdown of a benchmark before it counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Benchmark setups keyed by name; each returns the function to time
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a benchmark setup"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark('game_manager_init')
+def bench_game_manager_init():
+    seeds = itertools.count()
+    def run():
+        GameManager(seed=next(seeds))
+    return run
+
+@benchmark('world_generation')
+def bench_world_generation():
+    seeds = itertools.count()
+    def run():
+        World(seed=next(seeds)).get_current_map()
+    return run
+
+@benchmark('move_and_hints')
+def bench_move_and_hints():
+    world = World(seed=1)
+    directions = itertools.cycle(['north', 'east', 'south', 'west'])
+    def run():
+        world.move_player(next(directions))
+        world.get_directional_options_with_hints()
+    return run
+
+@benchmark('interaction_dispatch')
+def bench_interaction_dispatch():
+    game = GameManager(seed=1)
+    choices = itertools.cycle([1, 2, 3])
+    def run():
+        game.run_interaction(next(choices))
+        game.player.health = game.player.max_health
+    return run
+
+@benchmark('battle_resolution')
+def bench_battle_resolution():
+    game = GameManager(seed=1)
+    def run():
+        game.player.health = game.player.max_health
+        game.start_battle(GOBLIN)
+        while game.battle is not None:
+            game.battle_turn(1)
+    return run
+
+@benchmark('http_action_round_trip')
+def bench_http_action_round_trip():
+    from app import app
+    client = app.test_client()
+    client.post('/api/start_game')
+    client.post('/api/action', json={'event': 'first_encounter', 'choice': 1})
+    choices = itertools.cycle([1, 3])
+    def run():
+        client.post('/api/action', json={'event': 'map', 'choice': next(choices)})
+    return run
+
+
+def time_function(function, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """Time a function, returning seconds per call for each repetition and the calls per repetition"""
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return [total / number for total in timer.repeat(repeat, number)], number
+
+def run_benchmark(name, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """Run one benchmark and summarize its timings"""
+    times, number = time_function(BENCHMARKS[name](), repeat, min_time)
+    return {
+        'median': statistics.median(times),
+        'min': min(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'repeat': repeat,
+        'number': number
+    }
+
+def run_benchmarks(names=None, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """Run benchmarks and return the results with details of the environment"""
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': {name: run_benchmark(name, repeat, min_time) for name in names or BENCHMARKS}
+    }
+
+def save_results(results, path):
+    """Save benchmark results as a JSON baseline"""
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+def load_results(path):
+    """Load benchmark results saved with save_results"""
+    with open(path) as file:
+        return json.load(file)
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results with a baseline by fastest repetition
+
+    Returns {name: (baseline time, time, status)}, where status is
+    'regressed', 'improved', 'unchanged' or 'new'.
+    """
+    comparison = {}
+    for name, result in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if old is None:
+            comparison[name] = (None, result['min'], 'new')
+            continue
+        ratio = result['min'] / old['min']
+        if ratio > 1 + tolerance:
+            status = 'regressed'
+        elif ratio < 1 / (1 + tolerance):
+            status = 'improved'
+        else:
+            status = 'unchanged'
+        comparison[name] = (old['min'], result['min'], status)
+    return comparison
+
+def get_regressions(comparison):
+    """Get the names of regressed benchmarks"""
+    return [name for name, (_, _, status) in comparison.items() if status == 'regressed']
+
+def format_time(seconds):
+    """Format a duration with a readable unit"""
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def format_results(results, comparison=None):
+    """Format benchmark results, and their comparison with a baseline, as text"""
+    lines = [f"Python {results['python']} on {results['machine']}"]
+    for name, result in results['benchmarks'].items():
+        line = (f"{name:<24} {format_time(result['median']):>10} per op  "
+                f"(min {format_time(result['min'])}, stdev {format_time(result['stdev'])}, "
+                f"{result['repeat']} x {result['number']})")
+        if comparison is not None:
+            old, new, status = comparison[name]
+            if old is not None:
+                line += f"  {new / old - 1:+.1%} vs baseline, {status}"
+            else:
+                line += "  new"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main():
+    """Run benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark Text RPG")
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed repetitions per benchmark")
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, help="minimum seconds per repetition")
+    parser.add_argument('--save', metavar='PATH', help="save the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare with a JSON baseline and fail on regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a benchmark counts as regressed (default 0.25)")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    results = run_benchmarks(args.benchmarks, args.repeat, args.min_time)
+    comparison = None
+    if args.compare:
+        comparison = compare_results(results, load_results(args.compare), args.tolerance)
+    print(format_results(results, comparison))
+    if args.save:
+        save_results(results, args.save)
+    if comparison is not None:
+        regressions = get_regressions(comparison)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Bots module - Parallel bot playthroughs over headless games
+
+Runs thousands of scripted or random agents through full sessions of
+moves, location interactions, battles and deaths. Sessions are spread
+across a process pool and their statistics aggregated into throughput,
+death rates, gold curves and realm coverage. Battles are played through
+the same server-side battles as the web game. Run it with
+`python -m game.bots`.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from functools import partial
+from game.enemies import GOBLIN, OLD_MAN
+from game.game_manager import GameManager
+from game.items import STICK
+from game.world import CellType, MajorEventType, WorldType, MAP_SIZE
+
+# Battle choices for the actions policies pick
+BATTLE_CHOICES = {'attack': 1, 'defend': 2, 'flee': 3}
+
+# Gold is sampled every this many actions to build gold curves
+GOLD_SAMPLE_INTERVAL = 10
+
+class RandomPolicy:
+    """Agent that makes every choice at random"""
+
+    # Chance of interacting with the location instead of moving
+    interact_chance = 0.3
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def first_encounter(self, game):
+        """Choose how to answer the old man"""
+        return self.rng.randint(1, 3)
+
+    def next_action(self, game):
+        """Choose ('move', direction) or ('interact', choice)"""
+        if self.rng.random() < self.interact_chance:
+            return 'interact', self.rng.randint(1, 3)
+        return 'move', self.rng.choice(game.world.get_available_directions())
+
+    def battle_action(self, game, enemy_health):
+        """Choose 'attack' or 'flee'"""
+        return self.rng.choice(['attack', 'flee'])
+
+    def death_choice(self, game):
+        """Choose 1 to start over or 2 to become a vampire"""
+        return self.rng.randint(1, 2)
+
+
+class CautiousPolicy(RandomPolicy):
+    """Scripted agent that takes safe rewards, rests when hurt and flees when low"""
+
+    # Interaction choice to take at each major event that can't start a battle
+    safe_choices = {
+        MajorEventType.TREASURE_VAULT: 1,
+        MajorEventType.MASTER_MERCHANT: 3,
+        MajorEventType.ANCIENT_PORTAL: 3
+    }
+
+    # Flee once health drops to this value
+    flee_health = 3
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.collected_at = None  # Where the last reward was taken, so each visit takes one
+
+    def first_encounter(self, game):
+        return 2
+
+    def next_action(self, game):
+        world = game.world
+        cell = world.get_current_cell()
+        position = (world.current_world, world.player_x, world.player_y)
+        if cell in self.safe_choices and position != self.collected_at:
+            self.collected_at = position
+            return 'interact', self.safe_choices[cell]
+        if cell == CellType.EMPTY and game.player.health < game.player.max_health:
+            return 'interact', 1
+        return 'move', self.rng.choice(game.world.get_available_directions())
+
+    def battle_action(self, game, enemy_health):
+        if game.player.health <= self.flee_health:
+            return 'flee'
+        return 'attack'
+
+    def death_choice(self, game):
+        return 2
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'cautious': CautiousPolicy
+}
+
+class BotSession:
+    """One agent playing one headless game"""
+
+    def __init__(self, policy, rng, map_size=MAP_SIZE):
+        self.rng = rng
+        self.policy = policy
+        self.game = GameManager(map_size=map_size, seed=rng.getrandbits(64))
+        self.game.add_listener(self.on_event)
+        self.actions = 0
+        self.deaths = 0
+        self.battles = 0
+        self.battles_won = 0
+        self.battles_fled = 0
+        self.gold_curve = []
+        self.visited = {(self.game.world.current_world, self.game.world.player_x, self.game.world.player_y)}
+
+    def on_event(self, name, data):
+        """Count deaths reported by the game"""
+        if name == 'player_died':
+            self.deaths += 1
+
+    def act(self):
+        """Count one action and sample the gold curve"""
+        self.actions += 1
+        if self.actions % GOLD_SAMPLE_INTERVAL == 0:
+            self.gold_curve.append(self.game.player.gold)
+
+    def play(self, actions):
+        """Play the first encounter and then the given number of actions"""
+        choice = self.policy.first_encounter(self.game)
+        self.act()
+        if choice in (2, 3):
+            self.game.reward_gold(10)
+            self.game.reward_item(STICK, equip=True)
+        if choice == 3:
+            self.fight(OLD_MAN)
+        while self.actions < actions:
+            self.step()
+        return self.summary()
+
+    def step(self):
+        """Take one map action"""
+        game = self.game
+        kind, value = self.policy.next_action(game)
+        self.act()
+        if kind == 'move':
+            success, _ = game.world.move_player(value)
+            if success:
+                game.action_taken()
+                world = game.world
+                self.visited.add((world.current_world, world.player_x, world.player_y))
+                if world.get_current_cell() == CellType.ENEMY:
+                    self.fight(GOBLIN)
+        else:
+            result = game.run_interaction(value)
+            if result.battle:
+                self.fight(result.battle)
+        # Vampires can die from sun damage after any action
+        if game.player.health <= 0:
+            game.resolve_death(self.policy.death_choice(game))
+
+    def fight(self, enemy):
+        """Fight an enemy until someone wins or the player escapes"""
+        game = self.game
+        battle = game.start_battle(enemy)
+        self.battles += 1
+        while game.battle is not None:
+            action = self.policy.battle_action(game, battle.enemy_health)
+            self.act()
+            outcome, _ = game.battle_turn(BATTLE_CHOICES[action])
+        if outcome == 'won':
+            self.battles_won += 1
+        elif outcome == 'fled':
+            self.battles_fled += 1
+        elif outcome == 'lost':
+            game.resolve_death(self.policy.death_choice(game))
+
+    def summary(self):
+        """Summarize the session as a dictionary"""
+        coverage = {}
+        for world_type, _, _ in self.visited:
+            coverage[world_type.value] = coverage.get(world_type.value, 0) + 1
+        cells = self.game.world.map_size ** 2
+        return {
+            'actions': self.actions,
+            'deaths': self.deaths,
+            'battles': self.battles,
+            'battles_won': self.battles_won,
+            'battles_fled': self.battles_fled,
+            'gold': self.game.player.gold,
+            'gold_curve': self.gold_curve,
+            'coverage': {realm: count / cells for realm, count in coverage.items()}
+        }
+
+
+def run_agent(agent_id, actions, policy, seed, map_size):
+    """Play one agent's session; runs in a pool worker"""
+    rng = random.Random(f"{seed}:{agent_id}")
+    session = BotSession(POLICIES[policy](rng), rng, map_size)
+    return session.play(actions)
+
+def aggregate(results, elapsed):
+    """Combine session summaries into harness statistics"""
+    agents = len(results)
+    actions = sum(result['actions'] for result in results)
+    deaths = sum(result['deaths'] for result in results)
+    battles = sum(result['battles'] for result in results)
+    curve_length = min((len(result['gold_curve']) for result in results), default=0)
+    per_agent = 1 / agents if agents else 0.0
+    return {
+        'agents': agents,
+        'actions': actions,
+        'elapsed': elapsed,
+        'actions_per_second': actions / elapsed if elapsed else 0.0,
+        'deaths': deaths,
+        'deaths_per_1000_actions': 1000 * deaths / actions if actions else 0.0,
+        'agents_died': sum(1 for result in results if result['deaths']) * per_agent,
+        'battles': battles,
+        'battle_win_rate': sum(result['battles_won'] for result in results) / battles if battles else 0.0,
+        'battle_flee_rate': sum(result['battles_fled'] for result in results) / battles if battles else 0.0,
+        'mean_gold': sum(result['gold'] for result in results) * per_agent,
+        'gold_curve': [sum(result['gold_curve'][i] for result in results) * per_agent
+                       for i in range(curve_length)],
+        'realm_coverage': {realm.value: sum(result['coverage'].get(realm.value, 0) for result in results) * per_agent
+                           for realm in WorldType}
+    }
+
+def run_bots(agents, actions=500, policy='random', processes=None, seed=0, map_size=MAP_SIZE):
+    """Play every agent's session across a process pool and aggregate the results"""
+    play = partial(run_agent, actions=actions, policy=policy, seed=seed, map_size=map_size)
+    processes = processes or os.cpu_count() or 1
+    start = time.perf_counter()
+    if processes == 1:
+        results = [play(agent_id) for agent_id in range(agents)]
+    else:
+        # Large chunks keep the pool's messaging off the hot path
+        chunksize = max(1, agents // (processes * 8))
+        with multiprocessing.Pool(processes) as pool:
+            results = list(pool.imap_unordered(play, range(agents), chunksize))
+    return aggregate(results, time.perf_counter() - start)
+
+def format_report(stats):
+    """Format harness statistics as readable text"""
+    curve = stats['gold_curve']
+    step = max(1, len(curve) // 10)
+    gold_points = ', '.join(f"{(i + 1) * GOLD_SAMPLE_INTERVAL}: {curve[i]:.1f}" for i in range(0, len(curve), step))
+    coverage = ', '.join(f"{realm} {share:.1%}" for realm, share in stats['realm_coverage'].items() if share)
+    return "\n".join([
+        f"Agents: {stats['agents']}  Actions: {stats['actions']}  Time: {stats['elapsed']:.2f}s",
+        f"Actions per second: {stats['actions_per_second']:.0f}",
+        f"Deaths: {stats['deaths']} ({stats['deaths_per_1000_actions']:.2f} per 1000 actions, "
+        f"{stats['agents_died']:.1%} of agents died)",
+        f"Battles: {stats['battles']} (won {stats['battle_win_rate']:.1%}, fled {stats['battle_flee_rate']:.1%})",
+        f"Mean gold: {stats['mean_gold']:.1f}",
+        f"Gold curve by action: {gold_points or 'none'}",
+        f"Realm coverage: {coverage or 'none'}"
+    ])
+
+def main():
+    """Run the bot harness from the command line"""
+    parser = argparse.ArgumentParser(description="Play Text RPG with many bots in parallel")
+    parser.add_argument('--agents', type=int, default=1000, help="number of bot sessions")
+    parser.add_argument('--actions', type=int, default=500, help="actions per session")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random', help="how bots choose actions")
+    parser.add_argument('--processes', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=0, help="base random seed")
+    parser.add_argument('--map-size', type=int, default=MAP_SIZE, help="world map size")
+    parser.add_argument('--json', action='store_true', help="print statistics as JSON")
+    args = parser.parse_args()
+
+    stats = run_bots(args.agents, args.actions, args.policy, args.processes, args.seed, args.map_size)
+    print(json.dumps(stats, indent=2) if args.json else format_report(stats))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Catalog module - Interned, immutable definitions of items and enemies
+"""
+import threading
+
+class Catalog:
+    """Definitions of one kind, numbered by small integer IDs
+
+    IDs are handed out in creation order. The definitions built into the
+    game are created when their module is imported, before anything else
+    can create definitions, so their IDs are the same in every process.
+    mark_stable() records where the built-in definitions end; only those
+    IDs may be stored in snapshots.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.definitions = []
+        self.interned = {}  # {(class, *fields): definition}
+        self.stable_count = 0
+        self.lock = threading.Lock()
+
+    def intern(self, cls, values):
+        """Get the definition with these fields, creating it if needed"""
+        key = (cls, *values)
+        definition = self.interned.get(key)
+        if definition is not None:
+            return definition
+        with self.lock:
+            definition = self.interned.get(key)
+            if definition is None:
+                definition = object.__new__(cls)
+                for field, value in zip(cls.fields, values):
+                    object.__setattr__(definition, field, value)
+                object.__setattr__(definition, 'id', len(self.definitions))
+                self.definitions.append(definition)
+                self.interned[key] = definition
+        return definition
+
+    def mark_stable(self):
+        """Mark every definition created so far as built in"""
+        self.stable_count = len(self.definitions)
+
+    def has_stable_id(self, definition):
+        """Check if a definition's ID is the same in every process"""
+        return definition.id < self.stable_count and self.definitions[definition.id] is definition
+
+    def find(self, name):
+        """Get the built-in definition with a name, or None"""
+        for definition in self.definitions[:self.stable_count]:
+            if definition.name == name:
+                return definition
+        return None
+
+    def __getitem__(self, definition_id):
+        return self.definitions[definition_id]
+
+    def __len__(self):
+        return len(self.definitions)
+
+
+class Definition:
+    """Immutable definition shared by every game that uses it
+
+    Definitions are flyweights: creating one with the same fields as an
+    existing definition returns the existing object, so each distinct
+    item or enemy exists once per process no matter how many players
+    hold or fight it. Per-instance state, such as an enemy's current
+    health in a battle, is kept by the user of the definition.
+
+    Subclasses set 'catalog' and list their fields in __slots__; the
+    constructor takes the fields in order.
+    """
+
+    __slots__ = ('id',)
+    catalog = None
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(slot for slot in klass.__dict__.get('__slots__', ()) if slot != 'id')
+        cls.fields = tuple(fields)
+
+    def __new__(cls, *values):
+        if len(values) != len(cls.fields):
+            raise TypeError(f"{cls.__name__}() takes {len(cls.fields)} arguments ({', '.join(cls.fields)})")
+        return cls.catalog.intern(cls, values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} definitions are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} definitions are immutable")
+
+    def __reduce__(self):
+        # Unpickling interns the definition again, in whatever process
+        return (type(self), tuple(getattr(self, field) for field in self.fields))
+
+    def __repr__(self):
+        values = ', '.join(repr(getattr(self, field)) for field in self.fields)
+        return f"{type(self).__name__}({values})"
@@ -0,0 +1,40 @@
+"""
+Effects module - Timed effects fired by the time system
+"""
+
+# Fraction of max health a vampire loses when day begins
+SUN_DAMAGE = 0.05
+
+# Effect handlers keyed by name
+EFFECTS = {}
+
+def effect(name):
+    """Register a handler for a timed effect"""
+    def register(handler):
+        EFFECTS[name] = handler
+        return handler
+    return register
+
+def run_effect(game, name):
+    """Run the handler for an effect"""
+    EFFECTS[name](game)
+
+
+@effect('advance_time')
+def advance_time(game):
+    time_system = game.time_system
+    time_system.advance_time()
+    game.notify('time_changed', time=time_system.get_time_of_day())
+    for name in time_system.get_phase_effects():
+        run_effect(game, name)
+
+@effect('sun_damage')
+def sun_damage(game):
+    player = game.player
+    if not player.is_vampire:
+        return
+    damage = int(player.max_health * SUN_DAMAGE)
+    player.take_damage(damage)
+    game.notify('sun_damage', damage=damage)
+    if player.health <= 0:
+        game.handle_player_death()
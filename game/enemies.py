@@ -1,16 +1,39 @@
 """
 Enemies module - Defines all enemies in the game
 """
+from game.catalog import Catalog, Definition
 
-class Enemy:
+# Every enemy definition, by ID
+ENEMY_CATALOG = Catalog("enemies")
+
+class Enemy(Definition):
     """Base class for all enemies"""
     
-    def __init__(self, name, health, attack):
-        self.name = name
-        self.health = health
-        self.attack = attack
+    __slots__ = ('name', 'health', 'attack')
+    catalog = ENEMY_CATALOG
+    
+    def to_dict(self):
+        """Serialize the enemy to a snapshot dictionary"""
+        return {'name': self.name, 'health': self.health, 'attack': self.attack}
+
+
+def enemy_to_snapshot(enemy):
+    """Serialize an enemy as its catalog ID, or in full if it isn't built in"""
+    if ENEMY_CATALOG.has_stable_id(enemy):
+        return enemy.id
+    return enemy.to_dict()
+
+def enemy_from_snapshot(data):
+    """Recreate an enemy saved by enemy_to_snapshot"""
+    if isinstance(data, int):
+        return ENEMY_CATALOG[data]
+    return Enemy(data['name'], data['health'], data['attack'])
 
 
 # Define basic enemies
 GOBLIN = Enemy("Goblin", 3, 1)
-OLD_MAN = Enemy("Old Man", 5, 1)
\ No newline at end of file
+OLD_MAN = Enemy("Old Man", 5, 1)
+ANCIENT_DRAGON = Enemy("Ancient Dragon", 15, 1)
+BOSS_MONSTER = Enemy("Boss Monster", 10, 1)
+
+ENEMY_CATALOG.mark_stable()
\ No newline at end of file
@@ -1,9 +1,15 @@
 """
 Events module - Defines game events and encounters
 """
-import random
+from game.enemies import Enemy, ENEMY_CATALOG, enemy_from_snapshot, enemy_to_snapshot
 from game.items import STICK
 
+# Chance that fleeing a battle succeeds
+FLEE_CHANCE = 0.5
+
+# Gold dropped by a defeated enemy, inclusive
+GOLD_REWARD = (1, 5)
+
 class Event:
     """Base class for all game events"""
     
@@ -36,15 +42,13 @@ class FirstEncounter(Event):
             print("The old man looks disappointed as you walk away.")
         elif choice == "2":
             print("\nYou accept the offering and thank the old man.")
-            self.game_manager.player.add_gold(10)
-            self.game_manager.player.add_item(STICK)
-            self.game_manager.player.equip_weapon(STICK)
+            self.game_manager.reward_gold(10)
+            self.game_manager.reward_item(STICK, equip=True)
             print("The old man smiles and wishes you good luck on your journey.")
         elif choice == "3":
             print("\nYou take the offering and then attack the old man!")
-            self.game_manager.player.add_gold(10)
-            self.game_manager.player.add_item(STICK)
-            self.game_manager.player.equip_weapon(STICK)
+            self.game_manager.reward_gold(10)
+            self.game_manager.reward_item(STICK, equip=True)
             
             # Start battle with NPC
             battle = BattleEvent("Old Man")
@@ -56,24 +60,84 @@ class FirstEncounter(Event):
 class BattleEvent(Event):
     """Battle encounter with an enemy"""
     
-    def __init__(self, enemy_type):
-        super().__init__()
-        self.enemy_type = enemy_type
+    def __init__(self, enemy_type, game_manager=None):
+        super().__init__(game_manager)
         
-        # Set enemy stats based on type
-        if enemy_type == "Goblin":
-            self.enemy_health = 3
-            self.enemy_attack = 1
-            self.enemy_name = "Goblin"
-        elif enemy_type == "Old Man":
-            self.enemy_health = 5
-            self.enemy_attack = 1
-            self.enemy_name = "Old Man"
+        # Enemies can be given by definition or by name
+        if isinstance(enemy_type, Enemy):
+            enemy = enemy_type
+        else:
+            # Unknown enemies get default stats
+            enemy = ENEMY_CATALOG.find(enemy_type) or Enemy(enemy_type, 2, 1)
+        self.enemy = enemy
+        self.enemy_type = enemy.name
+        # The definition is shared, so this battle tracks the enemy's current health
+        self.enemy_health = enemy.health
+    
+    @property
+    def enemy_name(self):
+        return self.enemy.name
+    
+    @property
+    def enemy_attack(self):
+        return self.enemy.attack
+    
+    @property
+    def enemy_max_health(self):
+        return self.enemy.health
+    
+    def to_dict(self):
+        """Serialize the battle to a snapshot dictionary"""
+        return {
+            'enemy': enemy_to_snapshot(self.enemy),
+            'health': self.enemy_health
+        }
+    
+    @classmethod
+    def from_dict(cls, data, game_manager=None):
+        """Recreate a battle from a snapshot dictionary"""
+        battle = cls(enemy_from_snapshot(data['enemy']), game_manager)
+        battle.enemy_health = data['health']
+        return battle
+    
+    def get_enemy_status(self):
+        """Get the enemy status shown to web clients"""
+        return {
+            'name': self.enemy_name,
+            'health': self.enemy_health,
+            'max_health': self.enemy_max_health
+        }
+    
+    def take_turn(self, choice):
+        """Play one turn of a web battle and return (outcome, message)
+
+        The outcome is 'won', 'lost', 'fled' or 'ongoing'. Returns None for
+        an unknown choice.
+        """
+        player = self.game_manager.player
+        if choice == 1:  # Attack
+            damage = player.get_attack_damage()
+            self.enemy_health -= damage
+            message = f"You attack the {self.enemy_name} for {damage} damage!"
+            if self.enemy_health <= 0:
+                gold_reward = self.game_manager.rng.randint(*GOLD_REWARD)
+                self.game_manager.reward_gold(gold_reward)
+                return 'won', f"{message}\nYou defeated the {self.enemy_name}!\nYou found {gold_reward} gold!"
+        elif choice == 2:  # Defend
+            return 'ongoing', "You take a defensive stance.\nThe enemy's attack does no damage!"
+        elif choice == 3:  # Flee
+            if self.game_manager.rng.random() < FLEE_CHANCE:
+                return 'fled', f"You successfully flee from the {self.enemy_name}!"
+            message = "You failed to flee!"
         else:
-            # Default enemy
-            self.enemy_health = 2
-            self.enemy_attack = 1
-            self.enemy_name = enemy_type
+            return None
+        
+        # The enemy strikes back
+        player.take_damage(self.enemy_attack)
+        message = f"{message}\nThe {self.enemy_name} attacks you for {self.enemy_attack} damage!"
+        if player.health <= 0:
+            return 'lost', f"{message}\nYou have been defeated!"
+        return 'ongoing', message
     
     def run(self):
         """Run the battle encounter"""
@@ -128,15 +192,16 @@ class BattleEvent(Event):
     
     def give_rewards(self):
         """Give rewards to the player after winning a battle"""
-        # Roll for loot
-        roll = random.random()
-        
         if hasattr(self, 'game_manager') and self.game_manager:
+            # Roll for loot
+            rng = self.game_manager.rng
+            roll = rng.random()
+            
             # 90% chance for gold, 10% chance for equipment
             if roll < 0.9:
-                gold_amount = random.randint(1, 5)
+                gold_amount = rng.randint(1, 5)
                 print(f"You found {gold_amount} gold!")
-                self.game_manager.player.add_gold(gold_amount)
+                self.game_manager.reward_gold(gold_amount)
             else:
                 print("You found a better weapon!")
                 # In V1, we only have the stick weapon
@@ -1,22 +1,125 @@
 """
 Game Manager - Controls the main game loop and state
 """
-import random
 from game.player import Player
-from game.world import World, CellType
+from game.world import World, MAP_SIZE
 from game.time_system import TimeSystem
-from game.events import FirstEncounter
+from game.events import FirstEncounter, BattleEvent
+from game.interactions import run_interaction
+from game.effects import run_effect
+from game.response_delta import ResponseDelta
+from game.rng import GameRandom
+from game.ui import UI
+
+# Bump when the snapshot format changes incompatibly
+SNAPSHOT_VERSION = 1
+
+# Choices offered to the player on death, in order
+DEATH_OPTIONS = [
+    "Lose everything and start new",
+    "Resurrect as a vampire (keep items but take 5% damage during day)"
+]
 
 class GameManager:
     """Manages the game state and main loop"""
     
-    def __init__(self):
+    # Tens of thousands of games can be resident in the web server, so
+    # their state is slotted rather than kept in per-instance dicts
+    __slots__ = ('rng', 'player', 'world', 'time_system', 'action_count', 'game_over', 'battle',
+                 'log_seq', 'listeners', 'response_delta', 'headless')
+    
+    def __init__(self, map_size=MAP_SIZE, headless=True, seed=None):
+        # Every random roll in this game comes from its own generator
+        self.rng = GameRandom(seed)
         self.player = Player()
-        self.world = World()
+        self.world = World(map_size=map_size, rng=self.rng)
         self.time_system = TimeSystem()
         self.action_count = 0
         self.game_over = False
+        # Battle in progress in the web game, if any
+        self.battle = None
+        # Sequence number of the last action written to the action log
+        self.log_seq = 0
+        # Callbacks notified of state changes, as callback(name, data)
+        self.listeners = []
+        # Last response sent to the web client, for delta-encoded responses
+        self.response_delta = ResponseDelta()
+        # Headless games never print or wait for input; front ends render
+        # the events they emit instead
+        self.headless = headless
+        if not headless:
+            self.add_listener(UI.render_event)
+    
+    def __getstate__(self):
+        # Listeners and the client's response state belong to the current
+        # connection and are never saved
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state['listeners'] = []
+        state['response_delta'] = ResponseDelta()
+        return state
+    
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+    
+    def add_listener(self, listener):
+        """Register a callback for game state changes"""
+        self.listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """Unregister a state change callback"""
+        self.listeners.remove(listener)
+    
+    def notify(self, name, **data):
+        """Notify listeners of a state change"""
+        for listener in self.listeners:
+            listener(name, data)
+    
+    def reward_gold(self, amount):
+        """Give the player gold"""
+        self.player.add_gold(amount)
+        self.notify('gold_added', amount=amount)
+    
+    def reward_item(self, item, equip=False):
+        """Give the player an item, optionally equipping it"""
+        self.player.add_item(item)
+        self.notify('item_added', item=item.name)
+        if equip:
+            self.player.equip_weapon(item)
+            self.notify('weapon_equipped', weapon=item.name)
         
+    def to_dict(self):
+        """Serialize the game to a compact snapshot dictionary"""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'player': self.player.to_dict(),
+            'world': self.world.to_dict(),
+            'time': self.time_system.to_dict(),
+            'action_count': self.action_count,
+            'game_over': self.game_over,
+            'battle': self.battle.to_dict() if self.battle else None,
+            'log_seq': self.log_seq,
+            'rng': list(self.rng.getstate())
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Recreate a game from a snapshot dictionary"""
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {data.get('version')}")
+        game = cls()
+        game.player = Player.from_dict(data['player'])
+        if 'rng' in data:
+            game.rng.setstate(data['rng'])
+        game.world = World.from_dict(data['world'], rng=game.rng)
+        game.time_system = TimeSystem.from_dict(data['time'], data['action_count'])
+        game.action_count = data['action_count']
+        game.game_over = data['game_over']
+        if data.get('battle'):
+            game.battle = BattleEvent.from_dict(data['battle'], game)
+        game.log_seq = data.get('log_seq', 0)
+        return game
+    
     def start_game(self):
         """Start the game with the first encounter"""
         print("Welcome to Text RPG!")
@@ -93,339 +196,65 @@ class GameManager:
     
     def interact_with_location(self, action_choice=None):
         """Interact with the current location"""
-        from game.events import BattleEvent
-        
+        result = self.run_interaction(action_choice)
+        print(result.message)
+        if result.battle:
+            BattleEvent(result.battle, self).run()
+    
+    def run_interaction(self, action_choice):
+        """Run the interaction for the current location and return its result"""
         cell_content = self.world.get_current_cell()
-        
-        if cell_content == CellType.ENEMY:
-            if action_choice == 1:  # Attack the enemy
-                print("You've encountered an enemy!")
-                battle = BattleEvent("Goblin")
-                battle.run()
-            elif action_choice == 2:  # Try to sneak past
-                if random.random() < 0.6:
-                    print("You successfully sneak past the enemy!")
-                else:
-                    print("You failed to sneak past! The enemy notices you!")
-                    battle = BattleEvent("Goblin")
-                    battle.run()
-            elif action_choice == 3:  # Observe from distance
-                print("You observe the enemy from a safe distance.")
-                print("It's a Goblin with 3 health. It looks aggressive.")
-            self.action_taken()
-            
-        elif cell_content == CellType.NPC:
-            if action_choice == 1:  # Talk to the NPC
-                print("You talk to a local NPC.")
-                print("'Greetings, traveler! The roads are dangerous these days.'")
-            elif action_choice == 2:  # Ask for directions
-                print("'The nearest town is to the east, but beware of the goblins!'")
-            elif action_choice == 3:  # Request a quest
-                quest_reward = random.randint(3, 8)
-                self.player.gold += quest_reward
-                print(f"'I lost my ring nearby. Here's {quest_reward} gold for finding it!'")
-                print("(You pretend to find the ring)")
-            self.action_taken()
-            
-        elif cell_content == CellType.MERCHANT:
-            if action_choice == 1:  # Buy health potion
-                if self.player.gold >= 10:
-                    self.player.gold -= 10
-                    heal_amount = random.randint(3, 7)
-                    self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                    print(f"You buy a health potion and recover {heal_amount} health!")
-                else:
-                    print("You don't have enough gold for a health potion.")
-            elif action_choice == 2:  # Buy weapon upgrade
-                if self.player.gold >= 15:
-                    self.player.gold -= 15
-                    # Increase attack damage (simplified)
-                    print("You buy a weapon upgrade! Your attacks are now stronger!")
-                    print("(Attack damage increased)")
-                else:
-                    print("You don't have enough gold for a weapon upgrade.")
-            elif action_choice == 3:  # Sell items
-                gold_earned = random.randint(2, 6)
-                self.player.gold += gold_earned
-                print(f"You sell some old items for {gold_earned} gold.")
-            self.action_taken()
-            
-        elif cell_content == CellType.TREASURE:
-            if action_choice == 1:  # Search the treasure
-                gold_found = random.randint(8, 15)
-                self.player.gold += gold_found
-                print(f"You search the treasure and find {gold_found} gold!")
-            elif action_choice == 2:  # Check for traps first
-                if random.random() < 0.3:
-                    print("You find a trap! You carefully disarm it.")
-                    gold_found = random.randint(12, 20)
-                    self.player.gold += gold_found
-                    print(f"Safe treasure yields {gold_found} gold!")
-                else:
-                    print("No traps detected.")
-                    gold_found = random.randint(8, 15)
-                    self.player.gold += gold_found
-                    print(f"You find {gold_found} gold!")
-            elif action_choice == 3:  # Take only what you need
-                gold_found = random.randint(5, 10)
-                self.player.gold += gold_found
-                print(f"You take {gold_found} gold and leave the rest.")
-                print("Your restraint is noted by the universe...")
-            
-            # Remove treasure from this location
-            current_map = self.world.get_current_map()
-            current_map.grid[self.world.player_x][self.world.player_y] = CellType.EMPTY
-            self.action_taken()
-            
-        elif cell_content == CellType.PORTAL:
-            if action_choice == 1:  # Step through portal
-                print("You step through the mysterious portal...")
-                print("The world swirls around you, but nothing happens yet.")
-                print("(Portal travel will be implemented later)")
-            elif action_choice == 2:  # Examine closely
-                print("You examine the portal closely.")
-                print("Ancient runes glow with otherworldly energy.")
-                print("It seems to lead to another realm...")
-            elif action_choice == 3:  # Touch cautiously
-                print("You cautiously touch the portal.")
-                print("A warm energy flows through your hand.")
-                heal_amount = random.randint(1, 3)
-                self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                print(f"You feel refreshed! Recovered {heal_amount} health.")
-            self.action_taken()
-            
-        else:  # Empty location
-            if action_choice == 1:  # Rest and recover
-                heal_amount = random.randint(1, 3)
-                self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                print(f"You rest and recover {heal_amount} health.")
-            elif action_choice == 2:  # Search the area
-                if random.random() < 0.3:
-                    gold_found = random.randint(1, 4)
-                    self.player.gold += gold_found
-                    print(f"You search the area and find {gold_found} gold!")
-                else:
-                    print("You search the area but find nothing.")
-            elif action_choice == 3:  # Set up camp
-                heal_amount = random.randint(2, 5)
-                self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                print(f"You set up camp and rest well. Recovered {heal_amount} health.")
-            self.action_taken()
+        result = run_interaction(self, cell_content, action_choice)
+        self.action_taken()
+        return result
+    
+    def start_battle(self, enemy):
+        """Start a battle against an enemy, kept until it ends"""
+        self.battle = BattleEvent(enemy, self)
+        return self.battle
+    
+    def battle_turn(self, choice):
+        """Play a turn of the current battle and return (outcome, message)"""
+        result = self.battle.take_turn(choice)
+        if result is not None and result[0] != 'ongoing':
+            self.battle = None
+            if result[0] == 'lost':
+                self.handle_player_death()
+        return result
     
     def handle_location_interaction(self, action_choice):
         """Handle location interaction and return result message"""
-        from game.events import BattleEvent
-        from game.world import MajorEventType
-        
-        cell_content = self.world.get_current_cell()
-        result_message = ""
-        
-        # Handle major events first
-        if isinstance(cell_content, MajorEventType):
-            if cell_content == MajorEventType.TREASURE_VAULT:
-                if action_choice == 1:  # Attempt to break the seal
-                    gold_found = random.randint(50, 100)
-                    self.player.gold += gold_found
-                    result_message = f"You break the ancient seal! The vault opens, revealing {gold_found} gold!"
-                elif action_choice == 2:  # Search for the key
-                    gold_found = random.randint(30, 60)
-                    self.player.gold += gold_found
-                    result_message = f"You find a hidden key and unlock the vault safely, gaining {gold_found} gold!"
-                elif action_choice == 3:  # Study the magical locks
-                    heal_amount = random.randint(5, 10)
-                    self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                    result_message = f"Studying the magic teaches you ancient healing. You recover {heal_amount} health!"
-            
-            elif cell_content == MajorEventType.MASTER_MERCHANT:
-                if action_choice == 1:  # Buy legendary weapon
-                    if self.player.gold >= 50:
-                        self.player.gold -= 50
-                        result_message = "You purchase a legendary weapon! Your attack power has greatly increased!"
-                    else:
-                        result_message = "You don't have enough gold for the legendary weapon (50 gold needed)."
-                elif action_choice == 2:  # Buy master health elixir
-                    if self.player.gold >= 30:
-                        self.player.gold -= 30
-                        self.player.max_health += 5
-                        self.player.health = self.player.max_health
-                        result_message = "You drink the master elixir! Your maximum health increased by 5 and you're fully healed!"
-                    else:
-                        result_message = "You don't have enough gold for the master elixir (30 gold needed)."
-                elif action_choice == 3:  # Trade rare items
-                    gold_earned = random.randint(20, 40)
-                    self.player.gold += gold_earned
-                    result_message = f"You trade rare items with the master merchant for {gold_earned} gold."
-            
-            elif cell_content == MajorEventType.DRAGON:
-                if action_choice == 1:  # Challenge to combat
-                    result_message = "You challenge the mighty dragon to battle!"
-                    # This should trigger a battle, handled in the web API
-                elif action_choice == 2:  # Attempt to negotiate
-                    if random.random() < 0.3:
-                        gold_reward = random.randint(30, 50)
-                        self.player.gold += gold_reward
-                        result_message = f"The dragon is impressed by your courage and grants you {gold_reward} gold!"
-                    else:
-                        result_message = "The dragon roars angrily! Negotiation failed - prepare for battle!"
-                elif action_choice == 3:  # Try to sneak past
-                    if random.random() < 0.4:
-                        result_message = "You successfully sneak past the sleeping dragon!"
-                    else:
-                        result_message = "The dragon awakens and spots you! Battle is inevitable!"
-            
-            elif cell_content == MajorEventType.ANCIENT_PORTAL:
-                if action_choice == 1:  # Activate the portal
-                    result_message = "The portal activates with blinding light! (Portal travel not yet implemented)"
-                elif action_choice == 2:  # Study the runes
-                    heal_amount = random.randint(3, 8)
-                    self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                    result_message = f"The ancient runes teach you forgotten magic. You recover {heal_amount} health!"
-                elif action_choice == 3:  # Channel energy
-                    gold_found = random.randint(10, 25)
-                    self.player.gold += gold_found
-                    result_message = f"Channeling energy into the portal creates {gold_found} gold from pure magic!"
-            
-            elif cell_content == MajorEventType.BOSS_ENEMY:
-                if action_choice == 1:  # Engage in epic battle
-                    result_message = "You engage the boss enemy in epic combat!"
-                    # This should trigger a battle, handled in the web API
-                elif action_choice == 2:  # Find weakness
-                    result_message = "You study the boss and discover its weakness! You'll have an advantage in battle!"
-                elif action_choice == 3:  # Tactical retreat
-                    if random.random() < 0.6:
-                        result_message = "You successfully retreat from the dangerous boss enemy!"
-                    else:
-                        result_message = "Retreat failed! The boss blocks your escape - battle begins!"
-        
-        elif cell_content == CellType.ENEMY:
-            if action_choice == 1:  # Attack the enemy
-                result_message = "You've encountered an enemy!"
-            elif action_choice == 2:  # Try to sneak past
-                if random.random() < 0.6:
-                    result_message = "You successfully sneak past the enemy!"
-                else:
-                    result_message = "You failed to sneak past! The enemy notices you!"
-            elif action_choice == 3:  # Observe from distance
-                result_message = "You observe the enemy from a safe distance. It's a Goblin with 3 health."
-            
-        elif cell_content == CellType.NPC:
-            if action_choice == 1:  # Talk to the NPC
-                result_message = "You talk to a local NPC. 'Greetings, traveler! The roads are dangerous these days.'"
-            elif action_choice == 2:  # Ask for directions
-                result_message = "'The nearest town is to the east, but beware of the goblins!'"
-            elif action_choice == 3:  # Request a quest
-                quest_reward = random.randint(3, 8)
-                self.player.gold += quest_reward
-                result_message = f"'I lost my ring nearby. Here's {quest_reward} gold for finding it!' (You pretend to find the ring)"
-                
-        elif cell_content == CellType.MERCHANT:
-            if action_choice == 1:  # Buy health potion
-                if self.player.gold >= 10:
-                    self.player.gold -= 10
-                    heal_amount = random.randint(3, 7)
-                    self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                    result_message = f"You buy a health potion and recover {heal_amount} health!"
-                else:
-                    result_message = "You don't have enough gold for a health potion."
-            elif action_choice == 2:  # Buy weapon upgrade
-                if self.player.gold >= 15:
-                    self.player.gold -= 15
-                    result_message = "You buy a weapon upgrade! Your attacks are now stronger!"
-                else:
-                    result_message = "You don't have enough gold for a weapon upgrade."
-            elif action_choice == 3:  # Sell items
-                gold_earned = random.randint(2, 6)
-                self.player.gold += gold_earned
-                result_message = f"You sell some old items for {gold_earned} gold."
-                
-        elif cell_content == CellType.TREASURE:
-            if action_choice == 1:  # Search the treasure
-                gold_found = random.randint(8, 15)
-                self.player.gold += gold_found
-                result_message = f"You search the treasure and find {gold_found} gold!"
-            elif action_choice == 2:  # Check for traps first
-                if random.random() < 0.3:
-                    gold_found = random.randint(12, 20)
-                    self.player.gold += gold_found
-                    result_message = f"You find a trap! You carefully disarm it. Safe treasure yields {gold_found} gold!"
-                else:
-                    gold_found = random.randint(8, 15)
-                    self.player.gold += gold_found
-                    result_message = f"No traps detected. You find {gold_found} gold!"
-            elif action_choice == 3:  # Take only what you need
-                gold_found = random.randint(5, 10)
-                self.player.gold += gold_found
-                result_message = f"You take {gold_found} gold and leave the rest. Your restraint is noted..."
-            
-            # Remove treasure from this location
-            current_map = self.world.get_current_map()
-            current_map.grid[self.world.player_x][self.world.player_y] = CellType.EMPTY
-            
-        elif cell_content == CellType.PORTAL:
-            if action_choice == 1:  # Step through portal
-                result_message = "You step through the mysterious portal... The world swirls around you, but nothing happens yet."
-            elif action_choice == 2:  # Examine closely
-                result_message = "You examine the portal closely. Ancient runes glow with otherworldly energy."
-            elif action_choice == 3:  # Touch cautiously
-                heal_amount = random.randint(1, 3)
-                self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                result_message = f"You cautiously touch the portal. A warm energy flows through you. Recovered {heal_amount} health."
-                
-        else:  # Empty location
-            if action_choice == 1:  # Rest and recover
-                heal_amount = random.randint(1, 3)
-                self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                result_message = f"You rest and recover {heal_amount} health."
-            elif action_choice == 2:  # Search the area
-                if random.random() < 0.3:
-                    gold_found = random.randint(1, 4)
-                    self.player.gold += gold_found
-                    result_message = f"You search the area and find {gold_found} gold!"
-                else:
-                    result_message = "You search the area but find nothing."
-            elif action_choice == 3:  # Set up camp
-                heal_amount = random.randint(2, 5)
-                self.player.health = min(self.player.max_health, self.player.health + heal_amount)
-                result_message = f"You set up camp and rest well. Recovered {heal_amount} health."
-        
-        self.action_taken()
-        return result_message
+        return self.run_interaction(action_choice).message
     
     def action_taken(self):
         """Update game state after an action is taken"""
         self.action_count += 1
         
-        # Update time (day/night cycle every 5 actions)
-        if self.action_count % 5 == 0:
-            self.time_system.advance_time()
-            
-            # If player is a vampire, take damage during day
-            if self.player.is_vampire and self.time_system.is_daytime():
-                damage = int(self.player.max_health * 0.05)
-                self.player.take_damage(damage)
-                print(f"You take {damage} sun damage as a vampire!")
-                
-                if self.player.health <= 0:
-                    self.handle_player_death()
+        # Fire the timed effects that are due, such as the day/night cycle
+        for name in self.time_system.pop_due(self.action_count):
+            run_effect(self, name)
     
-    def handle_player_death(self):
-        """Handle player death"""
-        print("\n===== YOU DIED =====")
-        print("Choose your fate:")
-        print("1. Lose everything and start new")
-        print("2. Resurrect as a vampire (keep items but take 5% damage during day)")
-        
-        choice = input("> ")
-        
-        if choice == "1":
-            # Reset player
-            self.player = Player()
-            print("You've been reborn. All progress lost.")
-        elif choice == "2":
-            # Resurrect as vampire
+    def handle_player_death(self, choice=None):
+        """Handle player death
+
+        Headless games only report the death; the front end applies the
+        player's choice with resolve_death.
+        """
+        self.notify('player_died', options=DEATH_OPTIONS)
+        if choice is None:
+            if self.headless:
+                return
+            choice = input("> ")
+        self.resolve_death(choice)
+    
+    def resolve_death(self, choice):
+        """Apply the player's choice of fate after dying"""
+        choice = str(choice)
+        if choice == "2":
             self.player.resurrect_as_vampire()
-            print("You've been resurrected as a vampire!")
-        else:
-            print("Invalid choice. Defaulting to option 1.")
-            self.player = Player()
-            print("You've been reborn. All progress lost.")
\ No newline at end of file
+            self.notify('player_resurrected')
+            return
+        if choice != "1":
+            self.notify('invalid_death_choice')
+        self.player = Player()
+        self.notify('player_reborn')
\ No newline at end of file
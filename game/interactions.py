@@ -0,0 +1,242 @@
+"""
+Interactions module - Location interactions shared by the terminal and web game
+"""
+from game.enemies import GOBLIN, ANCIENT_DRAGON, BOSS_MONSTER
+from game.world import CellType, MajorEventType
+
+class InteractionResult:
+    """Outcome of a location interaction"""
+
+    def __init__(self, message, battle=None):
+        self.message = message
+        self.battle = battle  # Enemy to fight if the interaction starts a battle
+
+
+# Interaction handlers keyed by (location, choice)
+INTERACTIONS = {}
+
+# Locations that have at least one registered handler
+LOCATIONS = set()
+
+def interaction(location, choice):
+    """Register a handler for choosing an action at a location"""
+    def register(handler):
+        INTERACTIONS[(location, choice)] = handler
+        LOCATIONS.add(location)
+        return handler
+    return register
+
+def run_interaction(game, location, choice):
+    """Run the handler for a location and choice"""
+    handler = INTERACTIONS.get((location, choice))
+    if handler is None:
+        # Unknown locations behave like empty ones
+        if location not in LOCATIONS:
+            handler = INTERACTIONS.get((CellType.EMPTY, choice))
+        if handler is None:
+            return InteractionResult("")
+    return handler(game)
+
+def heal(game, low, high):
+    """Heal the player by a random amount and return it"""
+    amount = game.rng.randint(low, high)
+    game.player.health = min(game.player.max_health, game.player.health + amount)
+    return amount
+
+def find_gold(game, low, high):
+    """Give the player a random amount of gold and return it"""
+    amount = game.rng.randint(low, high)
+    game.player.gold += amount
+    return amount
+
+def remove_treasure(game):
+    """Clear the treasure at the player's location"""
+    current_map = game.world.get_current_map()
+    current_map.set_cell(game.world.player_x, game.world.player_y, CellType.EMPTY)
+
+
+# Major events
+
+@interaction(MajorEventType.TREASURE_VAULT, 1)
+def break_vault_seal(game):
+    gold_found = find_gold(game, 50, 100)
+    return InteractionResult(f"You break the ancient seal! The vault opens, revealing {gold_found} gold!")
+
+@interaction(MajorEventType.TREASURE_VAULT, 2)
+def search_vault_key(game):
+    gold_found = find_gold(game, 30, 60)
+    return InteractionResult(f"You find a hidden key and unlock the vault safely, gaining {gold_found} gold!")
+
+@interaction(MajorEventType.TREASURE_VAULT, 3)
+def study_vault_locks(game):
+    heal_amount = heal(game, 5, 10)
+    return InteractionResult(f"Studying the magic teaches you ancient healing. You recover {heal_amount} health!")
+
+@interaction(MajorEventType.MASTER_MERCHANT, 1)
+def buy_legendary_weapon(game):
+    if game.player.gold >= 50:
+        game.player.gold -= 50
+        return InteractionResult("You purchase a legendary weapon! Your attack power has greatly increased!")
+    return InteractionResult("You don't have enough gold for the legendary weapon (50 gold needed).")
+
+@interaction(MajorEventType.MASTER_MERCHANT, 2)
+def buy_master_elixir(game):
+    if game.player.gold >= 30:
+        game.player.gold -= 30
+        game.player.max_health += 5
+        game.player.health = game.player.max_health
+        return InteractionResult("You drink the master elixir! Your maximum health increased by 5 and you're fully healed!")
+    return InteractionResult("You don't have enough gold for the master elixir (30 gold needed).")
+
+@interaction(MajorEventType.MASTER_MERCHANT, 3)
+def trade_rare_items(game):
+    gold_earned = find_gold(game, 20, 40)
+    return InteractionResult(f"You trade rare items with the master merchant for {gold_earned} gold.")
+
+@interaction(MajorEventType.DRAGON, 1)
+def challenge_dragon(game):
+    return InteractionResult("You challenge the mighty dragon to battle!", ANCIENT_DRAGON)
+
+@interaction(MajorEventType.DRAGON, 2)
+def negotiate_with_dragon(game):
+    if game.rng.random() < 0.3:
+        gold_reward = find_gold(game, 30, 50)
+        return InteractionResult(f"The dragon is impressed by your courage and grants you {gold_reward} gold!")
+    return InteractionResult("The dragon roars angrily! Negotiation failed - prepare for battle!", ANCIENT_DRAGON)
+
+@interaction(MajorEventType.DRAGON, 3)
+def sneak_past_dragon(game):
+    if game.rng.random() < 0.4:
+        return InteractionResult("You successfully sneak past the sleeping dragon!")
+    return InteractionResult("The dragon awakens and spots you! Battle is inevitable!", ANCIENT_DRAGON)
+
+@interaction(MajorEventType.ANCIENT_PORTAL, 1)
+def activate_portal(game):
+    return InteractionResult("The portal activates with blinding light! (Portal travel not yet implemented)")
+
+@interaction(MajorEventType.ANCIENT_PORTAL, 2)
+def study_portal_runes(game):
+    heal_amount = heal(game, 3, 8)
+    return InteractionResult(f"The ancient runes teach you forgotten magic. You recover {heal_amount} health!")
+
+@interaction(MajorEventType.ANCIENT_PORTAL, 3)
+def channel_portal_energy(game):
+    gold_found = find_gold(game, 10, 25)
+    return InteractionResult(f"Channeling energy into the portal creates {gold_found} gold from pure magic!")
+
+@interaction(MajorEventType.BOSS_ENEMY, 1)
+def engage_boss(game):
+    return InteractionResult("You engage the boss enemy in epic combat!", BOSS_MONSTER)
+
+@interaction(MajorEventType.BOSS_ENEMY, 2)
+def find_boss_weakness(game):
+    return InteractionResult("You study the boss and discover its weakness! You'll have an advantage in battle!")
+
+@interaction(MajorEventType.BOSS_ENEMY, 3)
+def retreat_from_boss(game):
+    if game.rng.random() < 0.6:
+        return InteractionResult("You successfully retreat from the dangerous boss enemy!")
+    return InteractionResult("Retreat failed! The boss blocks your escape - battle begins!", BOSS_MONSTER)
+
+
+# Regular locations
+
+@interaction(CellType.ENEMY, 1)
+def attack_enemy(game):
+    return InteractionResult("You've encountered an enemy!", GOBLIN)
+
+@interaction(CellType.ENEMY, 2)
+def sneak_past_enemy(game):
+    if game.rng.random() < 0.6:
+        return InteractionResult("You successfully sneak past the enemy!")
+    return InteractionResult("You failed to sneak past! The enemy notices you!", GOBLIN)
+
+@interaction(CellType.ENEMY, 3)
+def observe_enemy(game):
+    return InteractionResult("You observe the enemy from a safe distance. It's a Goblin with 3 health.")
+
+@interaction(CellType.NPC, 1)
+def talk_to_npc(game):
+    return InteractionResult("You talk to a local NPC. 'Greetings, traveler! The roads are dangerous these days.'")
+
+@interaction(CellType.NPC, 2)
+def ask_npc_directions(game):
+    return InteractionResult("'The nearest town is to the east, but beware of the goblins!'")
+
+@interaction(CellType.NPC, 3)
+def request_npc_quest(game):
+    quest_reward = find_gold(game, 3, 8)
+    return InteractionResult(f"'I lost my ring nearby. Here's {quest_reward} gold for finding it!' (You pretend to find the ring)")
+
+@interaction(CellType.MERCHANT, 1)
+def buy_health_potion(game):
+    if game.player.gold >= 10:
+        game.player.gold -= 10
+        heal_amount = heal(game, 3, 7)
+        return InteractionResult(f"You buy a health potion and recover {heal_amount} health!")
+    return InteractionResult("You don't have enough gold for a health potion.")
+
+@interaction(CellType.MERCHANT, 2)
+def buy_weapon_upgrade(game):
+    if game.player.gold >= 15:
+        game.player.gold -= 15
+        return InteractionResult("You buy a weapon upgrade! Your attacks are now stronger!")
+    return InteractionResult("You don't have enough gold for a weapon upgrade.")
+
+@interaction(CellType.MERCHANT, 3)
+def sell_items(game):
+    gold_earned = find_gold(game, 2, 6)
+    return InteractionResult(f"You sell some old items for {gold_earned} gold.")
+
+@interaction(CellType.TREASURE, 1)
+def search_treasure(game):
+    gold_found = find_gold(game, 8, 15)
+    remove_treasure(game)
+    return InteractionResult(f"You search the treasure and find {gold_found} gold!")
+
+@interaction(CellType.TREASURE, 2)
+def check_treasure_traps(game):
+    if game.rng.random() < 0.3:
+        gold_found = find_gold(game, 12, 20)
+        message = f"You find a trap! You carefully disarm it. Safe treasure yields {gold_found} gold!"
+    else:
+        gold_found = find_gold(game, 8, 15)
+        message = f"No traps detected. You find {gold_found} gold!"
+    remove_treasure(game)
+    return InteractionResult(message)
+
+@interaction(CellType.TREASURE, 3)
+def take_some_treasure(game):
+    gold_found = find_gold(game, 5, 10)
+    remove_treasure(game)
+    return InteractionResult(f"You take {gold_found} gold and leave the rest. Your restraint is noted...")
+
+@interaction(CellType.PORTAL, 1)
+def step_through_portal(game):
+    return InteractionResult("You step through the mysterious portal... The world swirls around you, but nothing happens yet.")
+
+@interaction(CellType.PORTAL, 2)
+def examine_portal(game):
+    return InteractionResult("You examine the portal closely. Ancient runes glow with otherworldly energy.")
+
+@interaction(CellType.PORTAL, 3)
+def touch_portal(game):
+    heal_amount = heal(game, 1, 3)
+    return InteractionResult(f"You cautiously touch the portal. A warm energy flows through you. Recovered {heal_amount} health.")
+
+@interaction(CellType.EMPTY, 1)
+def rest(game):
+    heal_amount = heal(game, 1, 3)
+    return InteractionResult(f"You rest and recover {heal_amount} health.")
+
+@interaction(CellType.EMPTY, 2)
+def search_area(game):
+    if game.rng.random() < 0.3:
+        gold_found = find_gold(game, 1, 4)
+        return InteractionResult(f"You search the area and find {gold_found} gold!")
+    return InteractionResult("You search the area but find nothing.")
+
+@interaction(CellType.EMPTY, 3)
+def set_up_camp(game):
+    heal_amount = heal(game, 2, 5)
+    return InteractionResult(f"You set up camp and rest well. Recovered {heal_amount} health.")
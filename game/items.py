@@ -1,22 +1,54 @@
 """
 Items module - Defines all items in the game
 """
+from game.catalog import Catalog, Definition
 
-class Item:
+# Every item and weapon definition, by ID
+ITEM_CATALOG = Catalog("items")
+
+class Item(Definition):
     """Base class for all items"""
     
-    def __init__(self, name, description):
-        self.name = name
-        self.description = description
+    __slots__ = ('name', 'description')
+    catalog = ITEM_CATALOG
+    
+    def to_dict(self):
+        """Serialize the item to a snapshot dictionary"""
+        return {'name': self.name, 'description': self.description}
 
 
 class Weapon(Item):
     """Weapon item that can be equipped"""
     
-    def __init__(self, name, description, damage):
-        super().__init__(name, description)
-        self.damage = damage
+    __slots__ = ('damage',)
+    
+    def to_dict(self):
+        """Serialize the weapon to a snapshot dictionary"""
+        data = super().to_dict()
+        data['damage'] = self.damage
+        return data
+
+
+def item_from_dict(data):
+    """Recreate an item or weapon from a snapshot dictionary"""
+    if 'damage' in data:
+        return Weapon(data['name'], data['description'], data['damage'])
+    return Item(data['name'], data['description'])
+
+def item_to_snapshot(item):
+    """Serialize an item as its catalog ID, or in full if it isn't built in"""
+    if ITEM_CATALOG.has_stable_id(item):
+        return item.id
+    return item.to_dict()
+
+def item_from_snapshot(data):
+    """Recreate an item saved by item_to_snapshot"""
+    if isinstance(data, int):
+        return ITEM_CATALOG[data]
+    return item_from_dict(data)
 
 
 # Define some basic weapons
-STICK = Weapon("Stick", "A simple wooden stick", 1)
\ No newline at end of file
+STICK = Weapon("Stick", "A simple wooden stick", 1)
+
+ITEM_CATALOG.mark_stable()
\ No newline at end of file
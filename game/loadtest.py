@@ -0,0 +1,331 @@
+"""
+Load Test module - Replays realistic player sessions against the web API
+
+Virtual users play the game the way the browser does: they load the page,
+start a game and send actions to /api/action, asking for delta responses
+and rebuilding the full response from each patch. What a user sends next
+depends on the event it was given, so sessions go through the first
+encounter, map moves, location interactions, battles and deaths. Every
+user keeps its own cookies, so each one is a separate session on the
+server, and users run concurrently in threads.
+
+Requests go either to the Flask test client in this process or over HTTP
+to a running server (app.py or serve.py). The report gives throughput and
+p50/p95/p99 latencies per endpoint and per action event. Run it with
+`python -m game.loadtest`.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+# Percentiles reported for every label
+PERCENTILES = (50, 95, 99)
+
+# Chance that a user on the map interacts with the location instead of moving
+INTERACT_CHANCE = 0.3
+
+# Chance that a user in a battle flees instead of attacking
+FLEE_CHANCE = 0.15
+
+# Chance that a user at a location carries on exploring instead of interacting
+CONTINUE_CHANCE = 0.25
+
+# Seconds to wait for a response from a server
+DEFAULT_TIMEOUT = 10.0
+
+
+class TestClientTransport:
+    """Sends one user's requests to the app in this process through Flask's test client"""
+
+    def __init__(self):
+        from app import app
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        """Send a request and return (status, JSON body or None)"""
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    """Sends one user's requests to a running server over a keep-alive connection"""
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT):
+        url = urlsplit(base_url)
+        if url.scheme != 'http':
+            raise ValueError(f"only http:// servers are supported: {base_url}")
+        self.prefix = url.path.rstrip('/')
+        self.connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        self.cookies = SimpleCookie()
+
+    def request(self, method, path, body=None):
+        """Send a request and return (status, JSON body or None)"""
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{name}={morsel.value}" for name, morsel in self.cookies.items())
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # Reconnect on the next request
+            self.connection.close()
+            raise
+        for cookie in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(cookie)
+        if 'json' not in (response.getheader('Content-Type') or ''):
+            return response.status, None
+        return response.status, json.loads(data)
+
+    def close(self):
+        self.connection.close()
+
+
+def apply_delta(state, data):
+    """Rebuild a full response from the last one and a response that may be a patch"""
+    if data.get('delta'):
+        full = dict(state)
+        for key in data['unset']:
+            full.pop(key, None)
+        for key, value in data['set'].items():
+            current = full.get(key)
+            if isinstance(value, dict) and isinstance(current, dict):
+                value = {**current, **value}
+            full[key] = value
+    else:
+        full = {key: value for key, value in data.items() if key != 'delta'}
+    full.pop('version', None)
+    return full
+
+def choose_action(state, rng):
+    """Choose the action a player would send for the response they were given"""
+    event = state.get('event')
+    if event == 'first_encounter':
+        return {'event': event, 'choice': rng.randint(1, 3)}
+    if event == 'battle':
+        return {'event': event, 'choice': 3 if rng.random() < FLEE_CHANCE else 1}
+    if event == 'location':
+        choice = 4 if rng.random() < CONTINUE_CHANCE else rng.randint(1, 3)
+        return {'event': event, 'choice': choice}
+    if event == 'death':
+        return {'event': event, 'choice': rng.randint(1, 2)}
+    # On the map, players mostly move and sometimes use what is around them
+    if rng.random() < INTERACT_CHANCE:
+        return {'event': 'location', 'choice': rng.randint(1, 3)}
+    return {'event': 'map', 'choice': rng.randint(1, 4)}
+
+
+class LatencyStats:
+    """Latencies and errors of requests, grouped by label"""
+
+    def __init__(self):
+        self.latencies = {}  # {label: [seconds, ...]}
+        self.errors = {}  # {label: count}
+        self.lock = threading.Lock()
+
+    def record(self, label, seconds, ok=True):
+        """Record one request"""
+        with self.lock:
+            if ok:
+                self.latencies.setdefault(label, []).append(seconds)
+            else:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+
+def percentile(values, percent):
+    """Get a percentile of some values by the nearest-rank method"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+def summarize_latencies(latencies, errors=0, elapsed=None):
+    """Summarize a list of latencies with their count, errors, mean and percentiles"""
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'max': max(latencies, default=0.0)
+    }
+    summary.update({f"p{percent}": percentile(latencies, percent) for percent in PERCENTILES})
+    if elapsed is not None:
+        summary['throughput'] = len(latencies) / elapsed if elapsed else 0.0
+    return summary
+
+
+class VirtualUser:
+    """One player replaying sessions through a transport"""
+
+    def __init__(self, transport, stats, rng, think_time=0.0):
+        self.transport = transport
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time  # Mean pause between actions, in seconds
+        self.state = {}
+        self.version = None
+        self.started = False
+        self.actions = 0
+
+    def send(self, label, method, path, body=None):
+        """Send a request, recording its latency; return (succeeded, JSON body or None)"""
+        start = time.perf_counter()
+        try:
+            status, data = self.transport.request(method, path, body)
+        except (http.client.HTTPException, OSError):
+            status, data = None, None
+        ok = status == 200
+        self.stats.record(label, time.perf_counter() - start, ok)
+        return ok, data
+
+    def start(self):
+        """Load the page and start a new game; return False if either failed"""
+        ok, _ = self.send('page', 'GET', '/')
+        if not ok:
+            return False
+        ok, data = self.send('start_game', 'POST', '/api/start_game')
+        if not ok or data is None:
+            return False
+        self.state = data
+        self.started = True
+        # The first action gets a full response, which starts the delta chain
+        self.version = None
+        return True
+
+    def act(self):
+        """Send the next action; return False if it failed"""
+        action = choose_action(self.state, self.rng)
+        ok, data = self.send(f"action:{action['event']}", 'POST', '/api/action',
+                             {**action, 'delta': True, 'version': self.version})
+        self.actions += 1
+        if not ok or data is None:
+            return False
+        self.state = apply_delta(self.state, data)
+        self.version = data.get('version')
+        return True
+
+    def play(self, actions, deadline=None):
+        """Play one session of up to a number of actions, stopping early at a deadline"""
+        if not self.start():
+            return False
+        for _ in range(actions):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if self.think_time:
+                time.sleep(self.rng.expovariate(1 / self.think_time))
+            if not self.act():
+                return False
+        return True
+
+
+def run_user(make_transport, stats, rng, actions, sessions, deadline, think_time):
+    """Play a user's sessions, each with a fresh transport and so a fresh cookie session"""
+    played = 0
+    while deadline is not None or played < sessions:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        transport = make_transport()
+        user = VirtualUser(transport, stats, rng, think_time)
+        try:
+            user.play(actions, deadline)
+        finally:
+            transport.close()
+        if not user.started:
+            # The server is not answering; don't hammer it with new sessions
+            break
+        played += 1
+
+def get_transport_factory(url=None, timeout=DEFAULT_TIMEOUT):
+    """Get a function creating transports to a server, or to the app in this process if url is None"""
+    if url is None:
+        # Import the app once, before users start in parallel
+        import app  # noqa: F401
+        return TestClientTransport
+    return lambda: HttpTransport(url, timeout)
+
+def run_load_test(url=None, users=10, actions=100, sessions=1, duration=None, think_time=0.0, seed=0,
+                  timeout=DEFAULT_TIMEOUT):
+    """Run concurrent users against the web API and summarize their requests
+
+    Each of 'users' threads plays 'sessions' sessions of 'actions' actions,
+    or keeps starting new sessions for 'duration' seconds when it is set.
+    Returns the overall summary with throughput in requests per second,
+    and a summary per label ('page', 'start_game' and 'action:<event>').
+    """
+    make_transport = get_transport_factory(url, timeout)
+    stats = LatencyStats()
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+    threads = [threading.Thread(target=run_user,
+                                args=(make_transport, stats, random.Random(f"{seed}:{user}"), actions,
+                                      sessions, deadline, think_time),
+                                daemon=True)
+               for user in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    labels = sorted(set(stats.latencies) | set(stats.errors))
+    all_latencies = [latency for latencies in stats.latencies.values() for latency in latencies]
+    return {
+        'target': url or 'in-process',
+        'users': users,
+        'elapsed': elapsed,
+        'overall': summarize_latencies(all_latencies, sum(stats.errors.values()), elapsed),
+        'by_label': {label: summarize_latencies(stats.latencies.get(label, []), stats.errors.get(label, 0),
+                                                elapsed)
+                     for label in labels}
+    }
+
+def format_milliseconds(seconds):
+    """Format a latency in milliseconds"""
+    return f"{seconds * 1000:.2f}"
+
+def format_report(report):
+    """Format a load test report as text"""
+    overall = report['overall']
+    lines = [f"Target: {report['target']}  Users: {report['users']}  Elapsed: {report['elapsed']:.2f} s",
+             f"Requests: {overall['requests']}  Errors: {overall['errors']}  "
+             f"Throughput: {overall['throughput']:.1f} req/s",
+             f"{'label':<24} {'requests':>8} {'errors':>6} {'req/s':>8} "
+             + ' '.join(f"{f'p{percent} ms':>8}" for percent in PERCENTILES) + f" {'max ms':>8}"]
+    for label, summary in [('all', overall)] + list(report['by_label'].items()):
+        lines.append(f"{label:<24} {summary['requests']:>8} {summary['errors']:>6} {summary['throughput']:>8.1f} "
+                     + ' '.join(f"{format_milliseconds(summary[f'p{percent}']):>8}" for percent in PERCENTILES)
+                     + f" {format_milliseconds(summary['max']):>8}")
+    return "\n".join(lines)
+
+def main():
+    """Run a load test from the command line"""
+    parser = argparse.ArgumentParser(description="Replay realistic player sessions against the Text RPG web API")
+    parser.add_argument('--url', help="base URL of a running server, e.g. http://localhost:5000 "
+                                      "(default: the app in this process)")
+    parser.add_argument('--users', type=int, default=10, help="concurrent users")
+    parser.add_argument('--actions', type=int, default=100, help="actions per session")
+    parser.add_argument('--sessions', type=int, default=1, help="sessions each user plays one after another")
+    parser.add_argument('--duration', type=float, help="keep starting sessions for this many seconds instead")
+    parser.add_argument('--think-time', type=float, default=0.0, help="mean seconds a user waits between actions")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="seconds to wait for a response")
+    parser.add_argument('--seed', type=int, default=0, help="base random seed")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_load_test(args.url, args.users, args.actions, args.sessions, args.duration, args.think_time,
+                           args.seed, args.timeout)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Memory module - Per-session memory accounting
+
+Measures how many bytes a game really holds by walking everything it
+references and summing sys.getsizeof. Objects shared by every game, such
+as classes, functions, enum members, item and enemy definitions and any
+constant reachable from the game's modules, are not counted. Sizes are broken down by part of the game (player, each
+realm's map, the rest of the world, ...) and by object type, so it is
+clear whether the memory goes to map grids, inventories or strings.
+
+A tracemalloc mode attributes the memory allocated while running some
+code to the modules that allocated it. Run `python -m game.memory` to
+measure bot sessions after a number of actions.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+import types
+from collections import Counter
+from enum import Enum
+from game.bots import BotSession, POLICIES
+from game.catalog import Definition
+
+# Objects of these types are shared by every game and never counted
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                types.MethodType, Enum, Definition)
+
+# Root of the source tree, used to name modules in allocation traces
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def is_game_module(name):
+    """Check if a module name belongs to the game package"""
+    return name == 'game' or name.startswith('game.')
+
+def find_shared_objects():
+    """Get the ids of every object reachable from the game's modules
+
+    These are module constants, class attributes and the constants of
+    functions, such as default tuples and effect names, which games
+    reference but don't own. Other modules and classes are not followed.
+    """
+    shared = set()
+    stack = [module for name, module in list(sys.modules.items()) if is_game_module(name)]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in shared:
+            continue
+        if isinstance(obj, types.ModuleType) and not is_game_module(obj.__name__):
+            continue
+        if isinstance(obj, type) and not is_game_module(obj.__module__):
+            continue
+        shared.add(id(obj))
+        stack.extend(gc.get_referents(obj))
+    return shared
+
+def is_shared(obj):
+    """Check if an object is shared between games by its type"""
+    if obj is None or obj is True or obj is False:
+        return True
+    # Small ints are cached by the interpreter
+    if type(obj) is int and -5 <= obj <= 256:
+        return True
+    return isinstance(obj, SHARED_TYPES)
+
+def measure(root, seen=None, shared=frozenset()):
+    """Measure the bytes an object holds, returning (size, Counter of bytes by type name)
+
+    Objects already in 'seen' (a set of ids) are skipped and every object
+    measured is added to it, so measuring the parts of a game in turn with
+    one set counts each object once. Objects in 'shared' (a set of ids,
+    see find_shared_objects) are skipped as well.
+    """
+    seen = set() if seen is None else seen
+    by_type = Counter()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or id(obj) in shared or is_shared(obj):
+            continue
+        seen.add(id(obj))
+        by_type[type(obj).__name__] += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return sum(by_type.values()), by_type
+
+def deep_sizeof(obj, shared=None):
+    """Get the bytes an object holds, including everything it references"""
+    return measure(obj, shared=find_shared_objects() if shared is None else shared)[0]
+
+def measure_game(game, shared=None):
+    """Measure a game, broken down by part and by object type
+
+    Returns a dictionary of bytes with 'total', 'by_part' ('rng',
+    'player', 'time_system', 'battle', 'map:<realm>' for each generated
+    realm, 'world' for the rest of the world and 'game' for everything
+    else) and 'by_type'. Pass the result of find_shared_objects as
+    'shared' when measuring many games.
+    """
+    if shared is None:
+        shared = find_shared_objects()
+    seen = set()
+    by_type = Counter()
+    by_part = {}
+    parts = [('rng', game.rng), ('player', game.player), ('time_system', game.time_system),
+             ('battle', game.battle)]
+    parts += [(f"map:{world_type.value}", world_map) for world_type, world_map in game.world.maps.items()]
+    parts += [('world', game.world), ('game', game)]
+    for name, part in parts:
+        size, part_types = measure(part, seen, shared)
+        by_part[name] = size
+        by_type.update(part_types)
+    return {'total': sum(by_part.values()), 'by_part': by_part, 'by_type': dict(by_type)}
+
+def summarize_games(games):
+    """Combine measure_game results for many games into totals and means"""
+    total = 0
+    by_part = Counter()
+    by_type = Counter()
+    count = 0
+    shared = find_shared_objects()
+    for game in games:
+        sizes = measure_game(game, shared)
+        total += sizes['total']
+        by_part.update(sizes['by_part'])
+        by_type.update(sizes['by_type'])
+        count += 1
+    return {
+        'games': count,
+        'total': total,
+        'mean': total / count if count else 0.0,
+        'by_part': dict(by_part.most_common()),
+        'by_type': dict(by_type.most_common())
+    }
+
+def get_module_name(filename):
+    """Name the module a source file belongs to"""
+    if filename.startswith('<'):
+        return filename
+    path = os.path.abspath(filename)
+    if path.startswith(SOURCE_ROOT + os.sep):
+        path = os.path.relpath(path, SOURCE_ROOT)
+    else:
+        # Library modules are named by their last directory and file
+        path = os.path.join(*path.split(os.sep)[-2:])
+    return os.path.splitext(path)[0].replace(os.sep, '.')
+
+def allocations_by_module(snapshot, base=None):
+    """Get {module: bytes} allocated in a tracemalloc snapshot, or since a base snapshot"""
+    if base is not None:
+        statistics = snapshot.compare_to(base, 'filename')
+        sizes = ((stat.traceback[0].filename, stat.size_diff) for stat in statistics)
+    else:
+        sizes = ((stat.traceback[0].filename, stat.size) for stat in snapshot.statistics('filename'))
+    by_module = Counter()
+    for filename, size in sizes:
+        by_module[get_module_name(filename)] += size
+    return dict(by_module.most_common())
+
+def take_snapshot():
+    """Take a tracemalloc snapshot without tracemalloc's own bookkeeping"""
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class AllocationTracer:
+    """Attributes memory allocated since tracing started to modules"""
+
+    def __init__(self):
+        self.base = None
+        self.started_tracemalloc = False
+
+    def is_tracing(self):
+        return self.base is not None
+
+    def start(self):
+        """Start counting allocations from now"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.base = take_snapshot()
+
+    def stop(self):
+        """Stop counting, and stop tracemalloc if this tracer started it"""
+        self.base = None
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def get_allocations(self):
+        """Get {module: bytes} allocated since tracing started and still held"""
+        return allocations_by_module(take_snapshot(), self.base)
+
+
+def trace_allocations(function):
+    """Call a function under tracemalloc; return its result and {module: bytes} still allocated"""
+    tracer = AllocationTracer()
+    tracer.start()
+    try:
+        result = function()
+        return result, tracer.get_allocations()
+    finally:
+        tracer.stop()
+
+def play_sessions(sessions, actions, policy='random', seed=0):
+    """Play bot sessions and return their games"""
+    games = []
+    for session_id in range(sessions):
+        rng = random.Random(f"{seed}:{session_id}")
+        session = BotSession(POLICIES[policy](rng), rng)
+        if actions:
+            session.play(actions)
+        # Keep only the game, as a server would
+        session.game.remove_listener(session.on_event)
+        games.append(session.game)
+    return games
+
+def format_bytes(size):
+    """Format a byte count with a readable unit"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def format_summary(summary, allocations=None, top=10):
+    """Format a summary from summarize_games, and optional allocations, as text"""
+    games = summary['games'] or 1
+    lines = [f"Games: {summary['games']}  Total: {format_bytes(summary['total'])}  "
+             f"Per game: {format_bytes(summary['mean'])}",
+             "By part (per game):"]
+    lines += [f"  {name:<20} {format_bytes(size / games):>10}" for name, size in summary['by_part'].items()]
+    lines.append("By type (per game):")
+    lines += [f"  {name:<20} {format_bytes(size / games):>10}"
+              for name, size in list(summary['by_type'].items())[:top]]
+    if allocations is not None:
+        lines.append("Allocated by module (per game):")
+        lines += [f"  {name:<32} {format_bytes(size / games):>10}"
+                  for name, size in list(allocations.items())[:top]]
+    return "\n".join(lines)
+
+def main():
+    """Measure the memory of bot sessions from the command line"""
+    parser = argparse.ArgumentParser(description="Measure Text RPG memory per session")
+    parser.add_argument('--sessions', type=int, default=1000, help="sessions to create")
+    parser.add_argument('--actions', type=int, default=100, help="bot actions played in each session")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random', help="how bots choose actions")
+    parser.add_argument('--seed', type=int, default=0, help="base random seed")
+    parser.add_argument('--trace', action='store_true', help="attribute allocations to modules with tracemalloc")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    def play():
+        return play_sessions(args.sessions, args.actions, args.policy, args.seed)
+
+    allocations = None
+    if args.trace:
+        games, allocations = trace_allocations(play)
+    else:
+        games = play()
+    summary = summarize_games(games)
+    if args.json:
+        print(json.dumps({**summary, 'allocations_by_module': allocations}, indent=2))
+    else:
+        print(format_summary(summary, allocations))
+
+if __name__ == '__main__':
+    main()
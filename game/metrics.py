@@ -0,0 +1,138 @@
+"""
+Metrics module - Counters and latency histograms in Prometheus text format
+
+Metrics are kept in plain dictionaries keyed by label values and only
+formatted when scraped, so recording one is a dictionary lookup and a few
+additions under a lock. That keeps them cheap enough to leave on in
+production.
+"""
+import bisect
+import threading
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Content type of the text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def format_labels(names, values, extra=()):
+    """Format label pairs as {name="value",...}"""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def format_value(value):
+    """Format a sample value"""
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class Counter:
+    """Monotonic count, one series per label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.series = {}  # {label values: count}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """Add to the count for some label values"""
+        with self.lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def samples(self):
+        """Get (name, labels, value) for every series"""
+        with self.lock:
+            series = list(self.series.items())
+        return [(self.name, format_labels(self.labels, values), count) for values, count in series]
+
+
+class Histogram:
+    """Distribution of observations in fixed buckets, one series per label values"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # {label values: [count per bucket..., count above all, sum]}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Record one observation for some label values"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        """Get (name, labels, value) for every bucket, sum and count"""
+        with self.lock:
+            series = [(values, list(counts)) for values, counts in self.series.items()]
+        samples = []
+        for values, counts in series:
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                total += count
+                samples.append((f"{self.name}_bucket", format_labels(self.labels, values, [('le', bound)]), total))
+            labels = format_labels(self.labels, values)
+            samples.append((f"{self.name}_sum", labels, counts[-1]))
+            samples.append((f"{self.name}_count", labels, total))
+        return samples
+
+
+class Observed:
+    """Metric whose value is read from a function when scraped"""
+
+    def __init__(self, name, help, function, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.kind = kind
+
+    def samples(self):
+        return [(self.name, '', self.function())]
+
+
+class Metrics:
+    """Registry of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        """Add a metric and return it"""
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def observed(self, name, help, function, kind='gauge'):
+        return self.register(Observed(name, help, function, kind))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
@@ -1,11 +1,13 @@
 """
 Player class - Represents the player character
 """
-from game.items import Weapon
+from game.items import Weapon, item_from_dict, item_from_snapshot, item_to_snapshot
 
 class Player:
     """Player character class"""
     
+    __slots__ = ('health', 'max_health', 'gold', 'inventory', 'equipped_weapon', 'is_vampire')
+    
     def __init__(self):
         self.health = 10
         self.max_health = 10
@@ -29,17 +31,14 @@ class Player:
     def add_item(self, item):
         """Add an item to inventory"""
         self.inventory.append(item)
-        print(f"Added {item.name} to inventory")
     
     def add_gold(self, amount):
         """Add gold to player"""
         self.gold += amount
-        print(f"Added {amount} gold")
     
     def equip_weapon(self, weapon):
         """Equip a weapon"""
         self.equipped_weapon = weapon
-        print(f"Equipped {weapon.name}")
     
     def get_attack_damage(self):
         """Get the player's attack damage"""
@@ -60,6 +59,41 @@ class Player:
         print(f"Equipped weapon: {self.equipped_weapon.name if self.equipped_weapon else 'None'}")
         print("====================\n")
     
+    def to_dict(self):
+        """Serialize the player to a snapshot dictionary"""
+        inventory = [item_to_snapshot(item) for item in self.inventory]
+        equipped = None
+        if self.equipped_weapon is not None:
+            # Refer to the inventory entry when possible to keep them linked
+            if self.equipped_weapon in self.inventory:
+                equipped = self.inventory.index(self.equipped_weapon)
+            else:
+                equipped = self.equipped_weapon.to_dict()
+        return {
+            'health': self.health,
+            'max_health': self.max_health,
+            'gold': self.gold,
+            'inventory': inventory,
+            'equipped_weapon': equipped,
+            'is_vampire': self.is_vampire
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Recreate a player from a snapshot dictionary"""
+        player = cls()
+        player.health = data['health']
+        player.max_health = data['max_health']
+        player.gold = data['gold']
+        player.inventory = [item_from_snapshot(item) for item in data['inventory']]
+        equipped = data['equipped_weapon']
+        if isinstance(equipped, int):
+            player.equipped_weapon = player.inventory[equipped]
+        elif equipped is not None:
+            player.equipped_weapon = item_from_dict(equipped)
+        player.is_vampire = data['is_vampire']
+        return player
+    
     def resurrect_as_vampire(self):
         """Resurrect player as a vampire"""
         self.is_vampire = True
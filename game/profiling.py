@@ -0,0 +1,110 @@
+"""
+Profiling module - Opt-in cProfile captures of individual requests
+
+Profiles are taken for requests that ask for one, for sessions an admin
+has flagged, and for one in every N requests when sampling is on. Each
+profile is written to the profile directory in the standard pstats
+format, so it can be downloaded and opened with pstats or snakeviz. Only
+the newest profiles are kept.
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+
+# Profile files end with this extension
+PROFILE_EXTENSION = '.prof'
+
+# Orders a profile's functions can be listed in
+PROFILE_SORTS = ('cumulative', 'tottime', 'ncalls')
+
+class ProfileStore:
+    """Captures profiles of chosen requests and keeps the newest on disk"""
+
+    def __init__(self, directory, sample_every=0, max_profiles=100):
+        self.directory = directory
+        self.sample_every = sample_every  # Profile 1 in N requests; 0 turns sampling off
+        self.max_profiles = max_profiles
+        self.sessions = set()  # Sessions profiled on every request
+        self.profiles = {}  # {profile_id: metadata}, oldest first
+        self.requests = 0
+        self.sequence = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Keep profiles from earlier runs until newer ones replace them
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(PROFILE_EXTENSION):
+                profile_id = name[:-len(PROFILE_EXTENSION)]
+                self.profiles[profile_id] = {'id': profile_id, 'created': os.path.getmtime(self.get_path(profile_id))}
+
+    def enable_session(self, session_id):
+        """Profile every request from a session"""
+        with self.lock:
+            self.sessions.add(session_id)
+
+    def disable_session(self, session_id):
+        """Stop profiling a session's requests"""
+        with self.lock:
+            self.sessions.discard(session_id)
+
+    def should_profile(self, session_id, requested=False):
+        """Check if a request should be profiled, counting it for sampling"""
+        with self.lock:
+            self.requests += 1
+            sampled = self.sample_every > 0 and self.requests % self.sample_every == 0
+            return requested or sampled or session_id in self.sessions
+
+    def profile(self, function, **metadata):
+        """Call a function under cProfile and save the profile with some metadata"""
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this thread
+            return function()
+        try:
+            return function()
+        finally:
+            profiler.disable()
+            self.save(profiler, duration=time.perf_counter() - start, **metadata)
+
+    def save(self, profiler, **metadata):
+        """Write a finished profile to disk and prune the oldest"""
+        with self.lock:
+            self.sequence += 1
+            profile_id = f"{int(time.time() * 1000)}-{os.getpid()}-{self.sequence}"
+            self.profiles[profile_id] = {'id': profile_id, 'created': time.time(), **metadata}
+            expired = list(self.profiles)[:-self.max_profiles] if self.max_profiles else []
+            for old_id in expired:
+                del self.profiles[old_id]
+        profiler.dump_stats(self.get_path(profile_id))
+        for old_id in expired:
+            try:
+                os.remove(self.get_path(old_id))
+            except FileNotFoundError:
+                pass
+        return profile_id
+
+    def list_profiles(self):
+        """Get the metadata of every stored profile, newest first"""
+        with self.lock:
+            return list(reversed(self.profiles.values()))
+
+    def get_path(self, profile_id):
+        """Get the file path of a profile"""
+        return os.path.join(self.directory, f"{profile_id}{PROFILE_EXTENSION}")
+
+    def has_profile(self, profile_id):
+        """Check if a profile is stored"""
+        with self.lock:
+            return profile_id in self.profiles
+
+    def format_profile(self, profile_id, limit=40, sort='cumulative'):
+        """Format a stored profile's top functions as text"""
+        output = io.StringIO()
+        stats = pstats.Stats(self.get_path(profile_id), stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
@@ -0,0 +1,49 @@
+"""
+Response Delta module - Encodes action responses as patches
+"""
+
+class ResponseDelta:
+    """Tracks the last response sent to a client and encodes the next one as a patch
+
+    Every encoded response carries a version number. A client that sends
+    back the version it last applied gets only the fields that changed
+    since then; any other client (new, reconnected or out of sync) gets
+    the full response with 'delta' set to False.
+
+    Patches have the form {'delta': True, 'version': v, 'set': {...},
+    'unset': [...]}. Nested dictionaries with unchanged keys, such as
+    'player', only contain their changed entries in 'set'; the client
+    merges them into its copy. Keys listed in 'unset' are removed before
+    'set' is applied.
+    """
+
+    __slots__ = ('version', 'state')
+
+    def __init__(self):
+        self.version = 0
+        self.state = None
+
+    def encode(self, response, client_version=None):
+        """Encode a response against the state the client already has"""
+        previous = self.state if client_version == self.version else None
+        self.version += 1
+        self.state = response
+
+        if previous is None:
+            return {'delta': False, 'version': self.version, **response}
+
+        changed = {}
+        removed = [key for key in previous if key not in response]
+        for key, value in response.items():
+            old_value = previous.get(key)
+            if key in previous and old_value == value:
+                continue
+            if isinstance(value, dict) and isinstance(old_value, dict):
+                if old_value.keys() == value.keys():
+                    changed[key] = {k: v for k, v in value.items() if old_value[k] != v}
+                    continue
+                # Replace the whole dictionary rather than merging into it
+                removed.append(key)
+            changed[key] = value
+
+        return {'delta': True, 'version': self.version, 'set': changed, 'unset': removed}
@@ -0,0 +1,71 @@
+"""
+RNG module - Per-game random number generators
+"""
+import hashlib
+import os
+import random
+
+class GameRandom:
+    """Counter-based random generator owned by a single game
+
+    Draw n is the BLAKE2b hash of n keyed by the seed, so the whole state
+    is the seed and a counter. It is cheap to store in snapshots, and no
+    two games share random state: a session replays identically, and
+    simulated sessions give the same results in any order or process.
+    Seeds are non-negative integers; by default one is picked at random.
+
+    The distribution methods are borrowed from random.Random rather than
+    inherited: subclassing it would give every game a Mersenne Twister
+    state it never uses, about 2.5 KB per session.
+    """
+
+    __slots__ = ('key', 'key_bytes', 'counter')
+
+    randrange = random.Random.randrange
+    randint = random.Random.randint
+    choice = random.Random.choice
+    choices = random.Random.choices
+    shuffle = random.Random.shuffle
+    sample = random.Random.sample
+    uniform = random.Random.uniform
+    _randbelow = random.Random._randbelow_with_getrandbits
+
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    def seed(self, a=None):
+        """Restart the generator at the beginning of a seed's stream"""
+        if a is None:
+            a = int.from_bytes(os.urandom(8), 'little')
+        if not isinstance(a, int) or a < 0:
+            raise ValueError("GameRandom seeds must be non-negative integers")
+        self.key = a
+        self.key_bytes = a.to_bytes(max(1, (a.bit_length() + 7) // 8), 'little')
+        self.counter = 0
+
+    def next_block(self):
+        """Get the next 64 random bits"""
+        self.counter += 1
+        digest = hashlib.blake2b(self.counter.to_bytes(8, 'little'), key=self.key_bytes, digest_size=8)
+        return int.from_bytes(digest.digest(), 'little')
+
+    def getrandbits(self, k):
+        """Get an integer with k random bits"""
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        value = 0
+        for shift in range(0, k, 64):
+            value |= self.next_block() << shift
+        return value & ((1 << k) - 1)
+
+    def random(self):
+        """Get a random float in [0.0, 1.0)"""
+        return (self.next_block() >> 11) * (1.0 / (1 << 53))
+
+    def getstate(self):
+        return (self.key, self.counter)
+
+    def setstate(self, state):
+        key, counter = state
+        self.seed(key)
+        self.counter = counter
@@ -0,0 +1,202 @@
+"""
+Session Store module - Keeps active games in memory with bounded size
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+def prepare_spill_dir(path):
+    """Create a spill directory only this process's user can use
+
+    Spilled games are unpickled, so anyone who can write to the directory
+    could run code as the server. A directory owned by another user is
+    refused; one of ours is made private.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.stat(path)
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"spill directory {path} is owned by another user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+class SessionStore:
+    """Dictionary-like store of games keyed by session id
+
+    Games are kept in least-recently-used order. When the store holds more
+    than max_sessions games, exceeds max_bytes, or a game has been idle for
+    longer than idle_ttl seconds, the game is evicted. Sessions never time
+    out, so evicted games are spilled to spill_dir and transparently
+    restored the next time their session is looked up.
+    """
+
+    def __init__(self, max_sessions=10000, max_bytes=None, idle_ttl=None, spill_dir=None):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.spill_dir = spill_dir
+        self.games = OrderedDict()  # {session_id: (game, size, last_access)}
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.restores = 0
+        if spill_dir:
+            prepare_spill_dir(spill_dir)
+
+    def __len__(self):
+        """Number of games resident in memory"""
+        return len(self.games)
+
+    def __contains__(self, session_id):
+        with self.lock:
+            return session_id in self.games or self.is_spilled(session_id)
+
+    def __getitem__(self, session_id):
+        game = self.get(session_id)
+        if game is None:
+            raise KeyError(session_id)
+        return game
+
+    def __setitem__(self, session_id, game):
+        self.put(session_id, game)
+
+    def __delitem__(self, session_id):
+        with self.lock:
+            found = self.discard(session_id)
+        if not found:
+            raise KeyError(session_id)
+
+    def session_ids(self):
+        """Get the IDs of games resident in memory"""
+        with self.lock:
+            return list(self.games)
+
+    def resident_games(self):
+        """Get the games resident in memory, without counting lookups"""
+        with self.lock:
+            return [entry[0] for entry in self.games.values()]
+
+    def get(self, session_id, default=None):
+        """Get a game, restoring it from disk if it was evicted"""
+        with self.lock:
+            entry = self.games.get(session_id)
+            if entry is not None:
+                self.hits += 1
+                self.games[session_id] = (entry[0], entry[1], time.monotonic())
+                self.games.move_to_end(session_id)
+                self.evict_expired()
+                return entry[0]
+
+            self.misses += 1
+            game = self.restore(session_id)
+            if game is None:
+                return default
+            self.restores += 1
+            self.put(session_id, game)
+            return game
+
+    def put(self, session_id, game):
+        """Store a game and evict others if the store is over budget"""
+        with self.lock:
+            old_entry = self.games.pop(session_id, None)
+            if old_entry is not None:
+                self.total_bytes -= old_entry[1]
+            size = self.estimate_size(game) if self.max_bytes else 0
+            self.games[session_id] = (game, size, time.monotonic())
+            self.total_bytes += size
+            self.remove_spill_file(session_id)
+            self.evict_expired()
+            self.evict_over_budget()
+
+    def discard(self, session_id):
+        """Remove a game from memory and disk; return True if it existed"""
+        with self.lock:
+            entry = self.games.pop(session_id, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+            spilled = self.remove_spill_file(session_id)
+            return entry is not None or spilled
+
+    def estimate_size(self, game):
+        """Estimate the memory cost of a game by its pickled size"""
+        return len(pickle.dumps(game, pickle.HIGHEST_PROTOCOL))
+
+    def evict_expired(self):
+        """Evict games that have been idle for longer than idle_ttl"""
+        if self.idle_ttl is None:
+            return
+        cutoff = time.monotonic() - self.idle_ttl
+        while self.games:
+            session_id, (game, size, last_access) = next(iter(self.games.items()))
+            if last_access > cutoff:
+                break
+            self.evict(session_id)
+
+    def evict_over_budget(self):
+        """Evict least recently used games until the store is within budget"""
+        while len(self.games) > 1 and (
+            len(self.games) > self.max_sessions
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            self.evict(next(iter(self.games)))
+
+    def evict(self, session_id):
+        """Move a game out of memory, spilling it to disk if configured"""
+        game, size, last_access = self.games.pop(session_id)
+        self.total_bytes -= size
+        self.evictions += 1
+        if self.spill_dir:
+            path = self.get_spill_path(session_id)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as spill_file:
+                pickle.dump(game, spill_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+
+    def restore(self, session_id):
+        """Load a spilled game from disk, or None if there is none"""
+        if not self.spill_dir:
+            return None
+        path = self.get_spill_path(session_id)
+        try:
+            with open(path, "rb") as spill_file:
+                return pickle.load(spill_file)
+        except FileNotFoundError:
+            return None
+
+    def is_spilled(self, session_id):
+        """Check if a game for this session is spilled to disk"""
+        return bool(self.spill_dir) and os.path.exists(self.get_spill_path(session_id))
+
+    def remove_spill_file(self, session_id):
+        """Delete a session's spill file; return True if one existed"""
+        if not self.spill_dir:
+            return False
+        try:
+            os.remove(self.get_spill_path(session_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_spill_path(self, session_id):
+        """Get the spill file path for a session"""
+        # Hash the session id so it is always a safe file name
+        name = hashlib.sha256(str(session_id).encode()).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.pickle")
+
+    def get_stats(self):
+        """Get counters describing store usage"""
+        with self.lock:
+            return {
+                'resident': len(self.games),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'restores': self.restores
+            }
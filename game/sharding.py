@@ -0,0 +1,53 @@
+"""
+Sharding module - Maps session IDs to worker processes
+"""
+import bisect
+import hashlib
+
+def hash_key(key):
+    """Hash a key to a stable 64-bit integer (same in every process)"""
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), "big")
+
+class HashRing:
+    """Consistent hash ring assigning session IDs to workers
+
+    Each worker is placed on the ring many times (replicas) so sessions
+    spread evenly. When a worker is added or removed only the sessions
+    next to its points move, roughly 1/N of all sessions, and every other
+    session stays with the worker that already holds its game.
+    """
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self.points = []  # Sorted hashes
+        self.owners = {}  # {hash: node}
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self):
+        """Nodes on the ring, in sorted order"""
+        return sorted(set(self.owners.values()))
+
+    def add_node(self, node):
+        """Place a node on the ring"""
+        for replica in range(self.replicas):
+            point = hash_key(f"{node}#{replica}")
+            if point not in self.owners:
+                bisect.insort(self.points, point)
+            self.owners[point] = node
+
+    def remove_node(self, node):
+        """Take a node off the ring"""
+        for replica in range(self.replicas):
+            point = hash_key(f"{node}#{replica}")
+            if self.owners.get(point) == node:
+                del self.owners[point]
+                self.points.pop(bisect.bisect_left(self.points, point))
+
+    def get_node(self, key):
+        """Get the node that owns a key, or None if the ring is empty"""
+        if not self.points:
+            return None
+        index = bisect.bisect(self.points, hash_key(key)) % len(self.points)
+        return self.owners[self.points[index]]
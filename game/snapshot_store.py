@@ -0,0 +1,210 @@
+"""
+Snapshot Store module - Persists game snapshots and action logs to SQLite
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from game.game_manager import GameManager
+
+logger = logging.getLogger(__name__)
+
+# Seconds a write waits for another process (e.g. another serve.py worker)
+# to release the database before failing with "database is locked"
+BUSY_TIMEOUT = 30.0
+
+class SnapshotStore:
+    """Saves game snapshots and per-session action logs to a local SQLite database
+
+    Writes are write-behind: save() serializes the game and queues the
+    snapshot in memory, and a background thread writes all queued
+    snapshots in a single transaction every flush_interval seconds (or as
+    soon as max_batch sessions are waiting). Several saves of the same
+    session between flushes only write the latest snapshot. Callers never
+    wait for the disk.
+
+    append() logs one action under its sequence number. Log entries are
+    queued the same way and written in the same transaction as the
+    snapshots, so a stored snapshot never gets ahead of the log. A game
+    is recovered by loading its snapshot and replaying the entries logged
+    after the snapshot's 'log_seq'. Entries up to that position can never
+    be replayed again, so they are deleted in the transaction that writes
+    the snapshot.
+
+    A flush that fails puts its batch back in the queue, so nothing is
+    lost and the writer retries on its next round.
+    """
+
+    def __init__(self, path, flush_interval=1.0, max_batch=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending = {}  # {session_id: (snapshot json, log_seq)}
+        self.flushing = {}  # Batch currently being written
+        self.pending_actions = []  # [(session_id, seq, action json)]
+        self.flushing_actions = []
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        self.writes = 0
+        self.flushes = 0
+
+        self.connection = self.connect()
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "session_id TEXT PRIMARY KEY, "
+                "snapshot TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS actions ("
+                "session_id TEXT NOT NULL, "
+                "seq INTEGER NOT NULL, "
+                "action TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+            )
+        self.read_connection = self.connect()
+        self.read_lock = threading.Lock()
+
+        self.writer = threading.Thread(target=self.run_writer, name="snapshot-writer", daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        """Open a connection tuned for many small writes"""
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL never corrupts the database; at most
+        # the last flush is lost if the machine loses power
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def save(self, session_id, game):
+        """Queue a snapshot of the game to be written"""
+        snapshot = json.dumps(game.to_dict(), separators=(',', ':'))
+        with self.lock:
+            self.pending[session_id] = (snapshot, game.log_seq)
+            if len(self.pending) >= self.max_batch:
+                self.wake.set()
+
+    def load(self, session_id):
+        """Load a game from its latest snapshot, or None if there is none"""
+        with self.lock:
+            queued = self.pending.get(session_id) or self.flushing.get(session_id)
+        if queued is not None:
+            snapshot = queued[0]
+        else:
+            with self.read_lock:
+                row = self.read_connection.execute(
+                    "SELECT snapshot FROM snapshots WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            snapshot = row[0]
+        return GameManager.from_dict(json.loads(snapshot))
+
+    def append(self, session_id, seq, action):
+        """Queue an action to be added to a session's log"""
+        entry = json.dumps(action, separators=(',', ':'))
+        with self.lock:
+            self.pending_actions.append((session_id, seq, entry))
+            if len(self.pending_actions) >= self.max_batch:
+                self.wake.set()
+
+    def load_actions(self, session_id, after_seq=0):
+        """Get the logged actions after a sequence number as (seq, action) pairs"""
+        # Read the queue first: entries leave it only once they are committed
+        with self.lock:
+            queued = [(seq, action) for entry_session, seq, action in self.flushing_actions + self.pending_actions
+                      if entry_session == session_id and seq > after_seq]
+        with self.read_lock:
+            rows = self.read_connection.execute(
+                "SELECT seq, action FROM actions WHERE session_id = ? AND seq > ?",
+                (session_id, after_seq)
+            ).fetchall()
+        entries = dict(rows)
+        entries.update(queued)
+        return [(seq, json.loads(entries[seq])) for seq in sorted(entries)]
+
+    def delete(self, session_id):
+        """Remove a session's snapshot and action log"""
+        with self.write_lock:
+            with self.lock:
+                self.pending.pop(session_id, None)
+                self.pending_actions = [entry for entry in self.pending_actions if entry[0] != session_id]
+            with self.connection:
+                self.connection.execute("DELETE FROM snapshots WHERE session_id = ?", (session_id,))
+                self.connection.execute("DELETE FROM actions WHERE session_id = ?", (session_id,))
+
+    def flush(self):
+        """Write all queued snapshots and log entries in one transaction"""
+        with self.write_lock:
+            with self.lock:
+                if not self.pending and not self.pending_actions:
+                    return 0
+                batch = self.pending
+                actions = self.pending_actions
+                self.pending = {}
+                self.pending_actions = []
+                # Keep the batch readable until it is committed
+                self.flushing = batch
+                self.flushing_actions = actions
+            now = time.time()
+            committed = False
+            try:
+                with self.connection:
+                    self.connection.executemany(
+                        "INSERT OR REPLACE INTO actions (session_id, seq, action) VALUES (?, ?, ?)",
+                        actions
+                    )
+                    self.connection.executemany(
+                        "INSERT OR REPLACE INTO snapshots (session_id, snapshot, updated_at) VALUES (?, ?, ?)",
+                        [(session_id, snapshot, now) for session_id, (snapshot, _) in batch.items()]
+                    )
+                    # The log before a snapshot is no longer needed to recover its game
+                    self.connection.executemany(
+                        "DELETE FROM actions WHERE session_id = ? AND seq <= ?",
+                        [(session_id, log_seq) for session_id, (_, log_seq) in batch.items() if log_seq]
+                    )
+                committed = True
+            finally:
+                with self.lock:
+                    if not committed:
+                        # Requeue the batch behind anything saved since it was taken
+                        self.pending = {**batch, **self.pending}
+                        self.pending_actions = actions + self.pending_actions
+                    self.flushing = {}
+                    self.flushing_actions = []
+            self.writes += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def run_writer(self):
+        """Background loop that flushes queued snapshots"""
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # The batch was requeued; keep the writer alive to retry it
+                logger.exception("Writing snapshots failed; retrying")
+
+    def close(self):
+        """Flush remaining snapshots and stop the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        self.wake.set()
+        self.writer.join()
+        self.flush()
+        self.connection.close()
+        self.read_connection.close()
+
+    def __len__(self):
+        """Number of sessions with a stored or queued snapshot"""
+        self.flush()
+        with self.read_lock:
+            return self.read_connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
@@ -1,17 +1,39 @@
 """
 Time System module - Manages the day/night cycle
 """
+import heapq
+
+# Actions between day/night changes
+DAY_LENGTH = 5
+
+# Times of day
+DAY = 0
+NIGHT = 1
+
+# Effects run whenever each time of day begins, indexed by time
+DEFAULT_PHASE_EFFECTS = (('sun_damage',), ())
 
 class TimeSystem:
-    """Manages the day/night cycle"""
+    """Manages the day/night cycle and schedules timed effects
+    
+    Effects are named handlers (see game.effects) that fire at a future
+    action tick, optionally repeating, or whenever a time of day begins.
+    Timers are kept in a heap ordered by due tick, so each action only
+    touches the effects that are due. The day/night cycle itself is a
+    repeating timer.
+    """
     
-    def __init__(self):
+    __slots__ = ('time', 'timers', 'phase_effects')
+    
+    def __init__(self, tick=0):
         self.time = 0  # 0 = day, 1 = night
+        self.timers = []  # Heap of (due tick, effect, period or 0)
+        self.phase_effects = DEFAULT_PHASE_EFFECTS
+        self.schedule('advance_time', (tick // DAY_LENGTH + 1) * DAY_LENGTH, DAY_LENGTH)
         
     def advance_time(self):
         """Advance time to next day/night cycle"""
         self.time = (self.time + 1) % 2
-        print(f"Time has changed to {self.get_time_of_day()}")
         
     def get_time_of_day(self):
         """Get the current time of day"""
@@ -19,4 +41,59 @@ class TimeSystem:
     
     def is_daytime(self):
         """Check if it's currently daytime"""
-        return self.time == 0
\ No newline at end of file
+        return self.time == 0
+    
+    def schedule(self, effect, tick, period=0):
+        """Fire an effect at an action tick, then every period ticks if given"""
+        heapq.heappush(self.timers, (tick, effect, period))
+    
+    def at_phase(self, effect, time):
+        """Fire an effect whenever a time of day begins"""
+        phase_effects = list(self.phase_effects)
+        phase_effects[time] += (effect,)
+        # Tuples let untouched games share the default effects
+        self.phase_effects = tuple(phase_effects)
+    
+    def cancel(self, effect):
+        """Remove every timer and time of day trigger for an effect"""
+        self.timers = [timer for timer in self.timers if timer[1] != effect]
+        heapq.heapify(self.timers)
+        self.phase_effects = tuple(tuple(name for name in names if name != effect)
+                                   for names in self.phase_effects)
+    
+    def pop_due(self, tick):
+        """Yield the effects due by an action tick, rescheduling repeating ones"""
+        timers = self.timers
+        while timers and timers[0][0] <= tick:
+            due, effect, period = heapq.heappop(timers)
+            if period:
+                # Missed repeats are skipped rather than fired in a burst
+                heapq.heappush(timers, (due + period * ((tick - due) // period + 1), effect, period))
+            yield effect
+    
+    def get_phase_effects(self):
+        """Get the effects that fire as the current time of day begins"""
+        return self.phase_effects[self.time]
+    
+    def to_dict(self):
+        """Serialize the time system to a snapshot dictionary"""
+        return {
+            'time': self.time,
+            'timers': [list(timer) for timer in self.timers],
+            'phase_effects': [list(names) for names in self.phase_effects]
+        }
+    
+    @classmethod
+    def from_dict(cls, data, tick=0):
+        """Recreate a time system from a snapshot dictionary
+        
+        Snapshots from before timers were saved get the default timers,
+        scheduled from the given action tick.
+        """
+        time_system = cls(tick)
+        time_system.time = data['time']
+        if 'timers' in data:
+            time_system.timers = [tuple(timer) for timer in data['timers']]
+            heapq.heapify(time_system.timers)
+            time_system.phase_effects = tuple(tuple(names) for names in data['phase_effects'])
+        return time_system
\ No newline at end of file
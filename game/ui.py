@@ -4,6 +4,18 @@ UI module - Handles the user interface and display
 import os
 import time
 
+# Console text for the events emitted by GameManager
+EVENT_MESSAGES = {
+    'gold_added': "Added {amount} gold",
+    'item_added': "Added {item} to inventory",
+    'weapon_equipped': "Equipped {weapon}",
+    'time_changed': "Time has changed to {time}",
+    'sun_damage': "You take {damage} sun damage as a vampire!",
+    'invalid_death_choice': "Invalid choice. Defaulting to option 1.",
+    'player_reborn': "You've been reborn. All progress lost.",
+    'player_resurrected': "You've been resurrected as a vampire!"
+}
+
 class UI:
     """Handles the user interface and display"""
     
@@ -88,4 +100,16 @@ class UI:
         
         print(f"\nGold: {player.gold}")
         print(f"Equipped weapon: {player.equipped_weapon.name if player.equipped_weapon else 'None'}")
-        print()
\ No newline at end of file
+        print()
+    
+    @staticmethod
+    def render_event(name, data):
+        """Print a game event to the console"""
+        if name == 'player_died':
+            print("\n===== YOU DIED =====")
+            print("Choose your fate:")
+            UI.print_options(data['options'])
+            return
+        message = EVENT_MESSAGES.get(name)
+        if message:
+            print(message.format(**data))
\ No newline at end of file
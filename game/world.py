@@ -1,8 +1,10 @@
 """
 World module - Manages the game world and map
 """
+import hashlib
 import random
 from enum import Enum
+from game.rng import GameRandom
 
 class WorldType(Enum):
     EARTH = "Earth"
@@ -27,14 +29,78 @@ class MajorEventType(Enum):
     ANCIENT_PORTAL = "ancient_portal"
     BOSS_ENEMY = "boss_enemy"
 
+# Compact cell codes used by WorldMap storage (EMPTY must be code 0)
+CELL_TYPES = tuple(CellType)
+CELL_CODES = {cell_type: code for code, cell_type in enumerate(CELL_TYPES)}
+
+# Default width and height of a world map
+MAP_SIZE = 50
+
+# Maps larger than this are generated chunk by chunk around the player
+CHUNKED_MAP_THRESHOLD = 256
+
+# Width and height of a ChunkedWorldMap chunk
+CHUNK_SIZE = 16
+
+# Major events stay this many cells away from the map edges
+EDGE_MARGIN = 5
+
+# Major event distributions by world type
+REALM_MAJOR_EVENTS = {
+    WorldType.EARTH: [MajorEventType.BOSS_ENEMY, MajorEventType.TREASURE_VAULT, MajorEventType.MASTER_MERCHANT],
+    WorldType.HEAVENLY_MOUNTAINS: [MajorEventType.DRAGON, MajorEventType.ANCIENT_PORTAL, MajorEventType.TREASURE_VAULT],
+    WorldType.STONE_CAVERNS: [MajorEventType.BOSS_ENEMY, MajorEventType.TREASURE_VAULT, MajorEventType.DRAGON],
+    WorldType.FUTURE_CITY: [MajorEventType.MASTER_MERCHANT, MajorEventType.ANCIENT_PORTAL, MajorEventType.BOSS_ENEMY],
+    WorldType.PREHISTORIC_JUNGLE: [MajorEventType.DRAGON, MajorEventType.BOSS_ENEMY, MajorEventType.TREASURE_VAULT],
+    WorldType.ATLANTIS: [MajorEventType.ANCIENT_PORTAL, MajorEventType.TREASURE_VAULT, MajorEventType.DRAGON]
+}
+
+# Chance that an empty cell holds a random enemy encounter
+ENCOUNTER_CHANCE = 0.25
+
+# How many steps away a major event can be hinted at
+HINT_RADIUS = 2
+
+# (dx, dy) step for each movement direction
+DIRECTION_OFFSETS = {
+    "north": (0, -1),
+    "east": (1, 0),
+    "south": (0, 1),
+    "west": (-1, 0)
+}
+
+MAJOR_EVENT_HINTS = {
+    MajorEventType.DRAGON: "ancient power stirs",
+    MajorEventType.TREASURE_VAULT: "great riches await",
+    MajorEventType.MASTER_MERCHANT: "legendary trader nearby",
+    MajorEventType.ANCIENT_PORTAL: "otherworldly energy pulses",
+    MajorEventType.BOSS_ENEMY: "terrible danger approaches"
+}
+
+def derive_map_seed(seed, world_type):
+    """Derive the generation seed for one world map from the world seed"""
+    return f"{seed}:{world_type.name}"
+
+def derive_cell_roll(seed, world_type, x, y):
+    """Derive a stable roll in [0, 1) for a cell from (seed, realm, x, y)"""
+    key = f"{seed}:{world_type.name}:{x}:{y}".encode()
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
 class WorldMap:
     """Represents a single world map"""
     
-    def __init__(self, world_type, size=50):
+    def __init__(self, world_type, size=MAP_SIZE, seed=None, hint_radius=HINT_RADIUS):
         self.world_type = world_type
         self.size = size
-        self.grid = [[CellType.EMPTY for _ in range(size)] for _ in range(size)]
+        self.seed = seed
+        self.hint_radius = hint_radius
+        # Cell codes indexed by x * size + y; only allocated once a cell
+        # holds something other than CellType.EMPTY
+        self.cells = None
         self.major_events = {}  # {(x, y): MajorEventType}
+        # {(x, y): {direction: (distance, MajorEventType)}}, built on first use
+        self.hint_index = None
         self.generate_map()
     
     def generate_map(self):
@@ -43,33 +109,27 @@ class WorldMap:
         if self.size < 12:
             return
             
-        # Generate 5-10 major events per world
-        num_events = random.randint(5, 10)
+        # Same seed always yields the same major events
+        rng = random.Random(self.seed)
         
-        # Major event distributions by world type
-        event_weights = {
-            WorldType.EARTH: [MajorEventType.BOSS_ENEMY, MajorEventType.TREASURE_VAULT, MajorEventType.MASTER_MERCHANT],
-            WorldType.HEAVENLY_MOUNTAINS: [MajorEventType.DRAGON, MajorEventType.ANCIENT_PORTAL, MajorEventType.TREASURE_VAULT],
-            WorldType.STONE_CAVERNS: [MajorEventType.BOSS_ENEMY, MajorEventType.TREASURE_VAULT, MajorEventType.DRAGON],
-            WorldType.FUTURE_CITY: [MajorEventType.MASTER_MERCHANT, MajorEventType.ANCIENT_PORTAL, MajorEventType.BOSS_ENEMY],
-            WorldType.PREHISTORIC_JUNGLE: [MajorEventType.DRAGON, MajorEventType.BOSS_ENEMY, MajorEventType.TREASURE_VAULT],
-            WorldType.ATLANTIS: [MajorEventType.ANCIENT_PORTAL, MajorEventType.TREASURE_VAULT, MajorEventType.DRAGON]
-        }
+        # Generate 5-10 major events per world, or as many as fit away from the edges
+        span = self.size - 2 * EDGE_MARGIN
+        num_events = min(rng.randint(5, 10), span * span)
         
-        available_events = event_weights[self.world_type]
+        available_events = REALM_MAJOR_EVENTS[self.world_type]
         
         # Place major events randomly across the map
         for _ in range(num_events):
             # Find empty location
             while True:
-                x = random.randint(5, self.size-6)  # Keep away from edges
-                y = random.randint(5, self.size-6)
+                x = rng.randint(EDGE_MARGIN, self.size-EDGE_MARGIN-1)  # Keep away from edges
+                y = rng.randint(EDGE_MARGIN, self.size-EDGE_MARGIN-1)
                 if (x, y) not in self.major_events:
                     break
             
             # Choose random major event type
-            event_type = random.choice(available_events)
-            self.major_events[(x, y)] = event_type
+            event_type = rng.choice(available_events)
+            self.add_major_event(x, y, event_type)
     
     def get_cell(self, x, y):
         """Get the content of a cell"""
@@ -77,31 +137,282 @@ class WorldMap:
             # Check for major events first
             if (x, y) in self.major_events:
                 return self.major_events[(x, y)]
-            return self.grid[x][y]
+            if self.cells is None:
+                return CellType.EMPTY
+            return CELL_TYPES[self.cells[x * self.size + y]]
         return None
     
+    def set_cell(self, x, y, cell_type):
+        """Set the content of a cell"""
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        if self.cells is None:
+            if cell_type == CellType.EMPTY:
+                return True
+            self.cells = bytearray(self.size * self.size)
+        self.cells[x * self.size + y] = CELL_CODES[cell_type]
+        return True
+    
     def has_major_event_at(self, x, y):
         """Check if there's a major event at coordinates"""
         return (x, y) in self.major_events
+    
+    def add_major_event(self, x, y, event_type):
+        """Place a major event on the map"""
+        self.major_events[(x, y)] = event_type
+        self.hint_index = None
+    
+    def remove_major_event(self, x, y):
+        """Remove a major event from the map"""
+        event_type = self.major_events.pop((x, y), None)
+        self.hint_index = None
+        return event_type
+    
+    def build_hint_index(self):
+        """Precompute which major events can be hinted at from each cell"""
+        index = {}
+        for (event_x, event_y), event_type in self.major_events.items():
+            for distance in range(1, self.hint_radius + 1):
+                for direction, (dx, dy) in DIRECTION_OFFSETS.items():
+                    # Position from which this event lies `distance` steps in `direction`
+                    x = event_x - dx * distance
+                    y = event_y - dy * distance
+                    if not (0 <= x < self.size and 0 <= y < self.size):
+                        continue
+                    hints = index.setdefault((x, y), {})
+                    nearest = hints.get(direction)
+                    if nearest is None or distance < nearest[0]:
+                        hints[direction] = (distance, event_type)
+        self.hint_index = index
+    
+    def load_around(self, x, y):
+        """Prepare the map around the player; the whole map is always resident"""
+        pass
+    
+    def to_dict(self):
+        """Serialize map changes to a snapshot dictionary"""
+        cells = []
+        if self.cells is not None:
+            for index, code in enumerate(self.cells):
+                if code:
+                    cells.append([index // self.size, index % self.size, code])
+        major_events = [[x, y, event_type.value] for (x, y), event_type in self.major_events.items()]
+        return {'cells': cells, 'major_events': major_events}
+    
+    def load_dict(self, data):
+        """Apply map changes from a snapshot dictionary"""
+        for x, y, code in data['cells']:
+            self.set_cell(x, y, CELL_TYPES[code])
+        self.major_events = {}
+        for x, y, value in data['major_events']:
+            self.add_major_event(x, y, MajorEventType(value))
+    
+    def get_hints_at(self, x, y):
+        """Get the nearest major event in each direction from (x, y)"""
+        if self.hint_index is None:
+            self.build_hint_index()
+        return self.hint_index.get((x, y), {})
+
+class ChunkedWorldMap(WorldMap):
+    """World map for very large realms, generated in chunks around the player
+    
+    Major events for a chunk are derived from (seed, chunk_x, chunk_y), so a
+    chunk that was evicted is regenerated identically when the player comes
+    back. Only changes made during play (cell overrides and removed events)
+    are kept for the whole map.
+    """
+    
+    def __init__(self, world_type, size=MAP_SIZE, seed=None, hint_radius=HINT_RADIUS,
+                 chunk_size=CHUNK_SIZE, keep_radius=2):
+        self.chunk_size = chunk_size
+        # Chunks further than this (in chunks) from the player are evicted
+        self.keep_radius = keep_radius
+        self.chunks = {}  # {(chunk_x, chunk_y): [(x, y), ...]}
+        self.cell_overrides = {}  # {(x, y): CellType}
+        self.removed_events = set()
+        if seed is None:
+            seed = random.getrandbits(64)
+        super().__init__(world_type, size, seed, hint_radius)
+    
+    def generate_map(self):
+        """Chunks are generated on demand, so nothing is generated up front"""
+        pass
+    
+    def get_chunk_key(self, x, y):
+        """Get the key of the chunk containing (x, y)"""
+        return (x // self.chunk_size, y // self.chunk_size)
+    
+    def generate_chunk(self, chunk_key):
+        """Generate the major events of a single chunk"""
+        chunk_x, chunk_y = chunk_key
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        available_events = REALM_MAJOR_EVENTS[self.world_type]
+        positions = []
+        
+        # 0-2 major events per chunk, roughly the density of a 50x50 map
+        for _ in range(rng.randint(0, 2)):
+            x = chunk_x * self.chunk_size + rng.randrange(self.chunk_size)
+            y = chunk_y * self.chunk_size + rng.randrange(self.chunk_size)
+            event_type = rng.choice(available_events)
+            if not (EDGE_MARGIN <= x < self.size - EDGE_MARGIN and EDGE_MARGIN <= y < self.size - EDGE_MARGIN):
+                continue
+            if (x, y) in self.removed_events or (x, y) in self.major_events:
+                continue
+            self.major_events[(x, y)] = event_type
+            positions.append((x, y))
+        
+        self.chunks[chunk_key] = positions
+        self.hint_index = None
+    
+    def ensure_chunk(self, x, y):
+        """Make sure the chunk containing (x, y) is generated"""
+        chunk_key = self.get_chunk_key(x, y)
+        if chunk_key not in self.chunks:
+            self.generate_chunk(chunk_key)
+    
+    def load_around(self, x, y):
+        """Generate chunks next to (x, y) and evict chunks that are far away"""
+        center_x, center_y = self.get_chunk_key(x, y)
+        max_chunk = (self.size - 1) // self.chunk_size
+        
+        for chunk_x in range(max(0, center_x - 1), min(max_chunk, center_x + 1) + 1):
+            for chunk_y in range(max(0, center_y - 1), min(max_chunk, center_y + 1) + 1):
+                if (chunk_x, chunk_y) not in self.chunks:
+                    self.generate_chunk((chunk_x, chunk_y))
+        
+        for chunk_key in list(self.chunks):
+            if max(abs(chunk_key[0] - center_x), abs(chunk_key[1] - center_y)) > self.keep_radius:
+                self.evict_chunk(chunk_key)
+    
+    def evict_chunk(self, chunk_key):
+        """Drop a generated chunk; it is regenerated if the player returns"""
+        for position in self.chunks.pop(chunk_key, ()):
+            self.major_events.pop(position, None)
+        self.hint_index = None
+    
+    def get_cell(self, x, y):
+        """Get the content of a cell"""
+        if 0 <= x < self.size and 0 <= y < self.size:
+            self.ensure_chunk(x, y)
+            if (x, y) in self.major_events:
+                return self.major_events[(x, y)]
+            return self.cell_overrides.get((x, y), CellType.EMPTY)
+        return None
+    
+    def set_cell(self, x, y, cell_type):
+        """Set the content of a cell"""
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        if cell_type == CellType.EMPTY:
+            self.cell_overrides.pop((x, y), None)
+        else:
+            self.cell_overrides[(x, y)] = cell_type
+        return True
+    
+    def has_major_event_at(self, x, y):
+        """Check if there's a major event at coordinates"""
+        if 0 <= x < self.size and 0 <= y < self.size:
+            self.ensure_chunk(x, y)
+        return (x, y) in self.major_events
+    
+    def remove_major_event(self, x, y):
+        """Remove a major event so it stays gone after chunk eviction"""
+        self.removed_events.add((x, y))
+        return super().remove_major_event(x, y)
+    
+    def to_dict(self):
+        """Serialize map changes to a snapshot dictionary"""
+        # Generated chunks are derived from the seed, so only changes are saved
+        cells = [[x, y, CELL_CODES[cell_type]] for (x, y), cell_type in self.cell_overrides.items()]
+        return {'cells': cells, 'removed_events': [list(position) for position in self.removed_events]}
+    
+    def load_dict(self, data):
+        """Apply map changes from a snapshot dictionary"""
+        for x, y, code in data['cells']:
+            self.set_cell(x, y, CELL_TYPES[code])
+        for x, y in data['removed_events']:
+            self.remove_major_event(x, y)
+    
+    def get_hints_at(self, x, y):
+        """Get the nearest major event in each direction from (x, y)"""
+        for dx, dy in DIRECTION_OFFSETS.values():
+            for distance in range(1, self.hint_radius + 1):
+                hint_x = x + dx * distance
+                hint_y = y + dy * distance
+                if 0 <= hint_x < self.size and 0 <= hint_y < self.size:
+                    self.ensure_chunk(hint_x, hint_y)
+        return super().get_hints_at(x, y)
+
+def create_world_map(world_type, size=MAP_SIZE, seed=None):
+    """Create a world map, using chunked generation for very large sizes"""
+    if size > CHUNKED_MAP_THRESHOLD:
+        return ChunkedWorldMap(world_type, size, seed)
+    return WorldMap(world_type, size, seed)
 
 class World:
     """Manages the game world and map system"""
     
-    def __init__(self):
+    def __init__(self, seed=None, map_size=MAP_SIZE, rng=None):
+        # Random rolls during play come from the owning game's generator
+        self.rng = rng if rng is not None else GameRandom()
+        if seed is None:
+            seed = self.rng.getrandbits(64)
+        self.seed = seed
+        self.map_size = map_size
         self.maps = {}
         self.current_world = WorldType.EARTH
-        self.player_x = 25  # Start in center of map
-        self.player_y = 25
-        self.generate_all_worlds()
+        self.player_x = map_size // 2  # Start in center of map
+        self.player_y = map_size // 2
         
     def generate_all_worlds(self):
-        """Generate all world maps at game start"""
+        """Generate every world map that has not been generated yet"""
         for world_type in WorldType:
-            self.maps[world_type] = WorldMap(world_type)
+            self.get_map(world_type)
+    
+    def get_map(self, world_type):
+        """Get a world map, generating it on first access"""
+        world_map = self.maps.get(world_type)
+        if world_map is None:
+            world_map = create_world_map(world_type, self.map_size, derive_map_seed(self.seed, world_type))
+            self.maps[world_type] = world_map
+        return world_map
+    
+    def is_world_loaded(self, world_type):
+        """Check if a world map has already been generated"""
+        return world_type in self.maps
+    
+    def get_loaded_worlds(self):
+        """Get the list of world types whose maps have been generated"""
+        return list(self.maps)
+    
+    def to_dict(self):
+        """Serialize the world to a snapshot dictionary"""
+        # Maps are regenerated from the seed; only realms that were visited
+        # are saved, along with their changes
+        return {
+            'seed': self.seed,
+            'map_size': self.map_size,
+            'current_world': self.current_world.name,
+            'player_x': self.player_x,
+            'player_y': self.player_y,
+            'maps': {world_type.name: world_map.to_dict() for world_type, world_map in self.maps.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data, rng=None):
+        """Recreate a world from a snapshot dictionary"""
+        world = cls(seed=data['seed'], map_size=data['map_size'], rng=rng)
+        for name, map_data in data['maps'].items():
+            world.get_map(WorldType[name]).load_dict(map_data)
+        world.current_world = WorldType[data['current_world']]
+        world.player_x = data['player_x']
+        world.player_y = data['player_y']
+        world.get_current_map().load_around(world.player_x, world.player_y)
+        return world
     
     def get_current_map(self):
         """Get the current world map"""
-        return self.maps[self.current_world]
+        return self.get_map(self.current_world)
     
     def get_current_cell(self):
         """Get the content of the current cell"""
@@ -112,27 +423,23 @@ class World:
         if isinstance(cell_content, MajorEventType):
             return cell_content
         
-        # Generate random encounter (25% chance of enemy)
-        if random.random() < 0.25:
+        # Encounters are derived from the world seed and position
+        roll = derive_cell_roll(self.seed, self.current_world, self.player_x, self.player_y)
+        if roll < ENCOUNTER_CHANCE:
             return CellType.ENEMY
         else:
             return CellType.EMPTY
     
     def move_player(self, direction):
         """Move the player in a direction (north, east, south, west)"""
-        old_x, old_y = self.player_x, self.player_y
-        
-        if direction == "north" and self.player_y > 0:
-            self.player_y -= 1
-        elif direction == "east" and self.player_x < 49:
-            self.player_x += 1
-        elif direction == "south" and self.player_y < 49:
-            self.player_y += 1
-        elif direction == "west" and self.player_x > 0:
-            self.player_x -= 1
-        else:
+        if direction not in self.get_available_directions():
             return False, "You can't move in that direction."
         
+        dx, dy = DIRECTION_OFFSETS[direction]
+        self.player_x += dx
+        self.player_y += dy
+        self.get_current_map().load_around(self.player_x, self.player_y)
+        
         # Check what's at the new location
         cell_content = self.get_current_cell()
         return True, self.get_location_description(cell_content)
@@ -221,64 +528,32 @@ class World:
         directions = []
         if self.player_y > 0:
             directions.append("north")
-        if self.player_x < 49:
+        if self.player_x < self.map_size - 1:
             directions.append("east")
-        if self.player_y < 49:
+        if self.player_y < self.map_size - 1:
             directions.append("south")
         if self.player_x > 0:
             directions.append("west")
         return directions
     
-    def get_direction_hint(self, direction):
+    def get_direction_hint(self, direction, hints=None):
         """Get hint about major events in a specific direction (only if close)"""
-        current_map = self.get_current_map()
-        target_x, target_y = self.player_x, self.player_y
-        
-        if direction == "north" and self.player_y > 0:
-            target_y -= 1
-        elif direction == "east" and self.player_x < 49:
-            target_x += 1
-        elif direction == "south" and self.player_y < 49:
-            target_y += 1
-        elif direction == "west" and self.player_x > 0:
-            target_x -= 1
-        else:
+        # The hint index only covers directions that stay on the map
+        if hints is None:
+            hints = self.get_current_map().get_hints_at(self.player_x, self.player_y)
+        nearest = hints.get(direction)
+        if nearest is None:
             return None
-        
-        # Check for major events within 2 steps in that direction
-        for distance in range(1, 3):
-            check_x, check_y = target_x, target_y
-            
-            if direction == "north":
-                check_y = target_y - distance + 1
-            elif direction == "east":
-                check_x = target_x + distance - 1
-            elif direction == "south":
-                check_y = target_y + distance - 1
-            elif direction == "west":
-                check_x = target_x - distance + 1
-            
-            if 0 <= check_x < 50 and 0 <= check_y < 50:
-                if current_map.has_major_event_at(check_x, check_y):
-                    event_type = current_map.major_events[(check_x, check_y)]
-                    hints = {
-                        MajorEventType.DRAGON: "ancient power stirs",
-                        MajorEventType.TREASURE_VAULT: "great riches await",
-                        MajorEventType.MASTER_MERCHANT: "legendary trader nearby",
-                        MajorEventType.ANCIENT_PORTAL: "otherworldly energy pulses",
-                        MajorEventType.BOSS_ENEMY: "terrible danger approaches"
-                    }
-                    return hints.get(event_type, "something significant")
-        
-        return None
+        return MAJOR_EVENT_HINTS.get(nearest[1], "something significant")
     
     def get_directional_options_with_hints(self):
         """Get movement options with hints only for major events nearby"""
         directions = self.get_available_directions()
+        hints = self.get_current_map().get_hints_at(self.player_x, self.player_y)
         options = []
         
         for direction in directions:
-            hint = self.get_direction_hint(direction)
+            hint = self.get_direction_hint(direction, hints)
             direction_name = direction.capitalize()
             
             if hint:
@@ -289,11 +564,14 @@ class World:
         return options
     
     def change_world(self, new_world):
-        """Change to a different world"""
-        if new_world in self.maps:
+        """Change to a different world, generating its map on first entry"""
+        if isinstance(new_world, WorldType):
+            new_map = self.get_map(new_world)
             self.current_world = new_world
-            # Start at a random location in the new world
-            self.player_x = random.randint(5, 44)
-            self.player_y = random.randint(5, 44)
+            # Start at a random location in the new world, away from the edges
+            margin = EDGE_MARGIN if self.map_size > 2 * EDGE_MARGIN else 0
+            self.player_x = self.rng.randint(margin, self.map_size - margin - 1)
+            self.player_y = self.rng.randint(margin, self.map_size - margin - 1)
+            new_map.load_around(self.player_x, self.player_y)
             return True
         return False
\ No newline at end of file
@@ -7,7 +7,7 @@ from game.game_manager import GameManager
 
 def main():
     """Main entry point for the game"""
-    game = GameManager()
+    game = GameManager(headless=False)
     game.start_game()
 
 if __name__ == "__main__":
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Multi-process server for Text RPG Game
+
+Runs several app.py worker processes on local ports behind a small router.
+The router sends every request for a session to the worker that owns the
+session on a consistent hash ring, so each GameManager lives in exactly one
+worker and the workers can use every core. Workers share the snapshot
+database; when workers die or come back the ring is rebalanced and the
+sessions that moved are restored from their snapshots by the new owner.
+
+Requests without a session get one from the router, which signs the
+session cookie the same way the workers do. Their first request, even a
+POST to /api/start_game, then already reaches the worker that will own
+the game.
+
+WebSocket upgrades are not proxied; clients fall back to HTTP.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from werkzeug.serving import run_simple, WSGIRequestHandler
+from werkzeug.wrappers import Request, Response
+from werkzeug.wsgi import LimitedStream
+from game.sharding import HashRing
+
+# Must match the secret key used by app.py to sign session cookies
+SECRET_KEY = os.environ.get('TEXT_RPG_SECRET_KEY', 'text_rpg_secret_key')
+
+# Headers that apply to a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade', 'content-length'
+}
+
+# Idle keep-alive connections kept open to each worker
+MAX_IDLE_CONNECTIONS = 32
+
+# Errors of a kept-alive connection the worker closed while it sat idle
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+# Headers clients may not send to workers; the router sets X-Forwarded-For
+# itself, and profiling is for local clients of a worker only
+STRIPPED_HEADERS = {'host', 'x-forwarded-for', 'x-text-rpg-profile'}
+
+class EmptyReader:
+    """Stands in for a connection's input once the request body has been read"""
+
+    def read(self, size=-1):
+        return b''
+
+    def readline(self, size=-1):
+        return b''
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """Worker request handler that keeps connections from the router open
+
+    Newer Werkzeug versions close the connection after every response,
+    and then read everything left on the socket, because they can't tell
+    whether the application read the whole request body. That read would
+    swallow the router's next request. This handler reads exactly the
+    Content-Length body itself and hides the connection from that read,
+    so the next request on the connection starts in the right place.
+    """
+
+    # Seconds an idle connection is kept before the worker closes it
+    timeout = 60
+
+    # Headers and body are written separately; don't let the body wait for
+    # the router to acknowledge the headers on a connection that stays open
+    disable_nagle_algorithm = True
+
+    def make_environ(self):
+        environ = super().make_environ()
+        self.body = None
+        if self.request_version != 'HTTP/1.1' or 'chunked' in environ.get('HTTP_TRANSFER_ENCODING', '').lower():
+            return environ
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return environ
+        self.body = environ['wsgi.input'] = LimitedStream(self.rfile, length)
+        self.rfile = EmptyReader()
+        return environ
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection' and self.body is not None:
+            return
+        super().send_header(keyword, value)
+
+    def run_wsgi(self):
+        rfile = self.rfile
+        self.body = None
+        try:
+            super().run_wsgi()
+        finally:
+            self.rfile = rfile
+        if self.body is not None:
+            try:
+                self.body.exhaust()
+            except Exception:
+                self.close_connection = True
+
+def run_worker(worker_id, port):
+    """Run one app.py worker process"""
+    os.environ['TEXT_RPG_WORKER_ID'] = worker_id
+    # Snapshots are the shared store, so local spill files are not needed
+    os.environ['TEXT_RPG_SPILL_DIR'] = ''
+    from app import app
+    run_simple('127.0.0.1', port, app, threaded=True, request_handler=KeepAliveRequestHandler)
+
+class ShardRouter:
+    """WSGI app that forwards each request to the worker owning its session
+
+    Connections to workers are kept alive and reused, so forwarding a
+    request doesn't cost a new TCP connection.
+    """
+
+    def __init__(self, workers, secret_key):
+        self.workers = dict(workers)  # {worker_id: port}
+        self.ring = HashRing(self.workers)
+        self.lock = threading.Lock()
+        self.idle = {}  # {port: [HTTPConnection]}, reused instead of connecting per request
+        self.idle_lock = threading.Lock()
+        # Reads the signed Flask session cookie set by the workers
+        from flask import Flask
+        cookie_app = Flask(__name__)
+        cookie_app.secret_key = secret_key
+        self.session_cookie = cookie_app.config['SESSION_COOKIE_NAME']
+        self.serializer = cookie_app.session_interface.get_signing_serializer(cookie_app)
+
+    def get_session_id(self, request):
+        """Get the session ID from the request's session cookie"""
+        cookie = request.cookies.get(self.session_cookie)
+        if not cookie:
+            return None
+        try:
+            return self.serializer.loads(cookie).get('session_id')
+        except Exception:
+            return None
+
+    def new_session(self):
+        """Create a session ID and the signed session cookie holding it"""
+        session_id = str(uuid.uuid4())
+        return session_id, self.serializer.dumps({'session_id': session_id})
+
+    def get_worker(self, session_id):
+        """Get the worker that owns a session"""
+        return self.ring.get_node(session_id)
+
+    def set_workers(self, workers):
+        """Rebalance the ring onto a new set of workers"""
+        with self.lock:
+            workers = dict(workers)
+            payload = json.dumps({'workers': sorted(workers)})
+            # Old owners snapshot and release the games they lose first
+            for worker_id, port in self.workers.items():
+                if worker_id in workers:
+                    self.post(port, '/internal/shard/ring', payload)
+            self.workers = workers
+            self.ring = HashRing(workers)
+        # Connections to workers that left may point at dead processes
+        with self.idle_lock:
+            for port in set(self.idle) - set(workers.values()):
+                for connection in self.idle.pop(port):
+                    connection.close()
+
+    def post(self, port, path, body):
+        """Send a JSON POST to a worker, ignoring workers that are down"""
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('POST', path, body, {'Content-Type': 'application/json'})
+            connection.getresponse().read()
+            connection.close()
+        except OSError:
+            pass
+
+    def take_connection(self, port):
+        """Get an idle connection to a worker, or None if there is none"""
+        with self.idle_lock:
+            connections = self.idle.get(port)
+            return connections.pop() if connections else None
+
+    def release_connection(self, port, connection):
+        """Keep a connection to a worker open for the next request"""
+        with self.idle_lock:
+            connections = self.idle.setdefault(port, [])
+            if len(connections) < MAX_IDLE_CONNECTIONS:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def forward(self, port, method, path, body, headers):
+        """Send a request to a worker over a pooled connection; return (status, headers, body)"""
+        connection = self.take_connection(port)
+        while True:
+            reused = connection is not None
+            if not reused:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            try:
+                connection.request(method, path, body, headers)
+                upstream = connection.getresponse()
+                data = upstream.read()
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if not reused:
+                    raise
+                # The worker dropped the idle connection before reading the request
+                connection = None
+                continue
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                raise
+            if upstream.will_close:
+                connection.close()
+            else:
+                self.release_connection(port, connection)
+            return upstream.status, upstream.getheaders(), data
+
+    def __call__(self, environ, start_response):
+        request = Request(environ)
+        if request.path.startswith('/internal/'):
+            return Response('Not Found', status=404)(environ, start_response)
+
+        session_id = self.get_session_id(request)
+        new_cookie = None
+        if session_id is None:
+            # Workers would each create their own session; assign it here so
+            # the first request already reaches the session's owner
+            session_id, new_cookie = self.new_session()
+        worker_id = self.get_worker(session_id)
+        if worker_id is None:
+            return Response('No workers available', status=503)(environ, start_response)
+
+        headers = {key: value for key, value in request.headers.items()
+                   if key.lower() not in HOP_BY_HOP_HEADERS and key.lower() not in STRIPPED_HEADERS}
+        # Workers see every request come from the router; tell them who the
+        # client is so local-only endpoints stay local
+        headers['X-Forwarded-For'] = request.remote_addr or ''
+        if new_cookie is not None:
+            cookies = {**request.cookies, self.session_cookie: new_cookie}
+            headers = {key: value for key, value in headers.items() if key.lower() != 'cookie'}
+            headers['Cookie'] = '; '.join(f"{name}={value}" for name, value in cookies.items())
+        try:
+            status, upstream_headers, body = self.forward(self.workers[worker_id], request.method,
+                                                          request.full_path, request.get_data(), headers)
+        except (OSError, http.client.HTTPException, KeyError):
+            return Response('Worker unavailable', status=502)(environ, start_response)
+
+        response = Response(body, status=status)
+        for key, value in upstream_headers:
+            if key.lower() not in HOP_BY_HOP_HEADERS:
+                response.headers.add(key, value)
+        if new_cookie is not None:
+            response.set_cookie(self.session_cookie, new_cookie, httponly=True)
+        return response(environ, start_response)
+
+def is_worker_ready(port):
+    """Check if a worker accepts requests"""
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+        connection.request('HEAD', '/')
+        connection.getresponse().read()
+        connection.close()
+        return True
+    except OSError:
+        return False
+
+def supervise(router, processes, ports):
+    """Restart dead workers and rebalance the ring around them"""
+    while True:
+        time.sleep(1)
+        workers = {}
+        for worker_id, port in ports.items():
+            process = processes[worker_id]
+            if not process.is_alive():
+                print(f"Worker {worker_id} exited; restarting", file=sys.stderr)
+                process = multiprocessing.Process(target=run_worker, args=(worker_id, port), daemon=True)
+                process.start()
+                processes[worker_id] = process
+            if is_worker_ready(port):
+                workers[worker_id] = port
+        if set(workers) != set(router.workers):
+            print(f"Rebalancing onto workers: {', '.join(sorted(workers)) or 'none'}", file=sys.stderr)
+            router.set_workers(workers)
+
+def main():
+    """Start the workers and the router"""
+    parser = argparse.ArgumentParser(description="Run Text RPG with multiple worker processes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument('--host', default='127.0.0.1', help="router host")
+    parser.add_argument('--port', type=int, default=5000, help="router port")
+    parser.add_argument('--worker-base-port', type=int, default=5100, help="port of the first worker")
+    args = parser.parse_args()
+
+    ports = {f"worker-{i}": args.worker_base_port + i for i in range(args.workers)}
+    processes = {}
+    for worker_id, port in ports.items():
+        process = multiprocessing.Process(target=run_worker, args=(worker_id, port), daemon=True)
+        process.start()
+        processes[worker_id] = process
+
+    # Wait for every worker before accepting traffic
+    while not all(is_worker_ready(port) for port in ports.values()):
+        time.sleep(0.1)
+
+    router = ShardRouter(ports, SECRET_KEY)
+    threading.Thread(target=supervise, args=(router, processes, ports), daemon=True).start()
+    print(f"Routing http://{args.host}:{args.port} to {args.workers} workers")
+    run_simple(args.host, args.port, router, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -65,9 +65,18 @@ const ICON_VARIATIONS = {
   heal: ["💚", "💖", "✨"], // Heart, sparkle heart, stars
 };
 
+// Persistent action channel; actions fall back to HTTP without it
+let socket = null;
+let actionSeq = 0;
+
+// Last full action response and its version, used to apply delta patches
+let lastResponse = null;
+let responseVersion = null;
+
 // Initialize the game
 document.addEventListener("DOMContentLoaded", () => {
   startButton.addEventListener("click", startGame);
+  connectSocket();
 
   // Add compass button event listeners
   compassNorth.addEventListener("click", () => takeAction(1));
@@ -122,8 +131,77 @@ function handleKeyPress(event) {
   }
 }
 
+// Open the socket used to send actions and receive server updates
+function connectSocket() {
+  if (typeof io === "undefined") return;
+
+  socket = io();
+  socket.on("update", handleServerUpdate);
+}
+
+// Apply time-of-day and sun damage updates pushed by the server
+function handleServerUpdate(update) {
+  if (update.type === "time_changed") {
+    updateTime(update.time);
+  } else if (update.type === "sun_damage") {
+    addCurrentMessage(`You take ${update.damage} sun damage as a vampire!`);
+  }
+  if (update.player) {
+    updatePlayerStatus(update.player);
+  }
+}
+
+// Send an action over the socket when connected, otherwise over HTTP
+function sendAction(requestData) {
+  // Ask for only the fields that changed since the last response
+  requestData = { ...requestData, delta: true, version: responseVersion };
+
+  let request;
+  if (socket && socket.connected) {
+    request = new Promise((resolve) => {
+      socket.emit("action", { ...requestData, seq: ++actionSeq }, resolve);
+    });
+  } else {
+    request = fetch("/api/action", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify(requestData),
+    }).then((response) => response.json());
+  }
+
+  return request.then(applyResponseDelta);
+}
+
+// Rebuild the full response from a delta patch sent by the server
+function applyResponseDelta(data) {
+  let full;
+  if (data.delta) {
+    full = { ...lastResponse };
+    data.unset.forEach((key) => delete full[key]);
+    Object.entries(data.set).forEach(([key, value]) => {
+      const current = full[key];
+      const isObject = (item) =>
+        item && typeof item === "object" && !Array.isArray(item);
+      full[key] =
+        isObject(value) && isObject(current) ? { ...current, ...value } : value;
+    });
+  } else {
+    full = { ...data };
+    delete full.delta;
+  }
+  delete full.version;
+
+  lastResponse = full;
+  responseVersion = data.version;
+  return full;
+}
+
 // Start a new game
 function startGame() {
+  lastResponse = null;
+  responseVersion = null;
   fetch("/api/start_game", {
     method: "POST",
     headers: {
@@ -228,8 +306,8 @@ function executePlayerTurn(data, choice) {
       setTimeout(() => {
         if (data.enemy) {
           gameState.enemy = data.enemy;
-          const maxEnemyHealth = data.enemy.name === "Goblin" ? 3 : 5;
-          const healthPercentage = (data.enemy.health / maxEnemyHealth) * 100;
+          const healthPercentage =
+            (data.enemy.health / data.enemy.max_health) * 100;
           enemyHealthBar.style.width = `${healthPercentage}%`;
           enemyHealthText.textContent = `${data.enemy.health} HP`;
         }
@@ -686,8 +764,7 @@ function showBattleInfo(enemy) {
   }
 
   // Update enemy health bar
-  const maxEnemyHealth = enemy.name === "Goblin" ? 3 : 5; // Approximate max health
-  const healthPercentage = (enemy.health / maxEnemyHealth) * 100;
+  const healthPercentage = (enemy.health / enemy.max_health) * 100;
   enemyHealthBar.style.width = `${healthPercentage}%`;
 
   enemyHealthText.textContent = `${enemy.health} HP`;
@@ -860,7 +937,7 @@ function triggerSkillAnimation(
 
     if (isPlayerAction) {
       // Player attacking enemy - get enemy max health
-      maxHealth = gameState.enemy && gameState.enemy.name === "Goblin" ? 3 : 5;
+      maxHealth = gameState.enemy ? gameState.enemy.max_health : 5;
     } else {
       // Enemy attacking player - get player max health from current game state
       maxHealth =
@@ -1204,11 +1281,8 @@ function takeAction(choice) {
     choice: choice,
   };
 
-  // Add enemy info if in battle
+  // The server keeps the battle state, so only the choice is sent
   if (gameState.event === "battle" && gameState.enemy) {
-    requestData.enemy_name = gameState.enemy.name;
-    requestData.enemy_health = gameState.enemy.health;
-
     // Clear battle log immediately to prevent old message from showing
     while (battleLog.firstChild) {
       battleLog.removeChild(battleLog.firstChild);
@@ -1219,14 +1293,7 @@ function takeAction(choice) {
     setBattleActionsEnabled(false);
 
     // Send server request immediately
-    fetch("/api/action", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify(requestData),
-    })
-      .then((response) => response.json())
+    sendAction(requestData)
       .then((data) => {
         // Start player turn sequence with precise timing
         executePlayerTurn(data, choice);
@@ -1239,14 +1306,7 @@ function takeAction(choice) {
       });
   } else {
     // Non-battle actions proceed normally
-    fetch("/api/action", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify(requestData),
-    })
-      .then((response) => response.json())
+    sendAction(requestData)
       .then((data) => {
         updateGameState(data);
       })
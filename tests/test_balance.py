@@ -0,0 +1,60 @@
+"""
+Unit tests for the Monte Carlo battle simulator
+"""
+import unittest
+from game.balance import simulate_battles, AlwaysAttack, FleeThreshold, WON, LOST, FLED, np
+from game.enemies import GOBLIN, ANCIENT_DRAGON, Enemy
+from game.items import Weapon
+from game.player import Player
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBattleSimulator(unittest.TestCase):
+
+    def test_always_attack_goblin(self):
+        stats = simulate_battles(GOBLIN, 1000, seed=1)
+        self.assertEqual(stats.rate(WON), 1.0)
+        self.assertTrue((stats.turns == 3).all())
+        self.assertEqual(len(stats.gold), 1000)
+        self.assertTrue(((stats.gold >= 1) & (stats.gold <= 5)).all())
+
+    def test_dragon_outlasts_unarmed_player(self):
+        stats = simulate_battles(ANCIENT_DRAGON, 1000, seed=1)
+        self.assertEqual(stats.rate(LOST), 1.0)
+        # The player survives nine counterattacks
+        self.assertTrue((stats.turns == 10).all())
+        self.assertEqual(stats.summary()['mean_gold'], 0)
+
+    def test_weapon_damage_is_used(self):
+        player = Player()
+        player.equip_weapon(Weapon("Axe", "A heavy axe", 5))
+        stats = simulate_battles(ANCIENT_DRAGON, 100, player=player, seed=1)
+        self.assertEqual(stats.rate(WON), 1.0)
+        self.assertTrue((stats.turns == 3).all())
+
+    def test_flee_threshold(self):
+        # Fleeing at full health makes every fight end in escape or death
+        stats = simulate_battles(Enemy("Brute", 50, 3), 10000, policy=FleeThreshold(10), seed=1)
+        summary = stats.summary()
+        self.assertEqual(summary['win_rate'], 0)
+        self.assertAlmostEqual(summary['flee_rate'], 0.9375, delta=0.02)
+        self.assertAlmostEqual(summary['flee_rate'] + summary['loss_rate'], 1.0)
+        self.assertEqual(stats.rate(FLED), summary['flee_rate'])
+
+    def test_defending_forever_is_unfinished(self):
+        class AlwaysDefend(AlwaysAttack):
+            def choose(self, player_health, enemy_health):
+                return np.full(len(player_health), 2)
+
+        stats = simulate_battles(GOBLIN, 10, policy=AlwaysDefend(), max_turns=20)
+        self.assertEqual(stats.summary()['unfinished_rate'], 1.0)
+        self.assertTrue((stats.turns == 20).all())
+
+    def test_seed_is_reproducible(self):
+        first = simulate_battles(GOBLIN, 500, policy=FleeThreshold(9), seed=7)
+        second = simulate_battles(GOBLIN, 500, policy=FleeThreshold(9), seed=7)
+        self.assertEqual(first.summary(), second.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Unit tests for the bot playthrough harness
+"""
+import unittest
+from unittest.mock import patch
+import random
+from game.bots import (run_agent, run_bots, format_report, BotSession, CautiousPolicy,
+                       GOLD_SAMPLE_INTERVAL)
+from game.world import MajorEventType
+
+
+class TestBots(unittest.TestCase):
+
+    def test_session_is_reproducible(self):
+        first = run_agent(3, actions=200, policy='random', seed=1, map_size=20)
+        second = run_agent(3, actions=200, policy='random', seed=1, map_size=20)
+        self.assertEqual(first, second)
+        self.assertGreaterEqual(first['actions'], 200)
+        self.assertEqual(len(first['gold_curve']), first['actions'] // GOLD_SAMPLE_INTERVAL)
+        self.assertGreater(first['coverage']['Earth'], 0)
+
+    @patch('builtins.print')
+    @patch('builtins.input')
+    def test_sessions_run_headless(self, mock_input, mock_print):
+        stats = run_bots(5, actions=100, policy='cautious', processes=1, map_size=20)
+        self.assertEqual(stats['agents'], 5)
+        self.assertGreaterEqual(stats['actions'], 500)
+        self.assertGreater(stats['actions_per_second'], 0)
+        self.assertGreater(stats['battles'], 0)
+        self.assertEqual(len(stats['gold_curve']), 10)
+        mock_input.assert_not_called()
+        mock_print.assert_not_called()
+
+    def test_process_pool_matches_single_process(self):
+        single = run_bots(4, actions=50, processes=1, seed=2, map_size=20)
+        pooled = run_bots(4, actions=50, processes=2, seed=2, map_size=20)
+        for key in ('actions', 'deaths', 'battles', 'mean_gold', 'gold_curve'):
+            self.assertEqual(single[key], pooled[key])
+        self.assertAlmostEqual(single['realm_coverage']['Earth'], pooled['realm_coverage']['Earth'])
+        self.assertIn("Actions per second", format_report(pooled))
+
+
+class TestCautiousPolicy(unittest.TestCase):
+
+    def test_takes_safe_rewards_once_per_visit(self):
+        rng = random.Random(1)
+        session = BotSession(CautiousPolicy(rng), rng, map_size=20)
+        world = session.game.world
+        world.get_current_map().add_major_event(world.player_x, world.player_y, MajorEventType.TREASURE_VAULT)
+        gold = session.game.player.gold
+
+        # Breaking the vault seal is worth 50-100 gold
+        session.step()
+        self.assertGreaterEqual(session.game.player.gold, gold + 50)
+        self.assertEqual(session.policy.next_action(session.game)[0], 'move')
+
+    def test_avoids_dangerous_major_events(self):
+        rng = random.Random(1)
+        session = BotSession(CautiousPolicy(rng), rng, map_size=20)
+        world = session.game.world
+        world.get_current_map().add_major_event(world.player_x, world.player_y, MajorEventType.DRAGON)
+        self.assertEqual(session.policy.next_action(session.game)[0], 'move')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ Unit tests for Enemy classes
 """
 import unittest
 from game.enemies import Enemy, GOBLIN, OLD_MAN
+from game.events import BattleEvent
 
 password = "abc"
 
@@ -69,27 +70,41 @@ class TestGameRequirementCompliance(unittest.TestCase):
     def test_battle_system_compatibility(self):
         """Test that enemies are compatible with Pokemon-style battles"""
         enemy = Enemy("Test Fighter", 5, 2)
+        battle = BattleEvent(enemy)
         
         # Test that enemy can take damage (simulating player attack)
-        original_health = enemy.health
+        original_health = battle.enemy_health
         damage = 1
-        enemy.health -= damage
+        battle.enemy_health -= damage
         
-        self.assertEqual(enemy.health, original_health - damage)
-        self.assertGreater(enemy.health, 0)  # Still alive after one hit
+        self.assertEqual(battle.enemy_health, original_health - damage)
+        self.assertGreater(battle.enemy_health, 0)  # Still alive after one hit
+        self.assertEqual(enemy.health, original_health)  # Shared definition is unchanged
     
     def test_enemy_defeat_condition(self):
         """Test enemy defeat when health reaches zero"""
-        enemy = Enemy("Defeatable", 1, 3)
+        battle = BattleEvent(Enemy("Defeatable", 1, 3))
         
         # Enemy should start alive
-        self.assertGreater(enemy.health, 0)
+        self.assertGreater(battle.enemy_health, 0)
         
         # Simulate fatal damage
-        enemy.health = 0
+        battle.enemy_health = 0
         
         # Enemy should now be defeated
-        self.assertEqual(enemy.health, 0)
+        self.assertEqual(battle.enemy_health, 0)
+    
+    def test_enemy_definitions_are_immutable(self):
+        """Test that shared enemy definitions can't be changed"""
+        with self.assertRaises(AttributeError):
+            GOBLIN.health = 0
+        self.assertEqual(GOBLIN.health, 3)
+    
+    def test_enemy_definitions_are_interned(self):
+        """Test that equal enemies share one definition and ID"""
+        self.assertIs(Enemy("Goblin", 3, 1), GOBLIN)
+        self.assertIsNot(Enemy("Goblin", 4, 1), GOBLIN)
+        self.assertIsInstance(GOBLIN.id, int)
     
     def test_enemy_attack_simulation(self):
         """Test enemy attack capabilities for turn-based combat"""
@@ -144,13 +159,14 @@ class TestEnemyGameIntegration(unittest.TestCase):
     def test_loot_drop_enemy_state(self):
         """Test enemy state for loot dropping mechanics"""
         enemy = Enemy("Loot Bearer", 5, 2)
+        battle = BattleEvent(enemy)
         
         # Simulate battle until enemy is defeated
-        while enemy.health > 0:
-            enemy.health -= 1
+        while battle.enemy_health > 0:
+            battle.enemy_health -= 1
         
         # Enemy should be in defeated state (health = 0) for loot generation
-        self.assertEqual(enemy.health, 0)
+        self.assertEqual(battle.enemy_health, 0)
         
         # Enemy should still maintain other properties for loot calculation
         self.assertEqual(enemy.name, "Loot Bearer")
@@ -4,6 +4,7 @@ Unit tests for Events module
 import unittest
 from unittest.mock import patch, MagicMock
 from game.events import FirstEncounter, BattleEvent
+from game.enemies import Enemy, GOBLIN, OLD_MAN
 from game.game_manager import GameManager
 
 
@@ -81,5 +82,49 @@ class TestBattleEvent(unittest.TestCase):
         self.assertEqual(self.battle.enemy_health, 0)
 
 
+
+class TestBattleTurns(unittest.TestCase):
+    
+    def setUp(self):
+        self.game_manager = GameManager(seed=1)
+    
+    def test_attack_until_victory(self):
+        battle = self.game_manager.start_battle(GOBLIN)
+        self.assertEqual(self.game_manager.battle_turn(1)[0], 'ongoing')
+        self.assertEqual(self.game_manager.player.health, 9)
+        self.assertEqual(battle.get_enemy_status(), {'name': 'Goblin', 'health': 2, 'max_health': 3})
+        self.game_manager.battle_turn(1)
+        outcome, message = self.game_manager.battle_turn(1)
+        self.assertEqual(outcome, 'won')
+        self.assertIn("You defeated the Goblin!", message)
+        self.assertIsNone(self.game_manager.battle)
+    
+    def test_defend_and_invalid_choice(self):
+        self.game_manager.start_battle(GOBLIN)
+        self.assertEqual(self.game_manager.battle_turn(2)[0], 'ongoing')
+        self.assertIsNone(self.game_manager.battle_turn(9))
+        self.assertEqual(self.game_manager.player.health, 10)
+        self.assertIsNotNone(self.game_manager.battle)
+    
+    def test_defeat_reports_death(self):
+        events = []
+        
+        def listener(name, data):
+            events.append(name)
+        
+        self.game_manager.add_listener(listener)
+        self.game_manager.start_battle(Enemy("Giant", 50, 10))
+        self.assertEqual(self.game_manager.battle_turn(1)[0], 'lost')
+        self.assertIn('player_died', events)
+        self.assertIsNone(self.game_manager.battle)
+    
+    def test_battle_is_saved_in_snapshots(self):
+        battle = self.game_manager.start_battle(OLD_MAN)
+        battle.enemy_health = 2
+        restored = GameManager.from_dict(self.game_manager.to_dict())
+        self.assertEqual(restored.battle.get_enemy_status(), {'name': 'Old Man', 'health': 2, 'max_health': 5})
+        self.assertIs(restored.battle.game_manager, restored)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
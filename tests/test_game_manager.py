@@ -3,6 +3,8 @@ Unit tests for GameManager class
 """
 import unittest
 from unittest.mock import patch, MagicMock
+from io import StringIO
+from game.effects import EFFECTS
 from game.game_manager import GameManager
 from game.player import Player
 from game.world import World, CellType
@@ -57,7 +59,15 @@ class TestGameManager(unittest.TestCase):
             expected_health = initial_health - expected_damage
             self.assertEqual(self.game_manager.player.health, expected_health)
     
-    @patch('game.game_manager.random.randint')
+    def test_scheduled_effects_run_on_their_action(self):
+        fired = []
+        with patch.dict(EFFECTS, {'quest_timer': lambda game: fired.append(game.action_count)}):
+            self.game_manager.time_system.schedule('quest_timer', 3)
+            for _ in range(5):
+                self.game_manager.action_taken()
+        self.assertEqual(fired, [3])
+    
+    @patch('game.rng.GameRandom.randint')
     def test_handle_location_interaction_treasure(self, mock_randint):
         mock_randint.return_value = 10
         
@@ -76,7 +86,7 @@ class TestGameManager(unittest.TestCase):
         self.assertEqual(self.game_manager.player.gold, initial_gold + 10)
         self.assertIn("10 gold", result)
     
-    @patch('game.game_manager.random.randint')
+    @patch('game.rng.GameRandom.randint')
     def test_handle_location_interaction_npc_quest(self, mock_randint):
         mock_randint.return_value = 5
         
@@ -89,5 +99,60 @@ class TestGameManager(unittest.TestCase):
         self.assertIn("5 gold", result)
 
 
+
+class TestHeadlessGameManager(unittest.TestCase):
+    
+    def setUp(self):
+        self.game_manager = GameManager()
+        self.events = []
+        
+        def listener(name, data):
+            self.events.append((name, data))
+        
+        self.game_manager.add_listener(listener)
+    
+    @patch('builtins.print')
+    def test_rewards_emit_events_without_printing(self, mock_print):
+        from game.items import STICK
+        self.game_manager.reward_gold(10)
+        self.game_manager.reward_item(STICK, equip=True)
+        
+        self.assertEqual(self.events, [
+            ('gold_added', {'amount': 10}),
+            ('item_added', {'item': 'Stick'}),
+            ('weapon_equipped', {'weapon': 'Stick'})
+        ])
+        self.assertEqual(self.game_manager.player.equipped_weapon, STICK)
+        mock_print.assert_not_called()
+    
+    @patch('builtins.print')
+    @patch('builtins.input')
+    def test_death_waits_for_front_end(self, mock_input, mock_print):
+        self.game_manager.player.health = 0
+        self.game_manager.handle_player_death()
+        
+        self.assertEqual(self.events[0][0], 'player_died')
+        self.assertEqual(self.game_manager.player.health, 0)
+        mock_input.assert_not_called()
+        mock_print.assert_not_called()
+        
+        self.game_manager.resolve_death(2)
+        self.assertTrue(self.game_manager.player.is_vampire)
+        self.assertEqual(self.game_manager.player.health, self.game_manager.player.max_health)
+        self.assertEqual(self.events[-1][0], 'player_resurrected')
+    
+    @patch('builtins.input', return_value='1')
+    def test_interactive_death_renders_to_console(self, mock_input):
+        game_manager = GameManager(headless=False)
+        game_manager.player.gold = 20
+        with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            game_manager.handle_player_death()
+        
+        self.assertEqual(game_manager.player.gold, 0)
+        output = mock_stdout.getvalue()
+        self.assertIn("YOU DIED", output)
+        self.assertIn("You've been reborn", output)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
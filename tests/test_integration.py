@@ -51,7 +51,7 @@ class TestGameIntegration(unittest.TestCase):
         if self.game.time_system.is_daytime():
             self.assertLess(self.game.player.health, initial_health)
     
-    @patch('game.game_manager.random.random')
+    @patch('game.rng.GameRandom.random')
     def test_merchant_interaction_flow(self, mock_random):
         """Test complete merchant interaction"""
         mock_random.return_value = 0.5  # Neutral random value
@@ -0,0 +1,59 @@
+"""
+Unit tests for the location interaction registry
+"""
+import unittest
+from unittest.mock import patch
+from game.enemies import GOBLIN, ANCIENT_DRAGON, BOSS_MONSTER
+from game.game_manager import GameManager
+from game.interactions import INTERACTIONS, run_interaction
+from game.world import CellType, MajorEventType
+
+
+class TestInteractions(unittest.TestCase):
+
+    def setUp(self):
+        self.game = GameManager()
+
+    def test_every_location_action_has_a_handler(self):
+        for location in list(CellType) + list(MajorEventType):
+            for choice in (1, 2, 3):
+                self.assertIn((location, choice), INTERACTIONS)
+
+    def test_invalid_choice(self):
+        result = run_interaction(self.game, CellType.NPC, 9)
+        self.assertEqual(result.message, "")
+        self.assertIsNone(result.battle)
+
+    def test_battle_triggers(self):
+        self.assertIs(run_interaction(self.game, CellType.ENEMY, 1).battle, GOBLIN)
+        self.assertIs(run_interaction(self.game, MajorEventType.DRAGON, 1).battle, ANCIENT_DRAGON)
+        self.assertIs(run_interaction(self.game, MajorEventType.BOSS_ENEMY, 1).battle, BOSS_MONSTER)
+        self.assertIsNone(run_interaction(self.game, MajorEventType.BOSS_ENEMY, 2).battle)
+
+    @patch('game.rng.GameRandom.random')
+    def test_failed_checks_start_battles(self, mock_random):
+        mock_random.return_value = 0.99
+        self.assertIs(run_interaction(self.game, MajorEventType.DRAGON, 2).battle, ANCIENT_DRAGON)
+        self.assertIs(run_interaction(self.game, MajorEventType.DRAGON, 3).battle, ANCIENT_DRAGON)
+        self.assertIs(run_interaction(self.game, MajorEventType.BOSS_ENEMY, 3).battle, BOSS_MONSTER)
+        self.assertIs(run_interaction(self.game, CellType.ENEMY, 2).battle, GOBLIN)
+
+        mock_random.return_value = 0.0
+        self.assertIsNone(run_interaction(self.game, MajorEventType.DRAGON, 3).battle)
+
+    def test_treasure_is_removed(self):
+        world_map = self.game.world.get_current_map()
+        x, y = self.game.world.player_x, self.game.world.player_y
+        world_map.set_cell(x, y, CellType.TREASURE)
+        run_interaction(self.game, CellType.TREASURE, 3)
+        self.assertEqual(world_map.get_cell(x, y), CellType.EMPTY)
+
+    def test_run_interaction_counts_as_action(self):
+        self.game.world.get_current_cell = lambda: CellType.PORTAL
+        result = self.game.run_interaction(2)
+        self.assertIn("runes", result.message)
+        self.assertEqual(self.game.action_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
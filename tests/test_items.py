@@ -1,8 +1,9 @@
 """
 Unit tests for Item classes
 """
+import pickle
 import unittest
-from game.items import Item, Weapon, STICK
+from game.items import Item, Weapon, STICK, ITEM_CATALOG, item_from_snapshot, item_to_snapshot
 
 
 class TestItem(unittest.TestCase):
@@ -80,5 +81,37 @@ class TestWeapon(unittest.TestCase):
         self.assertIsInstance(STICK, Item)
 
 
+class TestItemCatalog(unittest.TestCase):
+
+    def test_items_are_interned(self):
+        """Test that equal items share one definition"""
+        self.assertIs(Weapon("Stick", "A simple wooden stick", 1), STICK)
+        self.assertIs(Item("Rope", "Ten feet of rope"), Item("Rope", "Ten feet of rope"))
+        self.assertIsNot(Item("Stick", "A simple wooden stick"), STICK)
+        self.assertIs(ITEM_CATALOG[STICK.id], STICK)
+
+    def test_items_are_immutable(self):
+        """Test that shared definitions can't be changed"""
+        with self.assertRaises(AttributeError):
+            STICK.damage = 100
+        with self.assertRaises(AttributeError):
+            STICK.owner = "player"
+        self.assertEqual(STICK.damage, 1)
+
+    def test_pickle_keeps_identity(self):
+        """Test that unpickled items are the interned definitions"""
+        sword = Weapon("Sword", "A sharp blade", 3)
+        self.assertIs(pickle.loads(pickle.dumps([STICK, sword]))[0], STICK)
+        self.assertIs(pickle.loads(pickle.dumps(sword)), sword)
+
+    def test_snapshots_use_ids_for_built_in_items(self):
+        """Test that built-in items are saved as IDs and others in full"""
+        sword = Weapon("Sword", "A sharp blade", 3)
+        self.assertEqual(item_to_snapshot(STICK), STICK.id)
+        self.assertEqual(item_to_snapshot(sword), sword.to_dict())
+        self.assertIs(item_from_snapshot(item_to_snapshot(STICK)), STICK)
+        self.assertIs(item_from_snapshot(item_to_snapshot(sword)), sword)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
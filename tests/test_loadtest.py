@@ -0,0 +1,123 @@
+"""
+Unit tests for the load test driver
+"""
+import random
+import socket
+import threading
+import unittest
+from werkzeug.serving import make_server
+from app import app
+from game.loadtest import (percentile, summarize_latencies, apply_delta, choose_action, run_load_test,
+                           format_report, HttpTransport, VirtualUser, LatencyStats)
+from game.response_delta import ResponseDelta
+
+
+class TestPercentile(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        random.Random(1).shuffle(values)
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summary(self):
+        summary = summarize_latencies([0.1, 0.2, 0.3, 0.4], errors=1, elapsed=2.0)
+        self.assertEqual(summary['requests'], 4)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['p50'], 0.2)
+        self.assertEqual(summary['p99'], 0.4)
+        self.assertEqual(summary['throughput'], 2.0)
+
+
+class TestSessions(unittest.TestCase):
+
+    def test_apply_delta_rebuilds_responses(self):
+        encoder = ResponseDelta()
+        responses = [
+            {'event': 'map', 'message': 'a', 'player': {'health': 10, 'gold': 0}},
+            {'event': 'battle', 'message': 'b', 'enemy': {'name': 'Goblin'}, 'player': {'health': 8, 'gold': 0}},
+            {'event': 'map', 'message': 'c', 'player': {'health': 8, 'gold': 5}}
+        ]
+        state, version = {}, None
+        for response in responses:
+            data = encoder.encode(response, version)
+            state = apply_delta(state, data)
+            version = data['version']
+            self.assertEqual(state, response)
+
+    def test_actions_follow_the_event(self):
+        rng = random.Random(1)
+        for event in ('first_encounter', 'battle', 'location', 'death'):
+            for _ in range(20):
+                self.assertEqual(choose_action({'event': event}, rng)['event'], event)
+        battle_choices = {choose_action({'event': 'battle'}, rng)['choice'] for _ in range(100)}
+        self.assertEqual(battle_choices, {1, 3})
+        map_events = {choose_action({'event': 'map'}, rng)['event'] for _ in range(100)}
+        self.assertEqual(map_events, {'map', 'location'})
+
+
+class TestLoadTest(unittest.TestCase):
+
+    def test_in_process_run(self):
+        report = run_load_test(users=2, actions=30, seed=1)
+        overall = report['overall']
+        self.assertEqual(report['target'], 'in-process')
+        self.assertEqual(overall['errors'], 0)
+        # Each user loads the page, starts a game and sends its actions
+        self.assertEqual(overall['requests'], 2 * (2 + 30))
+        self.assertEqual(report['by_label']['page']['requests'], 2)
+        self.assertEqual(report['by_label']['action:first_encounter']['requests'], 2)
+        self.assertGreater(overall['throughput'], 0)
+        self.assertLessEqual(overall['p50'], overall['p95'])
+        self.assertLessEqual(overall['p95'], overall['p99'])
+        self.assertIn('action:map', format_report(report))
+
+    def test_duration_run(self):
+        report = run_load_test(users=2, actions=5, duration=0.5, seed=2)
+        self.assertEqual(report['overall']['errors'], 0)
+        # Users keep starting sessions until the time is up
+        self.assertGreater(report['by_label']['start_game']['requests'], 2)
+
+
+class TestHttpTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_session_cookie_is_kept(self):
+        transport = HttpTransport(self.url)
+        user = VirtualUser(transport, LatencyStats(), random.Random(1))
+        try:
+            self.assertTrue(user.play(10))
+        finally:
+            transport.close()
+        self.assertIn('session', transport.cookies)
+        # Every action reached the game started by the session
+        self.assertEqual(user.version, 10)
+        self.assertIn('player', user.state)
+
+    def test_unreachable_server_stops_users(self):
+        # Find a port nothing listens on
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        report = run_load_test(f"http://127.0.0.1:{port}", users=2, actions=5, duration=5, timeout=1)
+        self.assertEqual(report['overall']['requests'], 0)
+        self.assertEqual(report['overall']['errors'], 2)
+        self.assertLess(report['elapsed'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for memory accounting
+"""
+import sys
+import unittest
+from game.enemies import GOBLIN
+from game.game_manager import GameManager
+from game.items import STICK
+from game.memory import (measure, measure_game, deep_sizeof, find_shared_objects, summarize_games,
+                         trace_allocations, play_sessions, get_module_name)
+from game.time_system import DEFAULT_PHASE_EFFECTS
+
+
+class TestMeasure(unittest.TestCase):
+
+    def test_containers_include_their_contents(self):
+        value = ["x" * 100, [1000, 2000]]
+        expected = (sys.getsizeof(value) + sys.getsizeof(value[0]) + sys.getsizeof(value[1])
+                    + sys.getsizeof(1000) + sys.getsizeof(2000))
+        self.assertEqual(measure(value)[0], expected)
+
+    def test_shared_objects_are_not_counted(self):
+        self.assertEqual(measure([GOBLIN, STICK, GameManager, None, 7])[0], sys.getsizeof([None] * 5))
+        self.assertIn(id(DEFAULT_PHASE_EFFECTS), find_shared_objects())
+        self.assertEqual(deep_sizeof(DEFAULT_PHASE_EFFECTS), 0)
+
+    def test_objects_are_counted_once(self):
+        part = ["x" * 100]
+        seen = set()
+        first, _ = measure([part], seen)
+        second, _ = measure([part, part], seen)
+        self.assertEqual(second, sys.getsizeof([part, part]))
+        self.assertLess(second, first)
+
+
+class TestMeasureGame(unittest.TestCase):
+
+    def test_parts_add_up_to_total(self):
+        game = GameManager(seed=1)
+        game.world.get_current_map()
+        game.player.add_item(STICK)
+        sizes = measure_game(game)
+        self.assertEqual(sum(sizes['by_part'].values()), sizes['total'])
+        self.assertEqual(sum(sizes['by_type'].values()), sizes['total'])
+        self.assertGreater(sizes['by_part']['map:Earth'], 0)
+        self.assertEqual(sizes['by_part']['battle'], 0)
+
+    def test_inventory_grows_player(self):
+        game = GameManager(seed=1)
+        before = measure_game(game)['by_part']['player']
+        for _ in range(10):
+            game.player.add_item(STICK)
+        self.assertGreater(measure_game(game)['by_part']['player'], before)
+
+    def test_summary_of_bot_sessions(self):
+        games = play_sessions(3, actions=20)
+        summary = summarize_games(games)
+        self.assertEqual(summary['games'], 3)
+        self.assertAlmostEqual(summary['mean'], summary['total'] / 3)
+        self.assertEqual(summary['total'], sum(measure_game(game)['total'] for game in games))
+
+
+class TestTraceAllocations(unittest.TestCase):
+
+    def test_allocations_are_attributed_to_modules(self):
+        games, allocations = trace_allocations(lambda: [GameManager(seed=seed) for seed in range(50)])
+        self.assertEqual(len(games), 50)
+        self.assertGreater(allocations.get('game.game_manager', 0), 0)
+        self.assertGreater(allocations.get('game.rng', 0), 0)
+
+    def test_module_names(self):
+        self.assertEqual(get_module_name(sys.modules['game.world'].__file__), 'game.world')
+        self.assertEqual(get_module_name('<frozen abc>'), '<frozen abc>')
+
+
+if __name__ == '__main__':
+    unittest.main()
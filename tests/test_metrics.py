@@ -0,0 +1,48 @@
+"""
+Unit tests for the metrics module
+"""
+import unittest
+from game.metrics import Metrics, format_labels
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_counter(self):
+        counter = self.metrics.counter('test_total', "Things counted", ('kind',))
+        counter.inc('a')
+        counter.inc('a', amount=2)
+        counter.inc('b')
+        text = self.metrics.render()
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{kind="a"} 3', text)
+        self.assertIn('test_total{kind="b"} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.metrics.histogram('test_seconds', "Time taken", ('event',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, 'map')
+        lines = self.metrics.render().splitlines()
+        self.assertIn('test_seconds_bucket{event="map",le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{event="map",le="1.0"} 3', lines)
+        self.assertIn('test_seconds_bucket{event="map",le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_sum{event="map"} 2.65', lines)
+        self.assertIn('test_seconds_count{event="map"} 4', lines)
+
+    def test_observed_values_are_read_when_scraped(self):
+        values = [1]
+        self.metrics.observed('test_sessions', "Sessions", lambda: values[-1])
+        values.append(5)
+        text = self.metrics.render()
+        self.assertIn("# TYPE test_sessions gauge", text)
+        self.assertIn("test_sessions 5\n", text)
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(format_labels(('name',), ('say "hi"\\\n',)), '{name="say \\"hi\\"\\\\\\n"}')
+        self.assertEqual(format_labels((), ()), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Unit tests for the request profiler
+"""
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+from game.profiling import ProfileStore
+
+
+def work():
+    return sum(range(1000))
+
+
+class TestProfileStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ProfileStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_profile_is_saved(self):
+        result = self.store.profile(work, session="abc", event="map")
+        self.assertEqual(result, work())
+        [profile] = self.store.list_profiles()
+        self.assertEqual(profile['session'], "abc")
+        self.assertEqual(profile['event'], "map")
+        self.assertGreaterEqual(profile['duration'], 0)
+        stats = pstats.Stats(self.store.get_path(profile['id']))
+        self.assertTrue(any(function[2] == 'work' for function in stats.stats))
+        self.assertIn("work", self.store.format_profile(profile['id']))
+
+    def test_only_newest_profiles_are_kept(self):
+        store = ProfileStore(self.directory, max_profiles=2)
+        for _ in range(3):
+            store.profile(work)
+        profiles = store.list_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(f"{p['id']}.prof" for p in profiles))
+
+    def test_profiles_survive_restart(self):
+        self.store.profile(work)
+        [profile] = self.store.list_profiles()
+        restarted = ProfileStore(self.directory)
+        self.assertTrue(restarted.has_profile(profile['id']))
+
+    def test_sampling(self):
+        store = ProfileStore(self.directory, sample_every=3)
+        chosen = [store.should_profile("abc") for _ in range(6)]
+        self.assertEqual(chosen, [False, False, True, False, False, True])
+        self.assertFalse(self.store.should_profile("abc"))
+        self.assertTrue(self.store.should_profile("abc", requested=True))
+
+    def test_session_profiling(self):
+        self.store.enable_session("abc")
+        self.assertTrue(self.store.should_profile("abc"))
+        self.assertFalse(self.store.should_profile("def"))
+        self.store.disable_session("abc")
+        self.assertFalse(self.store.should_profile("abc"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for delta-encoded action responses
+"""
+import json
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from game.response_delta import ResponseDelta
+
+
+def apply_patch(state, patch):
+    """Apply a patch the way game.js does"""
+    if not patch['delta']:
+        return {k: v for k, v in patch.items() if k not in ('delta', 'version')}
+    state = dict(state)
+    for key in patch['unset']:
+        state.pop(key, None)
+    for key, value in patch['set'].items():
+        if isinstance(value, dict) and isinstance(state.get(key), dict):
+            state[key] = {**state[key], **value}
+        else:
+            state[key] = value
+    return state
+
+
+class TestResponseDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.delta = ResponseDelta()
+        self.first = {
+            'message': 'Hello',
+            'event': 'map',
+            'options': ['Move North'],
+            'player': {'health': 10, 'gold': 0},
+            'time': 'Day'
+        }
+
+    def test_first_response_is_full(self):
+        encoded = self.delta.encode(self.first)
+        self.assertFalse(encoded['delta'])
+        self.assertEqual(encoded['version'], 1)
+        self.assertEqual(encoded['player'], self.first['player'])
+
+    def test_only_changed_fields_are_sent(self):
+        self.delta.encode(self.first)
+        second = dict(self.first, message='Bye', player={'health': 10, 'gold': 5})
+        encoded = self.delta.encode(second, client_version=1)
+
+        self.assertTrue(encoded['delta'])
+        self.assertEqual(encoded['version'], 2)
+        self.assertEqual(encoded['set'], {'message': 'Bye', 'player': {'gold': 5}})
+        self.assertEqual(encoded['unset'], [])
+        self.assertEqual(apply_patch(self.first, encoded), second)
+
+    def test_removed_and_replaced_fields(self):
+        battle = dict(self.first, event='battle', enemy={'name': 'Goblin', 'health': 3})
+        self.delta.encode(battle)
+        after = dict(self.first, location_type='dragon')
+        encoded = self.delta.encode(after, client_version=1)
+
+        self.assertIn('enemy', encoded['unset'])
+        self.assertEqual(apply_patch(battle, encoded), after)
+
+    def test_out_of_sync_client_gets_full_response(self):
+        self.delta.encode(self.first)
+        self.delta.encode(self.first, client_version=1)
+        encoded = self.delta.encode(self.first, client_version=1)
+        self.assertFalse(encoded['delta'])
+        self.assertEqual(encoded['version'], 3)
+
+
+class TestDeltaResponsesAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.post('/api/start_game')
+
+    def post(self, body):
+        return json.loads(self.app.post('/api/action', json=body).data)
+
+    def test_responses_are_full_without_opt_in(self):
+        data = self.post({'event': 'first_encounter', 'choice': 1})
+        self.assertNotIn('version', data)
+        self.assertIn('player', data)
+
+    def test_delta_round_trip(self):
+        state = apply_patch({}, self.post({'event': 'first_encounter', 'choice': 1, 'delta': True}))
+        patch = self.post({'event': 'location', 'choice': 4, 'delta': True, 'version': 1})
+
+        self.assertTrue(patch['delta'])
+        self.assertNotIn('player', patch['set'])
+        self.assertNotIn('time', patch['set'])
+        state = apply_patch(state, patch)
+
+        full = self.post({'event': 'location', 'choice': 4})
+        self.assertEqual(state, full)
+
+
+if __name__ == '__main__':
+    unittest.main()
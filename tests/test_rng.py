@@ -0,0 +1,82 @@
+"""
+Unit tests for per-game random number generators
+"""
+import pickle
+import random
+import unittest
+from game.game_manager import GameManager
+from game.interactions import run_interaction
+from game.rng import GameRandom
+from game.world import CellType, MajorEventType, WorldType
+
+
+class TestGameRandom(unittest.TestCase):
+
+    def test_same_seed_same_stream(self):
+        first = GameRandom(42)
+        second = GameRandom(42)
+        self.assertEqual([first.randint(1, 100) for _ in range(50)],
+                         [second.randint(1, 100) for _ in range(50)])
+        self.assertNotEqual([GameRandom(1).random() for _ in range(5)],
+                            [GameRandom(2).random() for _ in range(5)])
+
+    def test_state_round_trip(self):
+        rng = GameRandom(7)
+        rng.random()
+        state = rng.getstate()
+        expected = [rng.random() for _ in range(10)]
+
+        restored = GameRandom()
+        restored.setstate(state)
+        self.assertEqual([restored.random() for _ in range(10)], expected)
+
+        copy = pickle.loads(pickle.dumps(rng))
+        self.assertEqual(copy.getstate(), rng.getstate())
+
+    def test_values_in_range(self):
+        rng = GameRandom(3)
+        values = [rng.random() for _ in range(1000)]
+        self.assertTrue(all(0.0 <= value < 1.0 for value in values))
+        self.assertEqual(rng.getrandbits(0), 0)
+        self.assertLess(rng.getrandbits(100), 1 << 100)
+        self.assertEqual(set(rng.randint(1, 3) for _ in range(200)), {1, 2, 3})
+
+    def test_invalid_seed(self):
+        with self.assertRaises(ValueError):
+            GameRandom(-1)
+        with self.assertRaises(ValueError):
+            GameRandom("seed")
+
+
+class TestGameRandomness(unittest.TestCase):
+
+    def play(self, game):
+        results = []
+        for _ in range(20):
+            # Both roll for success and then for the amount of gold
+            results.append(run_interaction(game, CellType.EMPTY, 2).message)
+            results.append(run_interaction(game, MajorEventType.DRAGON, 2).message)
+        return results
+
+    def test_games_do_not_share_random_state(self):
+        alone = self.play(GameManager(seed=9))
+
+        # Drawing from other generators in between changes nothing
+        game = GameManager(seed=9)
+        other = GameManager(seed=10)
+        random.random()
+        other.rng.random()
+        self.assertEqual(self.play(game), alone)
+
+    def test_snapshot_keeps_random_state(self):
+        game = GameManager(seed=11)
+        game.world.change_world(WorldType.ATLANTIS)
+        self.play(game)
+
+        restored = GameManager.from_dict(game.to_dict())
+        self.assertIs(restored.world.rng, restored.rng)
+        self.assertEqual(self.play(restored), self.play(game))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Unit tests for SessionStore class
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from game.game_manager import GameManager
+from game.session_store import SessionStore
+
+
+class TestSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+        self.store = SessionStore(max_sessions=2, spill_dir=self.spill_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def test_put_and_get(self):
+        game = GameManager()
+        self.store['a'] = game
+        self.assertIs(self.store['a'], game)
+        self.assertIn('a', self.store)
+        self.assertEqual(len(self.store), 1)
+
+    def test_resident_games_are_not_counted_as_lookups(self):
+        games = [GameManager(), GameManager()]
+        self.store['a'], self.store['b'] = games
+        self.assertEqual(self.store.resident_games(), games)
+        self.assertEqual(self.store.get_stats()['hits'], 0)
+
+    def test_missing_session(self):
+        self.assertIsNone(self.store.get('missing'))
+        self.assertNotIn('missing', self.store)
+        with self.assertRaises(KeyError):
+            self.store['missing']
+
+    def test_lru_eviction_spills_to_disk(self):
+        self.store['a'] = GameManager()
+        self.store['b'] = GameManager()
+        self.store['a']  # 'a' is now most recently used
+        self.store['c'] = GameManager()
+
+        self.assertEqual(len(self.store), 2)
+        self.assertNotIn('b', self.store.games)
+        self.assertIn('b', self.store)
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+
+    def test_evicted_game_is_restored(self):
+        game = GameManager()
+        game.player.gold = 42
+        self.store['a'] = game
+        self.store['b'] = GameManager()
+        self.store['c'] = GameManager()
+        self.assertNotIn('a', self.store.games)
+
+        restored = self.store['a']
+        self.assertEqual(restored.player.gold, 42)
+        self.assertIn('a', self.store.games)
+        self.assertEqual(self.store.get_stats()['restores'], 1)
+
+    def test_idle_ttl_eviction(self):
+        store = SessionStore(idle_ttl=0.01, spill_dir=self.spill_dir)
+        store['a'] = GameManager()
+        time.sleep(0.02)
+        store['b'] = GameManager()
+        self.assertNotIn('a', store.games)
+        self.assertIsNotNone(store.get('a'))
+
+    def test_memory_budget(self):
+        game = GameManager()
+        size = self.store.estimate_size(game)
+        store = SessionStore(max_bytes=size * 2, spill_dir=self.spill_dir)
+        for session_id in 'abcd':
+            store[session_id] = GameManager()
+        self.assertLessEqual(store.total_bytes, size * 2 + size // 2)
+        self.assertLess(len(store), 4)
+
+    def test_without_spill_dir_evicted_games_are_dropped(self):
+        store = SessionStore(max_sessions=1)
+        store['a'] = GameManager()
+        store['b'] = GameManager()
+        self.assertIsNone(store.get('a'))
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), "file ownership is POSIX only")
+    def test_spill_dir_is_private(self):
+        spill_dir = os.path.join(self.spill_dir, 'shared')
+        os.mkdir(spill_dir)
+        os.chmod(spill_dir, 0o777)
+        SessionStore(spill_dir=spill_dir)
+        self.assertEqual(os.stat(spill_dir).st_mode & 0o777, 0o700)
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), "file ownership is POSIX only")
+    def test_spill_dir_of_another_user_is_refused(self):
+        with patch('os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(PermissionError):
+                SessionStore(spill_dir=self.spill_dir)
+
+    def test_delete(self):
+        self.store['a'] = GameManager()
+        del self.store['a']
+        self.assertNotIn('a', self.store)
+        with self.assertRaises(KeyError):
+            del self.store['a']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+"""
+Unit tests for session sharding across worker processes
+"""
+import http.client
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from werkzeug.serving import make_server
+from werkzeug.test import Client, EnvironBuilder
+from werkzeug.wrappers import Request
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, games
+from game.game_manager import GameManager
+from game.profiling import ProfileStore
+from game.sharding import HashRing
+from serve import ShardRouter, KeepAliveRequestHandler, SECRET_KEY
+
+
+class TestHashRing(unittest.TestCase):
+
+    def setUp(self):
+        self.session_ids = [f"session-{i}" for i in range(2000)]
+
+    def test_empty_ring(self):
+        self.assertIsNone(HashRing().get_node("anything"))
+
+    def test_assignment_is_stable(self):
+        ring_a = HashRing(["w0", "w1", "w2"])
+        ring_b = HashRing(["w2", "w0", "w1"])
+        for session_id in self.session_ids[:100]:
+            self.assertEqual(ring_a.get_node(session_id), ring_b.get_node(session_id))
+
+    def test_sessions_spread_across_workers(self):
+        ring = HashRing(["w0", "w1", "w2", "w3"])
+        counts = {}
+        for session_id in self.session_ids:
+            node = ring.get_node(session_id)
+            counts[node] = counts.get(node, 0) + 1
+        self.assertEqual(set(counts), {"w0", "w1", "w2", "w3"})
+        for count in counts.values():
+            self.assertGreater(count, len(self.session_ids) / 4 * 0.5)
+
+    def test_adding_worker_moves_few_sessions(self):
+        ring = HashRing(["w0", "w1", "w2"])
+        before = {s: ring.get_node(s) for s in self.session_ids}
+        ring.add_node("w3")
+        moved = [s for s in self.session_ids if ring.get_node(s) != before[s]]
+
+        # Only sessions taken over by the new worker move
+        self.assertTrue(all(ring.get_node(s) == "w3" for s in moved))
+        self.assertLess(len(moved), len(self.session_ids) / 2)
+
+        ring.remove_node("w3")
+        self.assertEqual({s: ring.get_node(s) for s in self.session_ids}, before)
+        self.assertEqual(ring.nodes, ["w0", "w1", "w2"])
+
+
+class TestShardRebalance(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_ring_endpoint_hidden_outside_workers(self):
+        with patch.object(app_module, 'WORKER_ID', None):
+            response = self.client.post('/internal/shard/ring', json={'workers': ['w0']})
+        self.assertEqual(response.status_code, 404)
+
+    def test_ring_endpoint_releases_moved_sessions(self):
+        ring = HashRing(["w0", "w1"])
+        kept = next(s for s in (f"s{i}" for i in range(100)) if ring.get_node(s) == "w0")
+        moved = next(s for s in (f"s{i}" for i in range(100)) if ring.get_node(s) == "w1")
+        games[kept] = GameManager()
+        moved_game = GameManager()
+        moved_game.player.gold = 17
+        games[moved] = moved_game
+
+        with patch.object(app_module, 'WORKER_ID', "w0"):
+            response = self.client.post('/internal/shard/ring', json={'workers': ['w0', 'w1']})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertIn(kept, games.session_ids())
+        self.assertNotIn(moved, games.session_ids())
+        # The new owner can restore the released game from its snapshot
+        self.assertEqual(app_module.snapshots.load(moved).player.gold, 17)
+        games.discard(kept)
+        app_module.snapshots.delete(moved)
+
+
+class TestShardRouter(unittest.TestCase):
+
+    def test_routes_by_session_cookie(self):
+        router = ShardRouter({"w0": 5100, "w1": 5101}, SECRET_KEY)
+        client = app.test_client()
+        client.post('/api/start_game')
+        with client.session_transaction() as sess:
+            session_id = sess['session_id']
+        cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+
+        environ = EnvironBuilder(path='/api/action', headers={'Cookie': f"session={cookie}"}).get_environ()
+        request = Request(environ)
+        self.assertEqual(router.get_session_id(request), session_id)
+        self.assertEqual(router.get_worker(session_id), router.ring.get_node(session_id))
+        games.discard(session_id)
+
+    def test_router_forwards_client_address(self):
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        router = ShardRouter({"w0": server.server_port}, SECRET_KEY)
+        try:
+            remote = Client(router).get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.5'},
+                                        headers={'X-Forwarded-For': '127.0.0.1'})
+            self.assertEqual(remote.status_code, 404)
+            local = Client(router).get('/metrics', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+            self.assertEqual(local.status_code, 200)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_router_strips_profile_header(self):
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        router = ShardRouter({"w0": server.server_port}, SECRET_KEY)
+        client = Client(router)
+        directory = tempfile.mkdtemp()
+        try:
+            with patch.object(app_module, 'profiles', ProfileStore(directory)) as profiles:
+                client.post('/api/start_game', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+                response = client.post('/api/action', json={'event': 'first_encounter', 'choice': 1},
+                                       headers={'X-Text-RPG-Profile': '1'},
+                                       environ_base={'REMOTE_ADDR': '127.0.0.1'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(profiles.list_profiles(), [])
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            shutil.rmtree(directory)
+            session_id = router.serializer.loads(client.get_cookie(router.session_cookie).value)['session_id']
+            games.discard(session_id)
+            app_module.snapshots.delete(session_id)
+
+    def test_router_reuses_worker_connections(self):
+        server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveRequestHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        router = ShardRouter({"w0": server.server_port}, SECRET_KEY)
+        port = server.server_port
+        try:
+            client = Client(router)
+            client.get('/')
+            connection = router.idle[port][0]
+            self.assertEqual(client.get('/').status_code, 200)
+            self.assertEqual(router.idle[port], [connection])
+
+            # A connection the worker dropped while idle is replaced
+            class Stale:
+                def request(self, *args):
+                    raise http.client.RemoteDisconnected("closed")
+                def close(self):
+                    pass
+            router.idle[port] = [Stale()]
+            self.assertEqual(client.get('/').status_code, 200)
+            self.assertEqual(len(router.idle[port]), 1)
+            self.assertNotIsInstance(router.idle[port][0], Stale)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_router_assigns_missing_sessions(self):
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        router = ShardRouter({"w0": server.server_port}, SECRET_KEY)
+        client = Client(router)
+        try:
+            # A game started without loading the page first gets the router's session
+            with patch.object(router, 'get_worker', wraps=router.get_worker) as get_worker:
+                response = client.post('/api/start_game')
+            self.assertEqual(response.status_code, 200)
+            cookie = client.get_cookie(router.session_cookie).value
+            session_id = router.serializer.loads(cookie)['session_id']
+            # The first request was already routed by the session it created
+            get_worker.assert_called_once_with(session_id)
+            self.assertIn(session_id, games.session_ids())
+
+            # Later requests keep that session and reach the same game
+            client.post('/api/action', json={'event': 'first_encounter', 'choice': 2})
+            self.assertEqual(games[session_id].player.gold, 10)
+            self.assertEqual(client.get_cookie(router.session_cookie).value, cookie)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            games.discard(session_id)
+            app_module.snapshots.delete(session_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
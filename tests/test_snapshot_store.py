@@ -0,0 +1,247 @@
+"""
+Unit tests for game snapshots and SnapshotStore class
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from game.enemies import GOBLIN
+from game.game_manager import GameManager
+from game.items import STICK
+from game.snapshot_store import SnapshotStore
+from game.world import CellType, MajorEventType, WorldType, World
+
+
+class TestGameSnapshots(unittest.TestCase):
+
+    def test_game_round_trip(self):
+        game = GameManager()
+        game.player.add_gold(12)
+        game.player.add_item(STICK)
+        game.player.equip_weapon(STICK)
+        game.player.resurrect_as_vampire()
+        game.time_system.advance_time()
+        game.action_count = 7
+        game.world.move_player("north")
+        game.world.get_current_map().set_cell(3, 4, CellType.TREASURE)
+
+        restored = GameManager.from_dict(game.to_dict())
+
+        self.assertEqual(restored.to_dict(), game.to_dict())
+        self.assertEqual(restored.player.gold, 12)
+        self.assertIs(restored.player.equipped_weapon, restored.player.inventory[0])
+        self.assertEqual(restored.player.get_attack_damage(), 1)
+        self.assertTrue(restored.player.is_vampire)
+        self.assertFalse(restored.time_system.is_daytime())
+        self.assertEqual(restored.world.get_current_map().get_cell(3, 4), CellType.TREASURE)
+
+    def test_built_in_definitions_are_saved_as_ids(self):
+        game = GameManager()
+        game.player.add_item(STICK)
+        game.start_battle(GOBLIN)
+        game.battle.enemy_health = 1
+        data = game.to_dict()
+        self.assertEqual(data['player']['inventory'], [STICK.id])
+        self.assertEqual(data['battle'], {'enemy': GOBLIN.id, 'health': 1})
+
+        restored = GameManager.from_dict(data)
+        self.assertIs(restored.player.inventory[0], STICK)
+        self.assertIs(restored.battle.enemy, GOBLIN)
+        self.assertEqual(restored.battle.enemy_health, 1)
+
+    def test_world_snapshot_only_contains_visited_realms(self):
+        world = World(seed=5)
+        world.get_current_map()
+        world.change_world(WorldType.ATLANTIS)
+        data = world.to_dict()
+        self.assertEqual(set(data['maps']), {'EARTH', 'ATLANTIS'})
+
+        restored = World.from_dict(data)
+        self.assertEqual(restored.current_world, WorldType.ATLANTIS)
+        self.assertEqual(restored.get_loaded_worlds(), [WorldType.EARTH, WorldType.ATLANTIS])
+        for world_type in (WorldType.EARTH, WorldType.ATLANTIS):
+            self.assertEqual(restored.get_map(world_type).major_events,
+                             world.get_map(world_type).major_events)
+
+    def test_chunked_world_snapshot(self):
+        world = World(seed=5, map_size=10000)
+        world_map = world.get_current_map()
+        world_map.set_cell(5001, 5000, CellType.NPC)
+        world_map.add_major_event(5002, 5000, MajorEventType.DRAGON)
+        world_map.remove_major_event(5002, 5000)
+
+        restored = World.from_dict(world.to_dict())
+        restored_map = restored.get_current_map()
+        self.assertEqual(restored_map.get_cell(5001, 5000), CellType.NPC)
+        self.assertFalse(restored_map.has_major_event_at(5002, 5000))
+
+    def test_unsupported_version(self):
+        data = GameManager().to_dict()
+        data['version'] = 0
+        with self.assertRaises(ValueError):
+            GameManager.from_dict(data)
+
+
+class FlakyConnection:
+    """SQLite connection whose first writes fail as if another process held the lock"""
+
+    def __init__(self, connection, failures=1):
+        self.connection = connection
+        self.failures = failures
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.connection.__exit__(*exc_info)
+
+    def executemany(self, *args):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.connection.executemany(*args)
+
+    def execute(self, *args):
+        return self.connection.execute(*args)
+
+    def close(self):
+        self.connection.close()
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'snapshots.sqlite3')
+        # Long interval so tests control when flushes happen
+        self.store = SnapshotStore(self.path, flush_interval=60)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_save_is_write_behind(self):
+        game = GameManager()
+        game.player.gold = 9
+        self.store.save('a', game)
+
+        # Queued snapshots are readable before they are written
+        self.assertEqual(self.store.flushes, 0)
+        self.assertEqual(self.store.load('a').player.gold, 9)
+
+    def test_saves_are_batched_and_coalesced(self):
+        game = GameManager()
+        for gold in range(5):
+            game.player.gold = gold
+            self.store.save('a', game)
+        self.store.save('b', GameManager())
+
+        self.assertEqual(self.store.flush(), 2)
+        self.assertEqual(self.store.flushes, 1)
+        self.assertEqual(self.store.load('a').player.gold, 4)
+
+    def test_snapshots_survive_reopen(self):
+        game = GameManager()
+        game.player.gold = 21
+        self.store.save('a', game)
+        self.store.close()
+
+        self.store = SnapshotStore(self.path, flush_interval=60)
+        self.assertEqual(self.store.load('a').player.gold, 21)
+        self.assertEqual(len(self.store), 1)
+
+    def test_missing_and_deleted(self):
+        self.assertIsNone(self.store.load('missing'))
+        self.store.save('a', GameManager())
+        self.store.flush()
+        self.store.delete('a')
+        self.assertIsNone(self.store.load('a'))
+
+    def test_full_batch_wakes_writer(self):
+        store = SnapshotStore(os.path.join(self.temp_dir, 'batch.sqlite3'), flush_interval=60, max_batch=2)
+        store.save('a', GameManager())
+        store.save('b', GameManager())
+        store.writer.join(0.5)
+        self.assertEqual(store.writes, 2)
+        store.close()
+
+    def test_action_log(self):
+        self.store.append('a', 1, {'event': 'map', 'choice': 1, 'seed': 5})
+        self.store.append('a', 2, {'event': 'map', 'choice': 2, 'seed': 6})
+        self.store.append('b', 1, {'event': 'map', 'choice': 3, 'seed': 7})
+        self.store.flush()
+        self.store.append('a', 3, {'event': 'map', 'choice': 4, 'seed': 8})
+
+        # Flushed and queued entries are both visible, in order
+        actions = self.store.load_actions('a', after_seq=1)
+        self.assertEqual([seq for seq, _ in actions], [2, 3])
+        self.assertEqual(actions[1][1]['choice'], 4)
+
+        self.store.delete('a')
+        self.assertEqual(self.store.load_actions('a'), [])
+        self.assertEqual(len(self.store.load_actions('b')), 1)
+
+    def test_snapshot_records_log_position(self):
+        game = GameManager()
+        game.log_seq = 40
+        self.store.save('a', game)
+        self.assertEqual(self.store.load('a').log_seq, 40)
+
+    def test_failed_flush_is_requeued(self):
+        self.store.connection = FlakyConnection(self.store.connection)
+        game = GameManager()
+        game.player.gold = 3
+        self.store.save('a', game)
+        self.store.append('a', 1, {'event': 'map', 'choice': 1})
+        with self.assertRaises(sqlite3.OperationalError):
+            self.store.flush()
+
+        # Nothing was lost
+        self.assertEqual(self.store.load('a').player.gold, 3)
+        self.assertEqual(len(self.store.load_actions('a')), 1)
+
+        # A snapshot saved after the failure wins over the requeued one
+        game.player.gold = 4
+        self.store.save('a', game)
+        self.store.save('b', game)
+        self.assertEqual(self.store.flush(), 2)
+        self.assertEqual(self.store.load('a').player.gold, 4)
+        self.assertEqual(len(self.store.load_actions('a')), 1)
+
+    def test_writer_survives_failed_flush(self):
+        store = SnapshotStore(os.path.join(self.temp_dir, 'retry.sqlite3'), flush_interval=0.01)
+        store.connection = FlakyConnection(store.connection)
+        with self.assertLogs('game.snapshot_store', 'ERROR'):
+            store.save('a', GameManager())
+            deadline = time.monotonic() + 5
+            while store.writes == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertTrue(store.writer.is_alive())
+        self.assertEqual(store.writes, 1)
+        store.close()
+        reopened = SnapshotStore(store.path, flush_interval=60)
+        self.assertIsNotNone(reopened.load('a'))
+        reopened.close()
+
+    def test_snapshot_prunes_replayed_log(self):
+        game = GameManager()
+        for seq in range(1, 101):
+            self.store.append('a', seq, {'event': 'map', 'choice': 1})
+            self.store.append('b', seq, {'event': 'map', 'choice': 1})
+        game.log_seq = 100
+        self.store.save('a', game)
+        self.store.append('a', 101, {'event': 'map', 'choice': 2})
+        self.store.flush()
+
+        with self.store.read_lock:
+            rows = self.store.read_connection.execute(
+                "SELECT session_id, COUNT(*) FROM actions GROUP BY session_id"
+            ).fetchall()
+        self.assertEqual(dict(rows), {'a': 1, 'b': 100})
+        self.assertEqual([seq for seq, _ in self.store.load_actions('a', 100)], [101])
+
+
+if __name__ == '__main__':
+    unittest.main()
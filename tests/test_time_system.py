@@ -2,7 +2,7 @@
 Unit tests for TimeSystem class
 """
 import unittest
-from game.time_system import TimeSystem
+from game.time_system import TimeSystem, DAY, NIGHT, DAY_LENGTH
 
 
 class TestTimeSystem(unittest.TestCase):
@@ -89,5 +89,67 @@ class TestTimeSystem(unittest.TestCase):
             self.fail(f"advance_time() raised {e} unexpectedly")
 
 
+class TestTimedEffects(unittest.TestCase):
+    
+    def setUp(self):
+        self.time_system = TimeSystem()
+        self.time_system.cancel('advance_time')
+    
+    def test_effects_fire_when_due(self):
+        self.time_system.schedule('curse', 3)
+        self.assertEqual(list(self.time_system.pop_due(2)), [])
+        self.assertEqual(list(self.time_system.pop_due(3)), ['curse'])
+        self.assertEqual(list(self.time_system.pop_due(4)), [])
+    
+    def test_due_effects_fire_in_tick_order(self):
+        self.time_system.schedule('quest', 7)
+        self.time_system.schedule('blessing', 2)
+        self.time_system.schedule('curse', 4)
+        self.assertEqual(list(self.time_system.pop_due(5)), ['blessing', 'curse'])
+        self.assertEqual(len(self.time_system.timers), 1)
+    
+    def test_repeating_effects(self):
+        self.time_system.schedule('nemesis', 3, 3)
+        fired = [tick for tick in range(1, 10) if list(self.time_system.pop_due(tick))]
+        self.assertEqual(fired, [3, 6, 9])
+    
+    def test_missed_repeats_are_skipped(self):
+        self.time_system.schedule('nemesis', 3, 3)
+        self.assertEqual(list(self.time_system.pop_due(10)), ['nemesis'])
+        self.assertEqual(self.time_system.timers, [(12, 'nemesis', 3)])
+    
+    def test_phase_effects(self):
+        self.time_system.at_phase('blessing', NIGHT)
+        self.assertEqual(self.time_system.get_phase_effects(), ('sun_damage',))
+        self.time_system.advance_time()
+        self.assertEqual(self.time_system.get_phase_effects(), ('blessing',))
+        self.assertEqual(TimeSystem().phase_effects[NIGHT], ())
+    
+    def test_cancel(self):
+        self.time_system.schedule('curse', 3, 3)
+        self.time_system.at_phase('curse', DAY)
+        self.time_system.cancel('curse')
+        self.assertEqual(list(self.time_system.pop_due(100)), [])
+        self.assertEqual(self.time_system.get_phase_effects(), ('sun_damage',))
+    
+    def test_day_night_cycle_is_scheduled(self):
+        time_system = TimeSystem()
+        self.assertEqual(list(time_system.pop_due(DAY_LENGTH)), ['advance_time'])
+        self.assertEqual(TimeSystem(tick=7).timers, [(10, 'advance_time', DAY_LENGTH)])
+    
+    def test_round_trip(self):
+        self.time_system.schedule('quest', 12)
+        self.time_system.at_phase('blessing', NIGHT)
+        restored = TimeSystem.from_dict(self.time_system.to_dict())
+        self.assertEqual(restored.to_dict(), self.time_system.to_dict())
+        self.assertEqual(list(restored.pop_due(12)), ['quest'])
+        self.assertEqual(restored.phase_effects, self.time_system.phase_effects)
+    
+    def test_old_snapshots_get_default_timers(self):
+        restored = TimeSystem.from_dict({'time': 1}, tick=12)
+        self.assertFalse(restored.is_daytime())
+        self.assertEqual(restored.timers, [(15, 'advance_time', DAY_LENGTH)])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -54,6 +54,13 @@ class TestUI(unittest.TestCase):
         output = mock_stdout.getvalue()
         self.assertIn("Stick", output)
 
+    
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_render_event(self, mock_stdout):
+        UI.render_event('gold_added', {'amount': 7})
+        UI.render_event('unknown_event', {})
+        self.assertEqual(mock_stdout.getvalue(), "Added 7 gold\n")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,16 +1,21 @@
 """
 Unit tests for Web API endpoints
 """
+import re
 import unittest
 from unittest.mock import patch, MagicMock
 import json
+import shutil
+import tempfile
 import sys
 import os
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app
+import app as app_module
+from game.profiling import ProfileStore
+from app import app, games
 
 
 class TestWebAPI(unittest.TestCase):
@@ -24,6 +29,10 @@ class TestWebAPI(unittest.TestCase):
         response = self.app.get('/')
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Medieval Text RPG', response.data)
+        # Scripts from other hosts are pinned to a known hash
+        page = response.get_data(as_text=True)
+        for tag in re.findall(r'<script[^>]*src="https?://[^>]*>', page):
+            self.assertIn('integrity="sha384-', tag)
     
     def test_start_game_endpoint(self):
         """Test starting a new game"""
@@ -112,5 +121,240 @@ class TestWebAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class StartedGameTestCase(unittest.TestCase):
+    """Base for tests that need a client with a started game"""
+    
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.post('/api/start_game')
+        with self.app.session_transaction() as sess:
+            self.session_id = sess['session_id']
+    
+    def tearDown(self):
+        games.discard(self.session_id)
+        app_module.snapshots.delete(self.session_id)
+
+
+class TestMapSize(StartedGameTestCase):
+    
+    def setUp(self):
+        self.patcher = patch.object(app_module, 'MAP_SIZE', 20)
+        self.patcher.start()
+        super().setUp()
+    
+    def tearDown(self):
+        super().tearDown()
+        self.patcher.stop()
+    
+    def test_games_use_configured_map_size(self):
+        """Test that new games are built with the configured map size"""
+        game = games[self.session_id]
+        self.assertEqual(game.world.map_size, 20)
+        self.assertEqual((game.world.player_x, game.world.player_y), (10, 10))
+
+
+class TestActionLog(StartedGameTestCase):
+    
+    def test_game_is_rebuilt_from_snapshot_and_log(self):
+        """Test recovering a game lost from memory by replaying its action log"""
+        actions = [{'event': 'first_encounter', 'choice': 2}]
+        actions += [{'event': 'map', 'choice': choice} for choice in (1, 2, 1, 3, 2, 2)]
+        actions += [{'event': 'location', 'choice': 1, 'location_type': 'empty'}] * 3
+        with patch.object(app_module, 'SNAPSHOT_EVERY', 4):
+            for action in actions:
+                self.app.post('/api/action', json=action)
+        
+        game = games[self.session_id]
+        self.assertEqual(game.log_seq, len(actions))
+        # The latest snapshot is older than the game
+        self.assertEqual(app_module.snapshots.load(self.session_id).log_seq, 8)
+        
+        # Simulate a crash: only the snapshot and the log survive
+        expected = game.to_dict()
+        games.discard(self.session_id)
+        response = self.app.post('/api/action', json={'event': 'location', 'choice': 4})
+        self.assertEqual(response.status_code, 200)
+        
+        restored = games[self.session_id]
+        self.assertEqual(restored.log_seq, len(actions) + 1)
+        restored.log_seq -= 1
+        self.assertEqual(restored.to_dict(), expected)
+    
+    def test_game_created_without_start_is_recovered(self):
+        """Test that a game created by the first action, not /api/start_game, survives leaving memory"""
+        client = app.test_client()
+        client.get('/')
+        with client.session_transaction() as sess:
+            session_id = sess['session_id']
+        try:
+            client.post('/api/action', json={'event': 'first_encounter', 'choice': 2})
+            expected = games[session_id].to_dict()
+            games.discard(session_id)
+            
+            data = client.post('/api/action', json={'event': 'map', 'choice': 5}).get_json()
+            self.assertEqual(data['player']['gold'], 10)
+            games[session_id].log_seq -= 1
+            self.assertEqual(games[session_id].to_dict(), expected)
+        finally:
+            games.discard(session_id)
+            app_module.snapshots.delete(session_id)
+
+
+class TestServerBattles(StartedGameTestCase):
+    
+    def test_battle_state_is_kept_on_server(self):
+        """Test that battle turns ignore enemy state sent by the client"""
+        data = self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 3}).get_json()
+        self.assertEqual(data['enemy'], {'name': 'Old Man', 'health': 5, 'max_health': 5})
+        
+        data = self.app.post('/api/action', json={
+            'event': 'battle', 'choice': 1, 'enemy_name': 'Old Man', 'enemy_health': 1
+        }).get_json()
+        self.assertEqual(data['event'], 'battle')
+        self.assertEqual(data['enemy']['health'], 4)
+        self.assertEqual(games[self.session_id].battle.enemy_health, 4)
+    
+    def test_battle_ends_on_victory(self):
+        """Test that winning clears the battle and pays out gold"""
+        self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 3})
+        game = games[self.session_id]
+        game.battle.enemy_health = 1
+        
+        data = self.app.post('/api/action', json={'event': 'battle', 'choice': 1}).get_json()
+        self.assertEqual(data['event'], 'map')
+        self.assertIn("You defeated the Old Man!", data['message'])
+        self.assertIsNone(game.battle)
+        self.assertGreater(game.player.gold, 10)
+        
+        # Battle actions outside a battle do nothing
+        data = self.app.post('/api/action', json={'event': 'battle', 'choice': 1}).get_json()
+        self.assertNotIn('event', data)
+
+
+class TestMetrics(StartedGameTestCase):
+    
+    def get_count(self, text, event, choice):
+        prefix = f'text_rpg_action_seconds_count{{event="{event}",choice="{choice}"}} '
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return int(line[len(prefix):])
+        return 0
+    
+    def test_actions_are_timed_by_event_and_choice(self):
+        """Test that actions show up in the latency histogram"""
+        before = self.app.get('/metrics').get_data(as_text=True)
+        self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 2})
+        self.app.post('/api/action', json={'event': 'map', 'choice': 1})
+        self.app.post('/api/action', json={'event': 'made up', 'choice': 'x'})
+        
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        text = response.get_data(as_text=True)
+        for event, choice in (('first_encounter', '2'), ('map', '1'), ('other', 'other')):
+            self.assertEqual(self.get_count(text, event, choice), self.get_count(before, event, choice) + 1)
+        self.assertIn("# TYPE text_rpg_action_seconds histogram", text)
+        self.assertIn(f"text_rpg_resident_sessions {len(games)}", text)
+        self.assertIn("# TYPE text_rpg_session_store_hits_total counter", text)
+    
+    def test_metrics_are_local_only(self):
+        """Test that remote clients can't read metrics"""
+        response = self.app.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.5'})
+        self.assertEqual(response.status_code, 404)
+        # Forwarded by the router for a remote client
+        response = self.app.get('/metrics', headers={'X-Forwarded-For': '203.0.113.5'})
+        self.assertEqual(response.status_code, 404)
+
+
+class TestProfiling(StartedGameTestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.patcher = patch.object(app_module, 'profiles', ProfileStore(self.directory))
+        self.profiles = self.patcher.start()
+        super().setUp()
+    
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.directory)
+        super().tearDown()
+    
+    def test_profile_requested_by_header(self):
+        """Test profiling a single action with the profile header"""
+        self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 2})
+        self.assertEqual(self.profiles.list_profiles(), [])
+        
+        response = self.app.post('/api/action', json={'event': 'map', 'choice': 1},
+                                 headers={'X-Text-RPG-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        [profile] = self.app.get('/internal/profiles').get_json()['profiles']
+        self.assertEqual(profile['session'], self.session_id)
+        self.assertEqual(profile['event'], 'map')
+        
+        text = self.app.get(f"/internal/profiles/{profile['id']}?format=text").get_data(as_text=True)
+        self.assertIn("process_action", text)
+        download = self.app.get(f"/internal/profiles/{profile['id']}")
+        self.assertEqual(download.status_code, 200)
+        self.assertIn("attachment", download.headers['Content-Disposition'])
+    
+    def test_session_profiling_toggle(self):
+        """Test profiling every action of a flagged session"""
+        self.app.post(f'/internal/profiles/sessions/{self.session_id}')
+        self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 2})
+        self.app.post('/api/action', json={'event': 'map', 'choice': 1})
+        self.assertEqual(len(self.profiles.list_profiles()), 2)
+        
+        self.app.delete(f'/internal/profiles/sessions/{self.session_id}')
+        self.app.post('/api/action', json={'event': 'map', 'choice': 2})
+        self.assertEqual(len(self.profiles.list_profiles()), 2)
+    
+    def test_profiling_is_local_only(self):
+        """Test that remote clients can't request or read profiles"""
+        remote = {'REMOTE_ADDR': '203.0.113.5'}
+        self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 2},
+                      headers={'X-Text-RPG-Profile': '1'}, environ_base=remote)
+        self.assertEqual(self.profiles.list_profiles(), [])
+        self.assertEqual(self.app.get('/internal/profiles', environ_base=remote).status_code, 404)
+        self.assertEqual(self.app.post(f'/internal/profiles/sessions/{self.session_id}',
+                                       environ_base=remote).status_code, 404)
+        self.assertEqual(self.app.get('/internal/profiles/missing').status_code, 404)
+
+
+class TestMemoryReport(StartedGameTestCase):
+    
+    def tearDown(self):
+        self.app.delete('/internal/memory/trace')
+        super().tearDown()
+    
+    def test_memory_report(self):
+        """Test reporting the memory held by resident games"""
+        data = self.app.get('/internal/memory').get_json()
+        self.assertEqual(data['resident'], len(games))
+        self.assertEqual(data['games'], len(games))
+        self.assertGreater(data['mean'], 0)
+        self.assertIn('player', data['by_part'])
+        self.assertNotIn('allocations_by_module', data)
+        
+        data = self.app.get('/internal/memory?limit=1').get_json()
+        self.assertEqual(data['games'], 1)
+        self.assertEqual(self.app.get('/internal/memory?limit=0').status_code, 400)
+        self.assertEqual(self.app.get('/internal/memory?limit=-1').status_code, 400)
+        self.assertAlmostEqual(data['estimated_total'], data['mean'] * data['resident'])
+    
+    def test_allocation_trace(self):
+        """Test attributing allocations to modules while tracing"""
+        self.assertTrue(self.app.post('/internal/memory/trace').get_json()['tracing'])
+        self.app.post('/api/action', json={'event': 'first_encounter', 'choice': 1})
+        data = self.app.get('/internal/memory').get_json()
+        self.assertIn('allocations_by_module', data)
+        self.assertFalse(self.app.delete('/internal/memory/trace').get_json()['tracing'])
+    
+    def test_memory_report_is_local_only(self):
+        """Test that remote clients can't read memory reports"""
+        remote = {'REMOTE_ADDR': '203.0.113.5'}
+        self.assertEqual(self.app.get('/internal/memory', environ_base=remote).status_code, 404)
+        self.assertEqual(self.app.post('/internal/memory/trace', environ_base=remote).status_code, 404)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
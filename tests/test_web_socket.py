@@ -0,0 +1,69 @@
+"""
+Unit tests for the WebSocket action channel
+"""
+import unittest
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, socketio, games
+
+
+class TestWebSocket(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        # Loading the page creates the session the socket relies on
+        self.app.get('/')
+        self.app.post('/api/start_game')
+        self.socket = socketio.test_client(app, flask_test_client=self.app)
+
+    def tearDown(self):
+        if self.socket.is_connected():
+            self.socket.disconnect()
+
+    def get_game(self):
+        with self.app.session_transaction() as sess:
+            return games[sess['session_id']]
+
+    def test_connect_requires_session(self):
+        client = socketio.test_client(app, flask_test_client=app.test_client())
+        self.assertFalse(client.is_connected())
+
+    def test_action_returns_response_as_ack(self):
+        self.assertTrue(self.socket.is_connected())
+        response = self.socket.emit('action', {'event': 'first_encounter', 'choice': 2, 'seq': 1},
+                                    callback=True)
+        self.assertEqual(response['event'], 'map')
+        self.assertEqual(response['seq'], 1)
+        self.assertEqual(response['player']['gold'], 10)
+
+        # The action changed the same game the HTTP API uses
+        self.assertEqual(self.get_game().player.gold, 10)
+
+    def test_pipelined_actions(self):
+        self.socket.emit('action', {'event': 'first_encounter', 'choice': 1}, callback=True)
+        results = [self.socket.emit('action', {'event': 'location', 'choice': 4, 'seq': seq}, callback=True)
+                   for seq in range(3)]
+        self.assertEqual([result['seq'] for result in results], [0, 1, 2])
+
+    def test_time_change_is_pushed(self):
+        game = self.get_game()
+        game.action_count = 4
+        game.player.resurrect_as_vampire()
+        game.time_system.time = 1
+        self.socket.get_received()
+
+        self.socket.emit('action', {'event': 'location', 'choice': 1, 'location_type': 'empty'},
+                         callback=True)
+        updates = [message['args'][0] for message in self.socket.get_received()
+                   if message['name'] == 'update']
+        self.assertEqual([update['type'] for update in updates], ['time_changed', 'sun_damage'])
+        self.assertEqual(updates[0]['time'], 'Day')
+        self.assertEqual(game.listeners, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
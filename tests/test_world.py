@@ -3,7 +3,10 @@ Unit tests for World and WorldMap classes
 """
 import unittest
 from unittest.mock import patch
-from game.world import World, WorldMap, WorldType, CellType, MajorEventType
+from game.game_manager import GameManager
+from game.world import (
+    World, WorldMap, ChunkedWorldMap, WorldType, CellType, MajorEventType, EDGE_MARGIN
+)
 
 
 class TestWorldMap(unittest.TestCase):
@@ -15,10 +18,25 @@ class TestWorldMap(unittest.TestCase):
     def test_worldmap_initialization(self):
         self.assertEqual(self.world_map.world_type, WorldType.EARTH)
         self.assertEqual(self.world_map.size, 10)
-        self.assertEqual(len(self.world_map.grid), 10)
-        self.assertEqual(len(self.world_map.grid[0]), 10)
+        self.assertIsNone(self.world_map.cells)
         self.assertIsInstance(self.world_map.major_events, dict)
     
+    def test_set_cell(self):
+        # Setting an empty cell on an empty map allocates nothing
+        self.assertTrue(self.world_map.set_cell(1, 1, CellType.EMPTY))
+        self.assertIsNone(self.world_map.cells)
+        
+        self.assertTrue(self.world_map.set_cell(1, 2, CellType.TREASURE))
+        self.assertEqual(self.world_map.get_cell(1, 2), CellType.TREASURE)
+        self.assertEqual(self.world_map.get_cell(2, 1), CellType.EMPTY)
+        self.assertEqual(len(self.world_map.cells), 100)
+        
+        self.world_map.set_cell(1, 2, CellType.EMPTY)
+        self.assertEqual(self.world_map.get_cell(1, 2), CellType.EMPTY)
+        
+        # Out of bounds cells are rejected
+        self.assertFalse(self.world_map.set_cell(10, 0, CellType.NPC))
+    
     def test_get_cell_valid_coordinates(self):
         # Test getting a cell within bounds
         cell = self.world_map.get_cell(5, 5)
@@ -38,6 +56,34 @@ class TestWorldMap(unittest.TestCase):
         self.assertTrue(self.world_map.has_major_event_at(3, 3))
         self.assertFalse(self.world_map.has_major_event_at(4, 4))
     
+    def make_empty_map(self, **kwargs):
+        world_map = WorldMap(WorldType.EARTH, size=20, **kwargs)
+        for x, y in list(world_map.major_events):
+            world_map.remove_major_event(x, y)
+        return world_map
+    
+    def test_hint_index(self):
+        world_map = self.make_empty_map()
+        world_map.add_major_event(10, 10, MajorEventType.DRAGON)
+        world_map.add_major_event(13, 10, MajorEventType.BOSS_ENEMY)
+        
+        # Nearest event wins within the hint radius
+        self.assertEqual(world_map.get_hints_at(8, 10), {"east": (2, MajorEventType.DRAGON)})
+        self.assertEqual(world_map.get_hints_at(11, 10)["east"], (2, MajorEventType.BOSS_ENEMY))
+        self.assertEqual(world_map.get_hints_at(11, 10)["west"], (1, MajorEventType.DRAGON))
+        self.assertEqual(world_map.get_hints_at(10, 12), {"north": (2, MajorEventType.DRAGON)})
+        self.assertEqual(world_map.get_hints_at(10, 13), {})
+        
+        # Changing events invalidates the index
+        world_map.remove_major_event(10, 10)
+        self.assertEqual(world_map.get_hints_at(8, 10), {})
+    
+    def test_hint_radius(self):
+        world_map = self.make_empty_map(hint_radius=5)
+        world_map.add_major_event(10, 10, MajorEventType.DRAGON)
+        self.assertEqual(world_map.get_hints_at(10, 15), {"north": (5, MajorEventType.DRAGON)})
+        self.assertEqual(world_map.get_hints_at(10, 16), {})
+    
     def test_get_cell_with_major_event(self):
         # Add a major event and test retrieval
         self.world_map.major_events[(2, 2)] = MajorEventType.TREASURE_VAULT
@@ -55,11 +101,26 @@ class TestWorld(unittest.TestCase):
         self.assertEqual(self.world.current_world, WorldType.EARTH)
         self.assertEqual(self.world.player_x, 25)
         self.assertEqual(self.world.player_y, 25)
-        self.assertEqual(len(self.world.maps), len(WorldType))
         
-        # Check all world types are generated
-        for world_type in WorldType:
-            self.assertIn(world_type, self.world.maps)
+        # No world maps are generated until they are first needed
+        self.assertEqual(self.world.get_loaded_worlds(), [])
+    
+    def test_lazy_world_generation(self):
+        self.world.get_current_map()
+        self.assertEqual(self.world.get_loaded_worlds(), [WorldType.EARTH])
+        self.assertFalse(self.world.is_world_loaded(WorldType.ATLANTIS))
+        
+        # Entering a realm generates its map
+        self.world.change_world(WorldType.ATLANTIS)
+        self.assertTrue(self.world.is_world_loaded(WorldType.ATLANTIS))
+        
+        # Maps are generated only once
+        atlantis_map = self.world.get_current_map()
+        self.assertIs(self.world.get_map(WorldType.ATLANTIS), atlantis_map)
+    
+    def test_generate_all_worlds(self):
+        self.world.generate_all_worlds()
+        self.assertEqual(len(self.world.maps), len(WorldType))
     
     def test_get_current_map(self):
         current_map = self.world.get_current_map()
@@ -171,18 +232,39 @@ class TestWorld(unittest.TestCase):
         self.assertTrue(5 <= self.world.player_x <= 44)
         self.assertTrue(5 <= self.world.player_y <= 44)
     
-    @patch('random.random')
-    def test_get_current_cell_random_encounter(self, mock_random):
+    @patch('game.world.derive_cell_roll')
+    def test_get_current_cell_random_encounter(self, mock_roll):
         # Test empty cell with no random encounter
-        mock_random.return_value = 0.5  # > 0.25, so no enemy
+        mock_roll.return_value = 0.5  # > 0.25, so no enemy
         cell_content = self.world.get_current_cell()
         self.assertEqual(cell_content, CellType.EMPTY)
         
         # Test empty cell with random encounter
-        mock_random.return_value = 0.1  # < 0.25, so enemy
+        mock_roll.return_value = 0.1  # < 0.25, so enemy
         cell_content = self.world.get_current_cell()
         self.assertEqual(cell_content, CellType.ENEMY)
     
+    def test_seeded_world_is_reproducible(self):
+        world_a = World(seed=1234)
+        world_b = World(seed=1234)
+        self.assertEqual(world_a.seed, 1234)
+        
+        for world_type in WorldType:
+            self.assertEqual(world_a.get_map(world_type).major_events,
+                             world_b.get_map(world_type).major_events)
+        
+        # Encounter rolls depend only on the seed and position
+        for x, y in [(25, 25), (0, 0), (12, 40)]:
+            world_a.player_x = world_b.player_x = x
+            world_a.player_y = world_b.player_y = y
+            self.assertEqual(world_a.get_current_cell(), world_b.get_current_cell())
+            self.assertEqual(world_a.get_current_cell(), world_a.get_current_cell())
+    
+    def test_different_seeds_differ(self):
+        maps_a = [World(seed=1).get_map(w).major_events for w in WorldType]
+        maps_b = [World(seed=2).get_map(w).major_events for w in WorldType]
+        self.assertNotEqual(maps_a, maps_b)
+    
     def test_get_current_cell_with_major_event(self):
         # Add a major event at player position
         current_map = self.world.get_current_map()
@@ -236,8 +318,7 @@ class TestWorldEdgeCases(unittest.TestCase):
         """Test that world maps are consistently generated"""
         # All world types should have maps
         for world_type in WorldType:
-            self.assertIn(world_type, self.world.maps)
-            world_map = self.world.maps[world_type]
+            world_map = self.world.get_map(world_type)
             self.assertEqual(world_map.world_type, world_type)
             self.assertEqual(world_map.size, 50)
     
@@ -307,6 +388,87 @@ class TestWorldEdgeCases(unittest.TestCase):
         self.assertEqual(len(available_directions), 4)  # All directions available
 
 
+class TestWorldMapSize(unittest.TestCase):
+    
+    def test_custom_map_size_bounds(self):
+        world = World(seed=7, map_size=20)
+        self.assertEqual((world.player_x, world.player_y), (10, 10))
+        self.assertEqual(world.get_current_map().size, 20)
+        
+        world.player_x = 19
+        world.player_y = 19
+        self.assertEqual(set(world.get_available_directions()), {"north", "west"})
+        success, message = world.move_player("east")
+        self.assertFalse(success)
+        self.assertEqual(world.player_x, 19)
+        self.assertIsNone(world.get_direction_hint("south"))
+    
+    def test_change_world_respects_map_size(self):
+        world = World(seed=7, map_size=20)
+        world.change_world(WorldType.ATLANTIS)
+        self.assertTrue(5 <= world.player_x <= 14)
+        self.assertTrue(5 <= world.player_y <= 14)
+    
+    def test_small_maps_cap_major_events(self):
+        # Only 2x2 positions are away from the edges of a 12x12 map
+        for size in (12, 13, 14, 15):
+            world_map = WorldMap(WorldType.EARTH, size=size, seed=1)
+            span = size - 2 * EDGE_MARGIN
+            self.assertLessEqual(len(world_map.major_events), span * span)
+            for x, y in world_map.major_events:
+                self.assertTrue(EDGE_MARGIN <= x < size - EDGE_MARGIN)
+                self.assertTrue(EDGE_MARGIN <= y < size - EDGE_MARGIN)
+        game = GameManager(map_size=12, seed=1)
+        self.assertEqual(game.world.get_current_map().size, 12)
+    
+    def test_large_maps_are_chunked(self):
+        world = World(seed=7, map_size=100000)
+        current_map = world.get_current_map()
+        self.assertIsInstance(current_map, ChunkedWorldMap)
+        self.assertEqual(world.player_x, 50000)
+        
+        # Only chunks near the player are generated
+        world.move_player("east")
+        self.assertLessEqual(len(current_map.chunks), 9)
+    
+    def test_far_chunks_are_evicted_and_regenerated(self):
+        world = World(seed=7, map_size=100000)
+        current_map = world.get_current_map()
+        world.move_player("east")
+        start_chunks = dict(current_map.chunks)
+        start_events = dict(current_map.major_events)
+        
+        # Walk far enough that the starting chunks are evicted
+        for _ in range(current_map.chunk_size * 4):
+            world.move_player("east")
+        self.assertTrue(set(start_chunks).isdisjoint(current_map.chunks))
+        self.assertLessEqual(len(current_map.chunks), 25)
+        
+        # Walking back regenerates the same major events
+        for _ in range(current_map.chunk_size * 4):
+            world.move_player("west")
+        for position, event_type in start_events.items():
+            self.assertEqual(current_map.get_cell(*position), event_type)
+    
+    def test_chunked_map_keeps_changes(self):
+        world_map = ChunkedWorldMap(WorldType.EARTH, size=1000, seed=3)
+        world_map.set_cell(500, 500, CellType.TREASURE)
+        world_map.add_major_event(400, 400, MajorEventType.DRAGON)
+        world_map.remove_major_event(400, 400)
+        
+        # Evict everything, then come back
+        world_map.load_around(0, 0)
+        world_map.load_around(500, 500)
+        self.assertEqual(world_map.get_cell(500, 500), CellType.TREASURE)
+        self.assertFalse(world_map.has_major_event_at(400, 400))
+    
+    def test_chunked_map_hints(self):
+        world_map = ChunkedWorldMap(WorldType.EARTH, size=1000, seed=3)
+        world_map.load_around(500, 500)
+        world_map.add_major_event(502, 500, MajorEventType.DRAGON)
+        self.assertEqual(world_map.get_hints_at(500, 500)["east"], (2, MajorEventType.DRAGON))
+
+
 class TestWorldMapEdgeCases(unittest.TestCase):
     
     def test_small_map_no_events(self):